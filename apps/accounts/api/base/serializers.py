@@ -223,4 +223,15 @@ class BaseDriverStatusSerializer(serializers.Serializer):
 
             instance.save()
 
-        return instance
\ No newline at end of file
+        return instance
+
+
+class BaseDriverLocationSampleSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    recorded_at = serializers.FloatField(required=False, min_value=0, help_text="Epoch seconds")
+    accuracy = serializers.FloatField(required=False, min_value=0)
+
+
+class BaseDriverLocationIngestSerializer(serializers.Serializer):
+    samples = BaseDriverLocationSampleSerializer(many=True, allow_empty=False, max_length=500)
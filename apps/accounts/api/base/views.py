@@ -26,10 +26,11 @@ from apps.accounts.api.base.serializers import (
     BaseUserSerializer,
     SocialLoginSerializer,
 )
-from apps.accounts.api.v1.serializers import UserSerializer, ProfileSerializer, VehicleSerializer, DriverSessionSerializer, DriverStatusSerializer
+from apps.accounts.api.v1.serializers import UserSerializer, ProfileSerializer, VehicleSerializer, DriverSessionSerializer, DriverStatusSerializer, DriverLocationIngestSerializer
 from apps.accounts.models import User, Profile, Vehicle, DriverSession, DriverWorkHistory
-from apps.billing.models import Delivery
+from apps.billing.models import Delivery, DriverDailyStats
 from apps.billing.api.base.serializers import DeliveryGETSerializer
+from apps.billing.services.driver_locations import get_location_ingest
 from django.shortcuts import get_object_or_404
 from datetime import datetime, timedelta
 from django.db.models import Sum, Q, F
@@ -381,6 +382,27 @@ class BaseDriverStatusView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
       
       
+class BaseDriverLocationIngestView(APIView):
+    """
+    GPS pings from the driver app. Accepts one sample
+    ({"latitude", "longitude"}) or a batch ({"samples": [...]}); the newest
+    sample becomes the driver's live position. User.latitude/longitude is
+    only rewritten on significant movement or periodically.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if request.user.role != 'driver':
+            return Response({"detail": "Only drivers can access this endpoint."}, status=status.HTTP_403_FORBIDDEN)
+
+        data = request.data if "samples" in request.data else {"samples": [request.data]}
+        serializer = DriverLocationIngestSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        accepted, flushed = get_location_ingest().ingest(request.user.id, serializer.validated_data["samples"])
+        return Response({"accepted": accepted, "flushed": flushed}, status=status.HTTP_202_ACCEPTED)
+
+
 class BaseAdminGetAllActiveDriversView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     
@@ -410,52 +432,36 @@ class BaseDriverWorkHistorySummaryView(APIView):
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
 
-        date_filter = Q(status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS)
-
+        # Daily summary from the DriverDailyStats rollup, not from raw deliveries
+        daily_stats = DriverDailyStats.objects.filter(driver=user, delivered__gt=0)
         if start_date:
-            date_filter &= Q(actual_delivery_completed_time__date__gte=start_date)
+            daily_stats = daily_stats.filter(day__gte=start_date)
         if end_date:
-            date_filter &= Q(actual_delivery_completed_time__date__lte=end_date)
-
-        # Aggregate daily summary from deliveries, not from DriverWorkHistory
-        daily_summary = (
-            Delivery.objects.filter(driver=user)
-            .filter(date_filter)
-            .annotate(day=TruncDate("actual_delivery_completed_time"))
-            .values("day")
-            .annotate(
-                total_deliveries=Count("id"),
-                total_earnings=Sum("driver_earning"),
-                offline_count=Count("driver__work_history__offline_count"),  # Ensure correct tracking
-                on_time_deliveries=Sum(
-                    Case(
-                        When(actual_delivery_completed_time__lte=F("est_delivery_completed_time"), then=1),
-                        default=0,
-                        output_field=IntegerField(),
-                    )
-                ),
-                total_active_hours=Sum("driver__work_history__total_active_hours"),
-                online_duration=Sum("driver__work_history__online_duration"),
-            )
-            .order_by("-day")
+            daily_stats = daily_stats.filter(day__lte=end_date)
+
+        # DriverWorkHistory has no date, so its figures are the driver's
+        # totals and are returned once rather than repeated on every day
+        work_history = DriverWorkHistory.objects.filter(user=user).aggregate(
+            offline_count=Sum("offline_count"),
+            total_active_hours=Sum("total_active_hours"),
+            online_duration=Sum("online_duration"),
         )
 
-        # Convert queryset to a list and process timestamps
+        # Convert rollup rows to the API shape and process timestamps
         daily_summary_list = []
-        for entry in daily_summary:
-            print(entry, 'entry----------->')  # Debugging output
-
-            day_date = entry["day"]
-            if day_date:  # Ensure it's not None
-                entry["weekday"] = day_date.strftime("%A")  # Extract weekday
-                entry["day"] = str(day_date)  # Convert to string for API response
+        for day_date, delivered, earnings, on_time in daily_stats.order_by("-day").values_list(
+            "day", "delivered", "earnings", "on_time_estimate"
+        ):
+            daily_summary_list.append({
+                "day": str(day_date),
+                "total_deliveries": delivered,
+                "total_earnings": earnings,
+                "on_time_deliveries": on_time,
+                "weekday": day_date.strftime("%A"),  # Extract weekday
                 # Calculate week number since joining date
-                weeks_since_joining = (day_date - driver_joining_date).days // 7 + 1
-                entry["week_number"] = weeks_since_joining  # Add calculated week number
-                daily_summary_list.append(entry)
-                
-        
-                
+                "week_number": (day_date - driver_joining_date).days // 7 + 1,
+            })
+
         completed_deliveries = Delivery.objects.filter(
             driver=user, 
             status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS
@@ -481,6 +487,7 @@ class BaseDriverWorkHistorySummaryView(APIView):
         return Response(
             {
                 "daily_summary": daily_summary_list,
+                "work_history": work_history,
                 "deliveries": {
                     "completed": completed_deliveries_data,
                     "cancelled": cancelled_deliveries_data
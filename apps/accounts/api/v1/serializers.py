@@ -5,7 +5,8 @@ from apps.accounts.api.base.serializers import (
     BaseProfileSerializer,
     BaseVehicleSerializer,
     BaseDriverSessionSerializer,
-    BaseDriverStatusSerializer
+    BaseDriverStatusSerializer,
+    BaseDriverLocationIngestSerializer
 )
 
 
@@ -32,4 +33,8 @@ class DriverSessionSerializer(BaseDriverSessionSerializer):
     pass
 
 class DriverStatusSerializer(BaseDriverStatusSerializer):
-  pass
\ No newline at end of file
+  pass
+
+
+class DriverLocationIngestSerializer(BaseDriverLocationIngestSerializer):
+    pass
@@ -16,7 +16,8 @@ from apps.accounts.api.v1.views import (
     DriverStatusView,
     AdminGetAllActiveDriversView,
     DriverWorkHistorySummaryView,
-    DriverVerifyChatView
+    DriverVerifyChatView,
+    DriverLocationIngestView
 
 )
 
@@ -59,5 +60,6 @@ urlpatterns = [
        path('user/active-status/', DriverSessionView.as_view(), name='active-status'),
        path('user/active-drivers/', AdminGetAllActiveDriversView.as_view(), name='active-drivers'),
        path('user/driver-work-history/', DriverWorkHistorySummaryView.as_view(), name='driver-work-history'),
-       path('user/verify-chat-user/', DriverVerifyChatView.as_view(), name='verify-chat-user')
+       path('user/verify-chat-user/', DriverVerifyChatView.as_view(), name='verify-chat-user'),
+       path('user/location/', DriverLocationIngestView.as_view(), name='driver-location-ingest'),
 ]
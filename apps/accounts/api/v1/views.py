@@ -14,7 +14,8 @@ from apps.accounts.api.base.views import (
     BaseDriverStatusView,
     BaseAdminGetAllActiveDriversView,
     BaseDriverWorkHistorySummaryView,
-    BaseDriverVerifyChatView
+    BaseDriverVerifyChatView,
+    BaseDriverLocationIngestView
 )
 from apps.accounts.api.v1.serializers import ChangePasswordSerializer, UserSerializer
 
@@ -72,4 +73,7 @@ class DriverWorkHistorySummaryView(BaseDriverWorkHistorySummaryView):
     pass
   
 class DriverVerifyChatView(BaseDriverVerifyChatView):
-    pass
\ No newline at end of file
+    pass
+
+class DriverLocationIngestView(BaseDriverLocationIngestView):
+    pass
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0024_alter_driversession_session_slot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["role", "latitude", "longitude"],
+                name="accounts_user_role_geo_idx",
+            ),
+        ),
+    ]
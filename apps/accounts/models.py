@@ -70,6 +70,14 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(
+                fields=["role", "latitude", "longitude"],
+                name="accounts_user_role_geo_idx",
+            ),
+        ]
+
     def activeStatus(self):
         return self.is_active
 
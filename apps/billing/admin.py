@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from apps.billing.models import Delivery, DeliveryFee,DeliveryEarningConfig
+from apps.billing.models import Delivery, DeliveryFee,DeliveryEarningConfig, DriverDailyStats, WebhookOutbox
 
 
 @admin.register(Delivery)
@@ -21,4 +21,18 @@ admin.site.register(DeliveryFee)
 
 @admin.register(DeliveryEarningConfig)
 class DeliveryEarningConfigAdmin(admin.ModelAdmin):
-    list_display = ('base_distance_km', 'base_earning', 'extra_per_km', 'updated_at')
\ No newline at end of file
+    list_display = ('base_distance_km', 'base_earning', 'extra_per_km', 'updated_at')
+
+
+@admin.register(WebhookOutbox)
+class WebhookOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "delivery", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    raw_id_fields = ("delivery",)
+
+
+@admin.register(DriverDailyStats)
+class DriverDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ("driver", "day", "delivered", "canceled", "on_time", "earnings")
+    list_filter = ("day",)
+    raw_id_fields = ("driver",)
@@ -4,7 +4,11 @@ from rest_framework import serializers
 
 from apps.accounts.models import Profile, Vehicle
 from apps.billing.models import Delivery, DeliveryIssue
-from apps.core.api.base.serializers import BaseAddressSerializer
+from apps.core.api.base.serializers import (
+    BaseAddressSerializer,
+    EagerLoadingListSerializer,
+    EagerLoadingMixin,
+)
 from django.utils import timezone
 from dateutil.parser import parse
 import pytz
@@ -40,11 +44,13 @@ class BaseDriverSerializer(serializers.ModelSerializer):
         ]
 
 
-class BaseDeliverySerializer(WritableNestedModelSerializer):
+class BaseDeliverySerializer(EagerLoadingMixin, WritableNestedModelSerializer):
     time_so_far = serializers.SerializerMethodField()
+    method_field_sources = {"time_so_far": ("pickup_last_time", "pickup_ready_at")}
     class Meta:
         model = Delivery
         fields = "__all__"
+        list_serializer_class = EagerLoadingListSerializer
     
     def get_time_so_far(self, obj):
         pickup_last_time = getattr(obj, 'pickup_last_time', None)
@@ -105,6 +111,8 @@ class DeliveryCreateSerializer(BaseDeliverySerializer):
     pickup_address = BaseAddressSerializer()
     drop_off_address = BaseAddressSerializer()
 
+    select_related_fields = ("pickup_address", "drop_off_address")
+
 
 class CheckAddressSerializer(DeliveryCreateSerializer):
     class Meta(DeliveryCreateSerializer.Meta):
@@ -122,9 +130,23 @@ class CheckAddressSerializer(DeliveryCreateSerializer):
         }
 
 
+class CheckAddressItemSerializer(serializers.Serializer):
+    """
+    Plain coordinate pair used by the bulk check-address endpoint; avoids the
+    nested address serializers and model validation of CheckAddressSerializer.
+    """
+    pickup_latitude = serializers.FloatField(min_value=-90, max_value=90)
+    pickup_longitude = serializers.FloatField(min_value=-180, max_value=180)
+    drop_off_latitude = serializers.FloatField(min_value=-90, max_value=90)
+    drop_off_longitude = serializers.FloatField(min_value=-180, max_value=180)
+
+
 class DeliveryGETSerializer(DeliveryCreateSerializer):
     driver = BaseDriverSerializer()
 
+    select_related_fields = (*DeliveryCreateSerializer.select_related_fields, "driver", "driver__rider_profile")
+    prefetch_related_fields = ("driver__raider_vehicle",)
+
 
 class BaseCancelDeliverySerializer(serializers.Serializer):
     uid = serializers.CharField()
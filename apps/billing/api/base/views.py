@@ -1,4 +1,6 @@
+import hashlib
 import math
+from functools import partial
 import googlemaps
 import requests
 from decouple import config
@@ -9,10 +11,12 @@ from rest_framework import status
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
 from datetime import timedelta, datetime
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.core.mail import send_mail
 from django.conf import settings
@@ -20,6 +24,7 @@ from decimal import Decimal, ROUND_HALF_UP
 
 from apps.billing.api.base.serializers import (
     BaseCancelDeliverySerializer,
+    CheckAddressItemSerializer,
     CheckAddressSerializer,
     DeliveryCreateSerializer,
     DeliveryGETSerializer,
@@ -27,11 +32,34 @@ from apps.billing.api.base.serializers import (
     DeliveryIssueSerializer,DeliveryTrackSerializer
 )
 from apps.billing.models import Delivery, DeliveryFee, DeliveryIssue
-from apps.billing.services.haversine_distance import calculate_haversine_distance
+from apps.billing.services.dashboard_cache import EMPTY_DRIVER_STATS, dashboard_figures
+from apps.billing.services.driver_locations import nearby_drivers_queryset
+from apps.billing.services.geocoding import geocode_cache
+from apps.billing.services.haversine_distance import calculate_haversine_distance, haversine_vector
+from apps.billing.services.routing import get_routing_service
+from apps.billing.services.spatial_index import open_delivery_index
+from apps.billing.services.tracking import tracking_version
+from apps.billing.utils.client_status_update import raider_cancel_notifier
+from apps.core.pagination import (
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+    keyset_page,
+    parse_limit,
+    set_next_link,
+)
 from django.utils.dateparse import parse_date
 
 gmaps = googlemaps.Client(key=config("GOOGLE_MAP_KEY"))
 mapbox_api_key = config("MAPBOX_KEY")
+
+
+def routing_service(provider):
+    # share this module's provider clients with the routing backends
+    credentials = {"google": {"client": gmaps}, "mapbox": {"access_token": mapbox_api_key}}
+    return get_routing_service(provider, **credentials[provider])
+
+
 User = get_user_model()
 from apps.billing.api.base.serializers import BaseDriverSerializer
 from django.utils.timezone import now
@@ -39,16 +67,18 @@ from django.db.models import Count, Sum
 from collections import defaultdict
 from django.db.models.functions import TruncDate
 from apps.billing.models import DeliveryEarningConfig
-from apps.billing.utils.earning_calculation import calculate_driver_earning,calculate_total_driver_earning
-from apps.billing.utils.guarantee import OnTimeGuaranteeService
+from apps.billing.utils.earning_calculation import calculate_driver_earning,calculate_total_driver_earning, get_config
+from apps.billing.tasks import issue_on_time_reward_task
 from apps.firebase.utils.fcm_helper import send_push_notification
 from apps.core.permissions import IsOwnerRoleOrReadOnly
 from apps.firebase.models import TokenFCM
-from django.db.models import OuterRef, Subquery
+from django.db.models import Max
 
 import logging, json
 logger = logging.getLogger("delivery.checkaddress")
 
+MAX_DELIVERY_DISTANCE_KM = 10
+
 
 class BaseCreateDeliveryAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -94,7 +124,7 @@ class BaseCreateDeliveryAPIView(APIView):
         )
         if distance is None:
             return Response({"detail": "Distance calculation failed."}, status=status.HTTP_400_BAD_REQUEST)
-        if distance > 10:
+        if distance > MAX_DELIVERY_DISTANCE_KM:
             return Response("We can not deliver to this address!", status=status.HTTP_400_BAD_REQUEST)
 
         fees = self.calculate_delivery_fee(distance)
@@ -104,8 +134,7 @@ class BaseCreateDeliveryAPIView(APIView):
         print(instance.pickup_last_time, 'instance.pickup_last_time--------------->')
 
         # ETA uses configured minutes-per-km (kept same)
-        config = DeliveryEarningConfig.objects.first()
-        time_per_km_minutes = config.estimated_time_per_km if config else 3.5
+        time_per_km_minutes = get_config()["estimated_time_per_km"]
         estimated_travel_time_minutes = distance * time_per_km_minutes
 
         # Persist fields
@@ -143,21 +172,16 @@ class BaseCreateDeliveryAPIView(APIView):
             return self.get_distance_gmaps(lat1, lng1, lat2, lng2)
         return self.get_distance_gmaps(lat1, lng1, lat2, lng2)
 
+    def get_distance_matrix(self, origins, destinations, use_google=True):
+        """
+        Driving distances (km) for every origin x destination pair, batched
+        per provider call and served from the route cache where possible.
+        """
+        return routing_service("google" if use_google else "mapbox").distance_matrix(origins, destinations)
+
     def get_geo_using_gmaps(self, address):
-      
         try:
-          # count the api call
-            print("API Call")
-            geocode_result = gmaps.geocode(address)
-            if geocode_result:
-                location = geocode_result[0].get("geometry", {}).get("location", {})
-                lat = location.get("lat")
-                lng = location.get("lng")
-
-                if lat is not None and lng is not None:
-                    return {"lat": lat, "lng": lng}
-            return None
-
+            return geocode_cache.lookup(address, "gmaps", self._geocode_gmaps)
         except googlemaps.exceptions.ApiError as e:
             print(f"Google Maps API error: {e}")
         except googlemaps.exceptions.Timeout as e:
@@ -169,58 +193,56 @@ class BaseCreateDeliveryAPIView(APIView):
 
         return None
 
+    def _geocode_gmaps(self, address):
+        # count the api call
+        print("API Call")
+        geocode_result = gmaps.geocode(address)
+        if geocode_result:
+            location = geocode_result[0].get("geometry", {}).get("location", {})
+            lat = location.get("lat")
+            lng = location.get("lng")
+
+            if lat is not None and lng is not None:
+                return {"lat": lat, "lng": lng}
+        return None
+
     def get_geo_mapbox(self, address):
+        try:
+            return geocode_cache.lookup(address, "mapbox", self._geocode_mapbox)
+        except requests.RequestException as e:
+            print(f"Error: {e}")
+            return None
+
+    def _geocode_mapbox(self, address):
         url = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{address}.json"
         params = {"access_token": mapbox_api_key, "limit": 1}
         response = requests.get(url, params=params)
-        
+
         print("API Call mapbox")
 
-        if response.status_code == 200:
-            data = response.json()
-            if data["features"]:
-                lng, lat = data["features"][0]["center"]
-                return {"lat": lat, "lng": lng}
-            else:
-                print("No location found for the given address.")
-                return None
-        else:
-            print(f"Error: {response.status_code}")
-            return None
+        response.raise_for_status()
+        data = response.json()
+        if data["features"]:
+            lng, lat = data["features"][0]["center"]
+            return {"lat": lat, "lng": lng}
 
-    def get_distance_gmaps(self, lat1, lng1, lat2, lng2):
-        origins = [(lat1, lng1)]
-        destinations = [(lat2, lng2)]
+        print("No location found for the given address.")
+        return None
 
-        result = gmaps.distance_matrix(origins, destinations, mode="driving")
+    def get_distance_gmaps(self, lat1, lng1, lat2, lng2):
+        return routing_service("google").distance(lat1, lng1, lat2, lng2)
 
+    def get_distance_mapbox(self, lat1, lng1, lat2, lng2):
         try:
-            distance = result["rows"][0]["elements"][0]["distance"]["value"]
-            return distance / 1000
-        except (IndexError, KeyError):
+            distance_km = routing_service("mapbox").distance(lat1, lng1, lat2, lng2)
+        except requests.RequestException as e:
+            print(f"Error: {e}")
             return None
 
-    def get_distance_mapbox(self, lat1, lng1, lat2, lng2):
-        url = f"https://api.mapbox.com/directions/v5/mapbox/driving/{lng1},{lat1};{lng2},{lat2}"
-        params = {
-            "access_token": mapbox_api_key,
-            "geometries": "geojson",
-        }
-
-        response = requests.get(url, params=params)
-
-        if response.status_code == 200:
-            data = response.json()
-            if data["routes"]:
-                distance_meters = data["routes"][0]["distance"]
-                distance_km = distance_meters / 1000
-                return float("{0:.2f}".format(distance_km))
-            else:
-                print("No route found between the points.")
-                return None
-        else:
-            print(f"Error: {response.status_code}")
+        if distance_km is None:
+            print("No route found between the points.")
             return None
+        return float("{0:.2f}".format(distance_km))
 
     # def assign_driver_based_on_location(self, lat, lng):
     #     earth_radius_km = 6371
@@ -247,29 +269,9 @@ class BaseCreateDeliveryAPIView(APIView):
     #     return None
     def get_nearby_drivers(self, lat, lng, radius_km=5):
         """
-        Returns a queryset of drivers within the given radius.
+        Returns a queryset of drivers within the given radius, nearest first.
         """
-        earth_radius_km = 6371
-
-        nearby_drivers = (
-            User.objects.filter(is_driver=True, is_available=True)  # Assuming you track available drivers
-            .annotate(
-                distance=ExpressionWrapper(
-                    earth_radius_km
-                    * ACos(
-                        Cos(Radians(lat))
-                        * Cos(Radians(F("latitude")))
-                        * Cos(Radians(F("longitude")) - Radians(lng))
-                        + Sin(Radians(lat)) * Sin(Radians(F("latitude")))
-                    ),
-                    output_field=FloatField(),
-                )
-            )
-            .filter(distance__lte=radius_km)  # Get drivers within the radius
-            .order_by("distance")
-        )
-
-        return nearby_drivers
+        return nearby_drivers_queryset(lat, lng, radius_km)
 
     def calculate_delivery_fee(self, distance):
         """
@@ -319,7 +321,7 @@ class BaseCheckAddressAPIView(BaseCreateDeliveryAPIView):
         if distance is None or not isinstance(distance, (int, float)):
             return Response({"error": "Failed to compute distance"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if float(distance) > 10:
+        if float(distance) > MAX_DELIVERY_DISTANCE_KM:
             return Response("We can not deliver to this address!", status=status.HTTP_400_BAD_REQUEST)
 
         fees = self.calculate_delivery_fee(distance)
@@ -339,6 +341,67 @@ class BaseCheckAddressAPIView(BaseCreateDeliveryAPIView):
         return Response(resp)
 
 
+class BaseBulkCheckAddressAPIView(BaseCreateDeliveryAPIView):
+    """
+    Quotes many pickup/drop-off pairs in one request.
+
+    Body: {"pickup_latitude": .., "pickup_longitude": .., "items": [{"drop_off_latitude": ..,
+    "drop_off_longitude": ..}, ...]}. Top-level pickup coordinates are defaults that each
+    item may override. Invalid items get an "errors" entry instead of failing the request.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    max_items = 500
+
+    def post(self, request):
+        items = request.data.get("items")
+        if not isinstance(items, list) or not items:
+            return Response({"error": "items must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response(
+                {"error": f"At most {self.max_items} items are allowed per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        defaults = {
+            key: request.data[key]
+            for key in ("pickup_latitude", "pickup_longitude")
+            if request.data.get(key) is not None
+        }
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {"index": index, "errors": {"non_field_errors": ["Expected an object."]}}
+                continue
+            sr = CheckAddressItemSerializer(data={**defaults, **item})
+            if not sr.is_valid():
+                results[index] = {"index": index, "errors": sr.errors}
+                continue
+            valid.append((index, sr.validated_data))
+
+        if valid:
+            coords = [data for _, data in valid]
+            distances = haversine_vector(
+                [c["pickup_latitude"] for c in coords],
+                [c["pickup_longitude"] for c in coords],
+                [c["drop_off_latitude"] for c in coords],
+                [c["drop_off_longitude"] for c in coords],
+            )
+            for (index, data), distance in zip(valid, distances):
+                distance = float(distance)
+                deliverable = distance <= MAX_DELIVERY_DISTANCE_KM
+                results[index] = {
+                    "index": index,
+                    **data,
+                    "distance": round(distance, 3),
+                    "deliverable": deliverable,
+                    "fees": round(float(self.calculate_delivery_fee(distance)), 2) if deliverable else None,
+                }
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 
 # class BaseCheckAddressAPIView(BaseCreateDeliveryAPIView):
 #     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -421,6 +484,16 @@ class BaseCheckAddressAPIView(BaseCreateDeliveryAPIView):
 #         print(data, 'data--------------->')
 #         return Response(data)
 
+class BaseGeocodeCacheStatsApiView(APIView):
+    """
+    Hit/miss counters of this worker's geocode cache.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(geocode_cache.stats(), status=status.HTTP_200_OK)
+
+
 class BaseCancelDeliveryAPIView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
 
@@ -455,18 +528,9 @@ class BaseDriverCancelDeliveryAPIView(APIView):
         ]:
             delivery.status = Delivery.STATUS_TYPE.DELIVERY_FAILED
             delivery.cancel_reason = "Driver cancelled during delivery"
-            delivery.save()
-
-            # Notify Chatchef
-            try:
-                requests.post("https://api.hungrytiger.chatchefs.com/api/webhook/v1/raider/", json={
-                    "event": "status",
-                    "client_id": delivery.client_id,
-                    "status": delivery.status,
-                    "cancel_reason": delivery.cancel_reason,
-                })
-            except Exception as e:
-                print("Failed to notify Chatchef webhook:", str(e))
+            with transaction.atomic():
+                delivery.save()  # queues the Chatchef status webhook via the outbox
+                raider_cancel_notifier(delivery)
 
             return Response({
                 "message": "The delivery man has some issue, you will get full refund."
@@ -519,29 +583,16 @@ class BaseAvailableOrdersApiView(APIView):
 
             # Define the search radius (e.g., 3 km)
             search_radius_km = 3
-            earth_radius_km = 6371
 
-            # Find available deliveries within the radius and created within the last 3 hours
-            available_orders = (
-                Delivery.objects.filter(
-                    status=Delivery.STATUS_TYPE.WAITING_FOR_DRIVER,
-                    created_date__gte=three_hours_ago
-                )
-                .annotate(
-                    calculated_distance=ExpressionWrapper(
-                        earth_radius_km
-                        * ACos(
-                            Cos(Radians(driver_lat))
-                            * Cos(Radians(F("pickup_latitude")))
-                            * Cos(Radians(F("pickup_longitude")) - Radians(driver_lng))
-                            + Sin(Radians(driver_lat)) * Sin(Radians(F("pickup_latitude")))
-                        ),
-                        output_field=FloatField(),
-                    )
-                )
-                .filter(calculated_distance__lte=search_radius_km)
-                .order_by("calculated_distance")
-            )
+            # The in-memory grid index already applies the exact radius and
+            # orders by distance; the DB only confirms status and age, since
+            # other workers may have taken an order since the last rebuild.
+            candidate_ids = [pk for pk, _ in open_delivery_index.nearby(driver_lat, driver_lng, search_radius_km)]
+            still_open = Delivery.objects.filter(
+                status=Delivery.STATUS_TYPE.WAITING_FOR_DRIVER,
+                created_date__gte=three_hours_ago
+            ).in_bulk(candidate_ids)
+            available_orders = [still_open[pk] for pk in candidate_ids if pk in still_open]
 
         serializer = DeliveryGETSerializer(available_orders, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -621,11 +672,8 @@ class BaseOrderUpdateRetrieveApiView(APIView):
             
             # If updated to DELIVERY_SUCCESS, check reward eligibility
             if updated_instance.status == Delivery.STATUS_TYPE.DELIVERY_SUCCESS and old_status != Delivery.STATUS_TYPE.DELIVERY_SUCCESS:
-                try:
-                    logger.info("✅ Call On-Time Guarantee")
-                    OnTimeGuaranteeService(updated_instance).run()
-                except Exception as e:
-                    logger.error(f"❌ On-Time Guarantee failed: {e}")
+                logger.info("✅ Queue On-Time Guarantee")
+                transaction.on_commit(partial(self.queue_on_time_reward, updated_instance.id))
 
                 earning_result = updated_instance.update_final_earning()
                 # updated_instance.save()
@@ -635,6 +683,13 @@ class BaseOrderUpdateRetrieveApiView(APIView):
             updated_serializer = DeliveryGETSerializer(updated_instance)
             return Response(updated_serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    def queue_on_time_reward(delivery_id):
+        try:
+            issue_on_time_reward_task.delay(delivery_id)
+        except Exception as e:
+            logger.error(f"❌ Could not queue On-Time Guarantee for delivery {delivery_id}: {e}")
       
 # get the deliveries that's status are order_picked_up
 class BasePickedUpOrdersApiViews(APIView):
@@ -650,19 +705,51 @@ class BasePickedUpOrdersApiViews(APIView):
         sr = DeliveryGETSerializer(orders, many=True)
         return Response(sr.data, status=status.HTTP_200_OK)
       
+def _paginate_orders(request, orders):
+    """
+    Newest-first keyset page of ``orders`` on (created_date, id), serialized
+    with DeliveryGETSerializer or the projection asked for with ?fields=.
+    Returns ``(data, next_cursor)``.
+    """
+    serializer_class, only = DeliveryGETSerializer.project(request.query_params.get("fields"))
+    if only:
+        orders = orders.only(*only, "created_date")
+    rows, next_cursor = keyset_page(
+        serializer_class.setup_eager_loading(orders),
+        ["created_date", "id"],
+        cursor=request.query_params.get("cursor"),
+        limit=parse_limit(request.query_params.get("limit")),
+        descending=True,
+    )
+    return serializer_class(rows, many=True).data, next_cursor
+
+
 class BaseDriverOrderApiView(APIView):
+    """
+    The driver's orders, newest first, in pages of ?limit= (default 50,
+    max 200). The next page's ?cursor= is in the X-Next-Cursor / Link
+    headers; ?fields=id,status,... limits the serialized fields.
+    """
+
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        orders = Delivery.objects.filter(driver=request.user).order_by("id")
-        sr = DeliveryGETSerializer(orders, many=True)
-        return Response(sr.data, status=status.HTTP_200_OK)
+        orders = Delivery.objects.filter(driver=request.user)
+        data, next_cursor = _paginate_orders(request, orders)
+        return set_next_link(request, Response(data, status=status.HTTP_200_OK), next_cursor)
       
 class BaseAdminGetAllOrdersApiView(APIView):
+    """
+    Pages like BaseDriverOrderApiView; the cursor is also returned as
+    ``next_cursor``. ``count`` is reported on the first page only, estimated
+    by the planner for large results (``count_exact`` false) unless
+    ?count=exact is passed.
+    """
+
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def get(self, request):
-        orders = Delivery.objects.all().order_by("-created_date")
+        orders = Delivery.objects.all()
 
 
         # Query params
@@ -695,16 +782,38 @@ class BaseAdminGetAllOrdersApiView(APIView):
         if restaurant_id and not all_restaurants:
             orders = orders.filter(order__restaurant_id=restaurant_id)
 
-        serializer = DeliveryGETSerializer(orders, many=True)
-        return Response({"count": orders.count(), "orders": serializer.data})
+        data, next_cursor = _paginate_orders(request, orders)
+
+        cursor = request.query_params.get("cursor")
+        if request.query_params.get("count") == "exact":
+            count, count_exact = orders.count(), True
+        elif cursor:
+            count, count_exact = None, None
+        elif next_cursor is None:
+            count, count_exact = len(data), True
+        else:
+            count, count_exact = estimate_count(orders)
+
+        response = Response({
+            "count": count,
+            "count_exact": count_exact,
+            "orders": data,
+            "next_cursor": next_cursor,
+        })
+        return set_next_link(request, response, next_cursor)
 
 
 class BaseDashboardSalesApiView(APIView):
+    """
+    Sales dashboard over ``start_date``..``end_date`` (default: the last 7
+    days). Ranges that end before they start or span DASHBOARD_MAX_DAYS (366)
+    days or more are rejected with 400; earlier releases accepted any range.
+    """
+
     def get(self, request):
         # Parse query params with defaults
         start_date_str = request.query_params.get('start_date')
         end_date_str = request.query_params.get('end_date')
-        order_type = request.query_params.get('order_type', 'delivery')
 
         try:
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else now().date()
@@ -716,18 +825,22 @@ class BaseDashboardSalesApiView(APIView):
         except:
             return Response({"error": "Invalid start_date"}, status=400)
 
-        current_datetime = now()
+        max_days = getattr(settings, "DASHBOARD_MAX_DAYS", 366)
+        if not 0 <= (end_date - start_date).days < max_days:
+            return Response(
+                {"error": f"start_date must be on or before end_date and at most {max_days} days earlier"},
+                status=400,
+            )
 
-        # This week range: last 7 full days from now
-        this_week_start = current_datetime - timedelta(days=7)
-        this_week_end = current_datetime
+        today = timezone.localdate()
 
-        # Previous week range: 7 days before this_week_start
-        prev_week_start = this_week_start - timedelta(days=7)
-        prev_week_end = this_week_start
+        # This week range: the last 7 days, today included
+        this_week_start = today - timedelta(days=6)
+        this_week_end = today
 
-        # (Optional) You can print or log these to verify
-        print(this_week_start, this_week_end, prev_week_start, prev_week_end, 'Computed time ranges')
+        # Previous week range: the 7 days before this_week_start
+        prev_week_start = this_week_start - timedelta(days=7)
+        prev_week_end = this_week_start - timedelta(days=1)
 
         # Greeting
         current_hour = now().hour
@@ -740,59 +853,27 @@ class BaseDashboardSalesApiView(APIView):
         admin_name = "Admin"
 
         # Get drivers dynamically (filter your driver role/group)
-        drivers = User.objects.filter(role=User.RoleType.DRIVER) 
-        print(drivers, 'drivers--------------->')
-        driver_ids = list(drivers.values_list('id', flat=True))
+        drivers = list(User.objects.filter(role=User.RoleType.DRIVER))
         driver_names = {driver.id: " ".join(filter(None, [driver.first_name, driver.last_name])) for driver in drivers}
-        print(driver_names, driver_ids, 'driver_names--------------->')
-
-        # Total deliveries this week by driver
-        deliveries_this_week = (
-            Delivery.objects.filter(
-                driver_id__in=driver_ids,
-                actual_delivery_completed_time__range=[this_week_start, this_week_end],
-                status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
-            )
-            .values('driver_id')
-            .annotate(count=Count('id'))
-        )
-        deliveries_this_week_map = {item['driver_id']: item['count'] for item in deliveries_this_week}
-        
-        print(deliveries_this_week_map, 'deliveries_this_week_map--------------->')
-
-        # Total deliveries previous week by driver
-        deliveries_prev_week = (
-            Delivery.objects.filter(
-                driver_id__in=driver_ids,
-                actual_delivery_completed_time__date__range=[prev_week_start, prev_week_end],
-                status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
-            )
-            .values('driver_id')
-            .annotate(count=Count('id'))
-        )
-        deliveries_prev_week_map = {item['driver_id']: item['count'] for item in deliveries_prev_week}
-        
-        all_deliveries = (
-            Delivery.objects.filter(
-                driver_id__in=driver_ids,
-                actual_delivery_completed_time__date__range=[start_date, end_date],
-                status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
-            )
-            .values('driver_id')
-            .annotate(count=Count('id'))
+
+        # Per-driver figures, per-day chart and fleet totals from the cached day summaries
+        driver_stats, daily_driver_deliveries, totals = dashboard_figures(
+            start_date,
+            end_date,
+            this_week=(this_week_start, this_week_end),
+            prev_week=(prev_week_start, prev_week_end),
         )
-        all_deliveries_map = {item['driver_id']: item['count'] for item in all_deliveries}
-        
+        empty_stats = EMPTY_DRIVER_STATS
 
         # Build driver summary with weekly growth
         driver_summary_list = []
         total_deliveries_all = 0
-        failed_deliveries_all = 0
         total_deliveries_prev_all = 0
         for driver in drivers:
-            all_deliveries_count = all_deliveries_map.get(driver.id, 0)
-            this_week_count = deliveries_this_week_map.get(driver.id, 0)
-            prev_week_count = deliveries_prev_week_map.get(driver.id, 0)
+            stats = driver_stats.get(driver.id, empty_stats)
+            all_deliveries_count = stats['delivered']
+            this_week_count = stats['delivered_this_week']
+            prev_week_count = stats['delivered_prev_week']
             total_deliveries_all += all_deliveries_count
             total_deliveries_prev_all += prev_week_count
             if prev_week_count > 0:
@@ -815,26 +896,11 @@ class BaseDashboardSalesApiView(APIView):
         # Build daily driver deliveries (last 7 days)
         days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
 
-        # Single aggregated query: counts per driver per day
-        deliveries_agg = (
-            Delivery.objects.filter(
-                driver_id__in=driver_ids,
-                actual_delivery_completed_time__date__range=[start_date, end_date],
-                status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
-            )
-            .annotate(day=TruncDate('actual_delivery_completed_time'))
-            .values('driver_id', 'day')
-            .annotate(count=Count('id'))
-        )
-        
-        print(deliveries_agg, 'deliveries_agg--------------->')
-
         # Build a nested dict: {day: {driver_name: count, ...}, ...}
         daily_deliveries_map = defaultdict(lambda: defaultdict(int))
-        for item in deliveries_agg:
-            day = item['day']
-            driver_name = driver_names[item['driver_id']]
-            daily_deliveries_map[day][driver_name] = item['count']
+        for driver_id, day, count in daily_driver_deliveries:
+            if driver_id in driver_names:
+                daily_deliveries_map[day][driver_names[driver_id]] = count
 
         # Build the daily_deliveries_list with all days and all drivers included
         daily_deliveries_list = []
@@ -846,19 +912,10 @@ class BaseDashboardSalesApiView(APIView):
                 deliveries_for_day[driver_name] = daily_deliveries_map[day].get(driver_name, 0)
             daily_deliveries_list.append({'day': day_label, 'deliveries': deliveries_for_day})
 
-        # Filter deliveries in the date range
-        deliveries = Delivery.objects.filter(created_date__date__range=[start_date, end_date])
-        
-        # Total number of deliveries
-        total_deliveries = deliveries.count()
-
-        # Total number of completed deliveries (DELIVERY_SUCCESS)
-        completed_deliveries = deliveries.filter(status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS).count()
-        print(completed_deliveries, 'completed_deliveries--------------->')
-        completed_deliveries_prev = Delivery.objects.filter(
-            actual_delivery_completed_time__date__range=[prev_week_start, prev_week_end],
-            status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS
-        ).count()
+        # Fleet-wide totals for the date range and the previous week
+        total_deliveries = totals['created']
+        completed_deliveries = totals['created_delivered']
+        completed_deliveries_prev = totals['delivered_prev_week']
 
         if total_deliveries > 0:
             average_fulfillment_rate = (completed_deliveries / total_deliveries) * 100
@@ -879,99 +936,31 @@ class BaseDashboardSalesApiView(APIView):
         driver_delivery_count_change_pct = 0
         if total_deliveries_prev_all > 0:
             driver_delivery_count_change_pct = ((total_deliveries_all - total_deliveries_prev_all) / total_deliveries_prev_all) * 100
-            
-            
-        # driver days since joined
-        driver_days_since_joined = {}
-        for driver in drivers:
-            if driver.date_joined:
-                days_since_joined = (now().date() - driver.date_joined.date()).days
-                driver_days_since_joined[driver.id] = days_since_joined
-            else:
-                driver_days_since_joined[driver.id] = 0
-                
-        # Earnings and delivery count per driver
-        driver_earnings_data = (
-            Delivery.objects.filter(
-                driver_id__in=driver_ids,
-                status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS
-            )
-            .values('driver_id')
-            .annotate(
-                total_earnings=Sum('driver_earning'),
-                total_deliveries=Count('id')
-            )
-        )
-        driver_earning_map = {item['driver_id']: item['total_earnings'] or 0 for item in driver_earnings_data}
 
-        
-        driver_avg_cost_map = {}
-        for item in driver_earnings_data:
-            driver_id = item['driver_id']
-            earnings = item['total_earnings'] or 0
-            deliveries = item['total_deliveries'] or 0
-            avg = earnings / deliveries if deliveries > 0 else 0
-            driver_avg_cost_map[driver_id] = avg
-            
-        # driver specific delivery fulfillment rate
-        driver_fulfillment_rate_map = {}
-        for driver in drivers:
-            driver_deliveries = Delivery.objects.filter(
-                driver=driver,
-                created_date__date__range=[start_date, end_date],
-            )
-            total_driver_deliveries = driver_deliveries.count()
-            completed_driver_deliveries = driver_deliveries.filter(status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS).count()
-            if total_driver_deliveries > 0:
-                fulfillment_rate = (completed_driver_deliveries / total_driver_deliveries) * 100
-            else:
-                fulfillment_rate = 0.0
-            driver_fulfillment_rate_map[driver.id] = fulfillment_rate
-        
-        # specific driver on time delivery rate 
-        driver_on_time_delivery_map = {}
-        for driver in drivers:
-            driver_deliveries = Delivery.objects.filter(
-                driver=driver,
-                actual_delivery_completed_time__date__range=[start_date, end_date],
-            )
-            total_driver_deliveries = driver_deliveries.count()
-            on_time_deliveries = driver_deliveries.filter(
-                actual_delivery_completed_time__lte=F('drop_off_last_time')
-            ).count()
-            if total_driver_deliveries > 0:
-                on_time_rate = (on_time_deliveries / total_driver_deliveries) * 100
-            else:
-                on_time_rate = 0.0
-            driver_on_time_delivery_map[driver.id] = on_time_rate
-            
         # avg earning per month
         months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month) + 1
-        driver_avg_earning_map = {}
-        for driver_id, total_earning in driver_earning_map.items():
-          avg_earning = total_earning / months if months > 0 else 0
-          driver_avg_earning_map[driver_id] = avg_earning
-
-        # total earnings for specific driver
 
         # Build driver details list
         driver_details_list = []
         for driver in drivers:
+            stats = driver_stats.get(driver.id, empty_stats)
+            total_earning = stats['total_earnings'] or 0
+            delivered = stats['total_delivered']
+            created = stats['created']
+            completed = stats['completed']
             driver_details_list.append({
                 'driver_id': f"{driver.id}",
-                'driver_name': " ".join(filter(None, [driver.first_name, driver.last_name])),
+                'driver_name': driver_names[driver.id],
                 'phone_number': driver.phone or '',
                 'email': driver.email or '',
                 'status': 'Active' if driver.is_active else 'Offline',
-                'days_since_joined': driver_days_since_joined[driver.id],
-                'avg_cost_per_delivery': round(driver_avg_cost_map.get(driver.id, 0), 2),
-                'fulfillment_rate': round(driver_fulfillment_rate_map.get(driver.id, 0), 2),
-                'on_time_delivery_rate': round(driver_on_time_delivery_map.get(driver.id, 0), 2),
-                'total_earnings': round(driver_earning_map.get(driver.id, 0), 2),
-                'avg_earning_per_month': round(driver_avg_earning_map.get(driver.id, 0), 2),
+                'days_since_joined': (now().date() - driver.date_joined.date()).days if driver.date_joined else 0,
+                'avg_cost_per_delivery': round(total_earning / delivered if delivered > 0 else 0, 2),
+                'fulfillment_rate': round((stats['created_delivered'] / created) * 100 if created > 0 else 0.0, 2),
+                'on_time_delivery_rate': round((stats['on_time'] / completed) * 100 if completed > 0 else 0.0, 2),
+                'total_earnings': round(total_earning, 2),
+                'avg_earning_per_month': round(total_earning / months if months > 0 else 0, 2),
             })
-            
-        
 
         # Compose response
         response_data = {
@@ -1028,42 +1017,63 @@ class BaseDeliveryIssueCreateView(APIView):
 
 
 
+def _tracking_etag(request, *args, **kwargs):
+    version = tracking_version(request.GET.get("client_id"))
+    if version is None:
+        return None
+    return hashlib.md5(f"{version}:{request.GET.urlencode()}".encode("utf-8")).hexdigest()
+
+
 class DeliveryTrackingView(APIView):
     """
     GET /api/v1/deliveries/tracking?client_id=ABC
       - If client_id provided: return all rows for that client_id (latest first)
-      - Else: return latest row per client_id
+      - Else: return latest row per client_id, ordered by client_id
+
+    Pages with ?limit= (default 100, max 500) and ?cursor= taken from the
+    X-Next-Cursor / Link headers. Responses carry an ETag that only moves
+    when a delivery's tracking fields change, so polling with If-None-Match
+    gets 304 Not Modified. There is no Last-Modified: its one-second
+    resolution would hide a second change within the same second.
     """
 
+    tracking_fields = ("id", "client_id", "status", "rider_accepted_time",
+                       "rider_pickup_time", "actual_delivery_completed_time")
+
+    @method_decorator(condition(etag_func=_tracking_etag))
     def get(self, request):
         client_id = request.query_params.get("client_id")
+        cursor = request.query_params.get("cursor")
+        limit = parse_limit(request.query_params.get("limit"), default=100, maximum=500)
 
         if client_id:
-            qs = (Delivery.objects
-                  .filter(client_id=client_id)
-                  .only("id","client_id","status","rider_accepted_time",
-                        "rider_pickup_time","actual_delivery_completed_time")
-                  .order_by("-id"))
-            data = DeliveryTrackSerializer(qs, many=True).data
-            return Response({"client_id": client_id, "results": data}, status=status.HTTP_200_OK)
-
-        # No client_id → latest per client_id
-        latest_id_sq = (Delivery.objects
-                        .filter(client_id=OuterRef("client_id"))
-                        .order_by("-id")
-                        .values("id")[:1])
-
-        # Pull the actual latest Delivery rows for each client_id
-        latest_rows = (Delivery.objects
-                       .filter(id__in=Subquery(
-                           Delivery.objects
-                           .values("client_id")
-                           .annotate(latest_id=Subquery(latest_id_sq))
-                           .values("latest_id")
-                       ))
-                       .only("id","client_id","status","rider_accepted_time",
-                             "rider_pickup_time","actual_delivery_completed_time")
-                       .order_by("client_id"))
-
-        data = DeliveryTrackSerializer(latest_rows, many=True).data
-        return Response({"results": data}, status=status.HTTP_200_OK)
\ No newline at end of file
+            qs = Delivery.objects.filter(client_id=client_id).only(*self.tracking_fields)
+            rows, next_cursor = keyset_page(qs, ["id"], cursor, limit, descending=True)
+            data = DeliveryTrackSerializer(rows, many=True).data
+            response = Response({"client_id": client_id, "results": data}, status=status.HTTP_200_OK)
+            return set_next_link(request, response, next_cursor)
+
+        # No client_id → latest per client_id, one page of clients at a time
+        rows, next_cursor = self.latest_per_client(cursor, limit)
+        data = DeliveryTrackSerializer(rows, many=True).data
+        return set_next_link(request, Response({"results": data}, status=status.HTTP_200_OK), next_cursor)
+
+    def latest_per_client(self, cursor, limit):
+        qs = Delivery.objects.only(*self.tracking_fields)
+        if cursor:
+            qs = qs.filter(client_id__gt=decode_cursor(cursor, 1, Delivery, ["client_id"])[0])
+
+        if connection.vendor == "postgresql":
+            # DISTINCT ON walks billing_del_client_latest_idx (client_id, -id)
+            # and stops after limit + 1 clients
+            qs = qs.order_by("client_id", "-id").distinct("client_id")
+        else:
+            latest_ids = qs.values("client_id").annotate(latest_id=Max("id")).values("latest_id")
+            qs = qs.filter(id__in=latest_ids).order_by("client_id")
+
+        rows = list(qs[:limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].client_id])
+        return rows, next_cursor
@@ -1,6 +1,7 @@
 from django.urls import include, path
 
 from apps.billing.api.v1.views import (
+    BulkCheckAddressAPIView,
     CancelDeliveryAPIView,
     CheckAddressAPIView,
     CreateDeliveryAPIView,
@@ -13,13 +14,16 @@ from apps.billing.api.v1.views import (
     AdminGetAllOrdersApiView,
     DashboardSalesApiView,
     DeliveryIssueCreateView,
-    DriverCancelDeliveryAPIView
+    DriverCancelDeliveryAPIView,
+    GeocodeCacheStatsApiView,
 )
 from apps.billing.api.base.views import DeliveryTrackingView
 urlpatterns = [
     path("create-delivery/", CreateDeliveryAPIView.as_view()),
     path("check-address/", CheckAddressAPIView.as_view()),
+    path("check-address/bulk/", BulkCheckAddressAPIView.as_view()),
     path("cancel-delivery/", CancelDeliveryAPIView.as_view()),
+    path("geocode-cache/stats/", GeocodeCacheStatsApiView.as_view()),
     path('driver-cancel-delivery/<str:client_id>/', DriverCancelDeliveryAPIView.as_view(), name='driver-cancel-delivery'),
 
     path("available-deliveries/", AvailableOrdersApiView.as_view()),
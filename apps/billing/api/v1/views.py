@@ -1,4 +1,5 @@
 from apps.billing.api.base.views import (
+    BaseBulkCheckAddressAPIView,
     BaseCancelDeliveryAPIView,
     BaseCheckAddressAPIView,
     BaseCreateDeliveryAPIView,
@@ -11,7 +12,8 @@ from apps.billing.api.base.views import (
     BaseAdminGetAllOrdersApiView,
     BaseDashboardSalesApiView,
     BaseDeliveryIssueCreateView,
-    BaseDriverCancelDeliveryAPIView
+    BaseDriverCancelDeliveryAPIView,
+    BaseGeocodeCacheStatsApiView,
 )
 
 
@@ -23,9 +25,17 @@ class CheckAddressAPIView(BaseCheckAddressAPIView):
     pass
 
 
+class BulkCheckAddressAPIView(BaseBulkCheckAddressAPIView):
+    pass
+
+
 class CancelDeliveryAPIView(BaseCancelDeliveryAPIView):
     pass
 
+
+class GeocodeCacheStatsApiView(BaseGeocodeCacheStatsApiView):
+    pass
+
 class AvailableOrdersApiView(BaseAvailableOrdersApiView):
     pass  
 
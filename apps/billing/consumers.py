@@ -0,0 +1,103 @@
+import urllib.parse
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework.authtoken.models import Token
+
+from apps.billing.models import Delivery
+from apps.billing.services.tracking import client_group, current_seq, driver_group, missed_events
+
+
+@database_sync_to_async
+def get_token_user(key):
+    token = Token.objects.select_related("user").filter(key=key).first()
+    if token is None or not token.user.is_active:
+        return None
+    return token.user
+
+
+@database_sync_to_async
+def is_assigned_driver(user, client_id):
+    return Delivery.objects.filter(client_id=client_id, driver=user).exists()
+
+
+# the replay buffer lives in the Django cache (Redis); keep its calls off the event loop
+stream_seq = sync_to_async(current_seq)
+stream_missed_events = sync_to_async(missed_events)
+
+
+def is_admin(user):
+    return user.is_staff or user.role == "owner"
+
+
+class DeliveryTrackingConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes delivery status deltas and driver positions.
+
+    ws/tracking/client/<client_id>/?token=..   one delivery (admins, its driver)
+    ws/tracking/driver/?token=..               the connected driver's stream
+    ws/tracking/driver/<driver_id>/?token=..   any driver's stream (admins)
+
+    Every event carries a per-stream ``seq``. Reconnect with ``&last_seq=N``
+    (or send ``{"action": "resume", "last_seq": N}``) to receive what was
+    missed; ``{"type": "resync"}`` means the gap is too old and the client
+    should reload the delivery over HTTP. Events may arrive twice around a
+    resume, so clients drop anything with a seq they already have.
+    """
+
+    async def connect(self):
+        params = urllib.parse.parse_qs(self.scope.get("query_string", b"").decode())
+        token = params.get("token", [None])[0]
+        self.user = await get_token_user(token) if token else None
+        if self.user is None:
+            await self.close()
+            return
+
+        kwargs = self.scope["url_route"]["kwargs"]
+        if "client_id" in kwargs:
+            client_id = kwargs["client_id"]
+            if not (is_admin(self.user) or await is_assigned_driver(self.user, client_id)):
+                await self.close()
+                return
+            self.group = client_group(client_id)
+        else:
+            driver_id = int(kwargs.get("driver_id") or self.user.id)
+            if driver_id != self.user.id and not is_admin(self.user):
+                await self.close()
+                return
+            self.group = driver_group(driver_id)
+
+        await self.accept()
+        await self.channel_layer.group_add(self.group, self.channel_name)
+
+        last_seq = params.get("last_seq", [None])[0]
+        if last_seq is not None:
+            await self.resume(last_seq)
+        else:
+            await self.send_json({"type": "subscribed", "seq": await stream_seq(self.group)})
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group"):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get("action") == "resume":
+            await self.resume(content.get("last_seq"))
+
+    async def resume(self, last_seq):
+        try:
+            last_seq = int(last_seq)
+        except (TypeError, ValueError):
+            await self.send_json({"type": "error", "detail": "last_seq must be an integer"})
+            return
+
+        events = await stream_missed_events(self.group, last_seq)
+        if events is None:
+            await self.send_json({"type": "resync", "seq": await stream_seq(self.group)})
+            return
+        for event in events:
+            await self.send_json(event)
+
+    async def tracking_event(self, message):
+        await self.send_json(message["event"])
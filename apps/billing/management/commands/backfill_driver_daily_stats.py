@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.billing.management.commands.recompute_driver_earnings import parse_date
+from apps.billing.models import Delivery
+from apps.billing.services.daily_stats import backfill_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the DriverDailyStats rollup from deliveries. Safe to re-run; each "
+        "day range is replaced in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day (YYYY-MM-DD); defaults to the oldest delivery")
+        parser.add_argument("--end", help="Last day (YYYY-MM-DD); defaults to today")
+        parser.add_argument("--chunk-days", type=int, default=31)
+
+    def handle(self, *args, **options):
+        end = parse_date(options["end"]) if options["end"] else timezone.localdate()
+        if options["start"]:
+            start = parse_date(options["start"])
+        else:
+            oldest = Delivery.objects.aggregate(oldest=Min("created_date"))["oldest"]
+            if oldest is None:
+                self.stdout.write("No deliveries, nothing to backfill.")
+                return
+            start = timezone.localdate(oldest)
+        if start > end:
+            raise CommandError("--start must not be after --end")
+
+        started = time.perf_counter()
+        written = backfill_daily_stats(start, end, chunk_days=options["chunk_days"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} driver-day rows for {start} .. {end} in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,104 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.billing.api.v1.views import DashboardSalesApiView
+from apps.billing.models import Delivery
+from apps.billing.services.daily_stats import backfill_daily_stats
+from apps.billing.services.dashboard_cache import invalidate_dashboard_days
+from apps.core.models import Address
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed drivers and deliveries inside a rolled-back transaction and report how many "
+        "queries and how long one dashboard-sales request takes for each fleet size, with "
+        "a cold and a warm day-summary cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drivers", nargs="+", type=int, default=[50, 500])
+        parser.add_argument("--deliveries-per-driver", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        view = DashboardSalesApiView.as_view()
+        factory = APIRequestFactory()
+
+        for size in options["drivers"]:
+            with transaction.atomic():
+                self.seed(size, options["deliveries_per_driver"])
+                today = timezone.localdate()
+                days = [today - timedelta(days=i) for i in range(15)]
+                backfill_daily_stats(days[-1], today)
+
+                for label, cold in (("cold", True), ("warm", False)):
+                    if cold:
+                        invalidate_dashboard_days(days)
+                    with CaptureQueriesContext(connection) as queries:
+                        response = view(factory.get("/dashboard-sales/"))
+                    assert response.status_code == 200, response.data
+
+                    started = time.perf_counter()
+                    for _ in range(options["repeat"]):
+                        if cold:
+                            invalidate_dashboard_days(days)
+                        view(factory.get("/dashboard-sales/"))
+                    ms = (time.perf_counter() - started) * 1000 / options["repeat"]
+
+                    self.stdout.write(f"{size:>6} drivers | {label} | {len(queries):>4} queries | {ms:9.1f} ms")
+
+                transaction.set_rollback(True)
+                invalidate_dashboard_days(days)
+
+    def seed(self, drivers, per_driver):
+        now = timezone.now()
+        address = Address.objects.create(
+            street_address="Benchmark", city="Dhaka", state="Dhaka", postal_code="1207", country="BD"
+        )
+        users = User.objects.bulk_create([
+            User(
+                email=f"bench-driver-{i}@example.com",
+                first_name="Driver",
+                last_name=str(i),
+                role=User.RoleType.DRIVER,
+                password="!",
+            )
+            for i in range(drivers)
+        ])
+
+        deliveries = []
+        for user in users:
+            for _ in range(per_driver):
+                completed = now - timedelta(minutes=random.randint(0, 14 * 24 * 60))
+                deliveries.append(Delivery(
+                    client_id=f"bench-{len(deliveries)}",
+                    driver=user,
+                    pickup_address=address,
+                    drop_off_address=address,
+                    pickup_customer_name="Benchmark",
+                    pickup_phone="0",
+                    pickup_ready_at=completed,
+                    pickup_last_time=completed,
+                    drop_off_customer_name="Benchmark",
+                    drop_off_phone="0",
+                    drop_off_last_time=completed + timedelta(minutes=random.randint(-10, 10)),
+                    actual_delivery_completed_time=completed,
+                    driver_earning=random.randint(25, 80),
+                    status=random.choice([
+                        Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
+                        Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
+                        Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
+                        Delivery.STATUS_TYPE.CANCELED,
+                    ]),
+                ))
+        Delivery.objects.bulk_create(deliveries, batch_size=5000)
@@ -0,0 +1,175 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.billing.models import Delivery, DriverDailyStats
+from apps.billing.services.daily_stats import backfill_daily_stats
+from apps.billing.services.dashboard_cache import dashboard_figures, invalidate_dashboard_days
+from apps.core.models import Address
+
+User = get_user_model()
+
+SUCCESS = Q(status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a year of synthetic deliveries inside a rolled-back transaction, backfill "
+        "DriverDailyStats and compare dashboard / work-history queries on raw deliveries "
+        "with the same figures served from the rollup (dashboard with a cold cache)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drivers", type=int, default=100)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--per-day", type=int, default=3, help="Deliveries per driver per day")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            drivers = self.seed(options["drivers"], options["days"], options["per_day"])
+            self.stdout.write(f"seeded {Delivery.objects.count()} deliveries in {time.perf_counter() - started:.1f}s")
+
+            today = timezone.localdate()
+            start = today - timedelta(days=options["days"])
+            started = time.perf_counter()
+            rows = backfill_daily_stats(start, today)
+            self.stdout.write(f"backfilled {rows} driver-day rows in {time.perf_counter() - started:.1f}s")
+
+            window = dict(
+                start_date=today - timedelta(days=29),
+                end_date=today,
+                this_week=(today - timedelta(days=6), today),
+                prev_week=(today - timedelta(days=13), today - timedelta(days=7)),
+            )
+            days = [start + timedelta(days=i) for i in range(options["days"] + 1)]
+            raw = self.raw_dashboard(**window)
+            served = self.served_dashboard(days, window)
+            mismatched = [driver_id for driver_id, stats in raw.items() if stats != served.get(driver_id)]
+            self.stdout.write(f"dashboard figures differ for {len(mismatched)} of {len(raw)} drivers")
+
+            driver = drivers[0]
+            self.report("dashboard (30 days, all drivers)", options["repeat"],
+                        lambda: self.raw_dashboard(**window),
+                        lambda: self.served_dashboard(days, window))
+            self.report("work history (1 driver, 1 year)", options["repeat"],
+                        lambda: self.raw_work_history(driver),
+                        lambda: list(DriverDailyStats.objects.filter(driver=driver, delivered__gt=0)
+                                     .values("day", "delivered", "earnings", "on_time_estimate")))
+
+            transaction.set_rollback(True)
+            invalidate_dashboard_days(days)
+
+    def report(self, label, repeat, raw, rollup):
+        raw_ms = self.time(raw, repeat)
+        rollup_ms = self.time(rollup, repeat)
+        self.stdout.write(
+            f"{label:<34} | deliveries {raw_ms:8.1f} ms | rollup {rollup_ms:7.1f} ms | {raw_ms / rollup_ms:5.1f}x"
+        )
+
+    def time(self, fn, repeat):
+        fn()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) * 1000 / repeat
+
+    def served_dashboard(self, days, window):
+        invalidate_dashboard_days(days)
+        return dashboard_figures(**window)[0]
+
+    def raw_dashboard(self, start_date, end_date, this_week, prev_week):
+        """
+        The per-driver dashboard figures in one grouped query over raw
+        deliveries, as the view computed them before the rollup.
+        """
+        created_in_window = Q(created_date__date__range=[start_date, end_date])
+        completed_in_window = Q(actual_delivery_completed_time__date__range=[start_date, end_date])
+
+        rows = (
+            Delivery.objects.filter(driver__role=User.RoleType.DRIVER)
+            .order_by()
+            .values("driver_id")
+            .annotate(
+                delivered=Count("id", filter=SUCCESS & completed_in_window),
+                delivered_this_week=Count(
+                    "id", filter=SUCCESS & Q(actual_delivery_completed_time__date__range=list(this_week))
+                ),
+                delivered_prev_week=Count(
+                    "id", filter=SUCCESS & Q(actual_delivery_completed_time__date__range=list(prev_week))
+                ),
+                created=Count("id", filter=created_in_window),
+                created_delivered=Count("id", filter=SUCCESS & created_in_window),
+                completed=Count("id", filter=completed_in_window),
+                on_time=Count(
+                    "id",
+                    filter=completed_in_window & Q(actual_delivery_completed_time__lte=F("drop_off_last_time")),
+                ),
+                total_delivered=Count("id", filter=SUCCESS),
+                total_earnings=Sum("driver_earning", filter=SUCCESS),
+            )
+        )
+        return {row.pop("driver_id"): row for row in rows}
+
+    def raw_work_history(self, driver):
+        return list(
+            Delivery.objects.filter(driver=driver, status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS)
+            .annotate(day=TruncDate("actual_delivery_completed_time"))
+            .values("day")
+            .annotate(
+                total_deliveries=Count("id"),
+                total_earnings=Sum("driver_earning"),
+                on_time=Count("id", filter=Q(actual_delivery_completed_time__lte=F("est_delivery_completed_time"))),
+            )
+            .order_by("-day")
+        )
+
+    def seed(self, drivers, days, per_day):
+        now = timezone.now()
+        address = Address.objects.create(
+            street_address="Benchmark", city="Dhaka", state="Dhaka", postal_code="1207", country="BD"
+        )
+        users = User.objects.bulk_create([
+            User(email=f"bench-rollup-{i}@example.com", role=User.RoleType.DRIVER, password="!")
+            for i in range(drivers)
+        ])
+
+        batch, seeded = [], 0
+        for user in users:
+            for day in range(days):
+                for _ in range(per_day):
+                    completed = now - timedelta(days=day, minutes=random.randint(0, 12 * 60))
+                    seeded += 1
+                    batch.append(Delivery(
+                        client_id=f"bench-rollup-{seeded}",
+                        driver=user,
+                        pickup_address=address,
+                        drop_off_address=address,
+                        pickup_customer_name="Benchmark",
+                        pickup_phone="0",
+                        pickup_ready_at=completed - timedelta(minutes=40),
+                        pickup_last_time=completed,
+                        drop_off_customer_name="Benchmark",
+                        drop_off_phone="0",
+                        drop_off_last_time=completed + timedelta(minutes=random.randint(-10, 10)),
+                        est_delivery_completed_time=completed + timedelta(minutes=random.randint(-10, 10)),
+                        actual_delivery_completed_time=completed,
+                        driver_earning=random.randint(25, 80),
+                        status=random.choice([Delivery.STATUS_TYPE.DELIVERY_SUCCESS] * 5 + [Delivery.STATUS_TYPE.CANCELED]),
+                    ))
+            if len(batch) >= 20_000:
+                Delivery.objects.bulk_create(batch, batch_size=5000)
+                batch = []
+        Delivery.objects.bulk_create(batch, batch_size=5000)
+
+        # auto_now_add stamps every row with "now"; created shortly before pickup instead
+        Delivery.objects.filter(driver__in=users).update(created_date=F("pickup_ready_at"))
+        return users
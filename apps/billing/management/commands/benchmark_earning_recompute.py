@@ -0,0 +1,83 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.billing.models import Delivery
+from apps.billing.utils.earning_recompute import recompute_driver_earnings
+from apps.core.models import Address
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed delivered orders inside a rolled-back transaction and report the throughput "
+        "(rows/min) of recompute_driver_earnings for each row count, as a dry run and with "
+        "the writes and rollup refresh. The target is 100k rows/min."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", nargs="+", type=int, default=[10_000, 100_000])
+        parser.add_argument("--drivers", type=int, default=100)
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for size in options["rows"]:
+            with transaction.atomic():
+                self.seed(size, options["drivers"], options["days"])
+                if connection.vendor == "postgresql":
+                    # without fresh statistics the planner scans a whole index per UPDATE batch
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"ANALYZE {Delivery._meta.db_table}")
+
+                for dry_run in (True, False):
+                    report = recompute_driver_earnings(chunk_size=options["chunk_size"], dry_run=dry_run)
+                    rate = report["scanned"] / report["seconds"] * 60 if report["seconds"] else 0
+                    self.stdout.write(
+                        f"{size:>8} rows | {'dry run' if dry_run else 'write  '} | "
+                        f"{report['changed']:>8} changed | {report['seconds']:7.2f} s | {rate:>12,.0f} rows/min"
+                    )
+
+                transaction.set_rollback(True)
+
+    def seed(self, rows, drivers, days):
+        now = timezone.now()
+        address = Address.objects.create(
+            street_address="Benchmark", city="Dhaka", state="Dhaka", postal_code="1207", country="BD"
+        )
+        users = User.objects.bulk_create([
+            User(email=f"bench-recompute-{i}@example.com", role=User.RoleType.DRIVER, password="!")
+            for i in range(drivers)
+        ])
+
+        batch = []
+        for i in range(rows):
+            completed = now - timedelta(days=random.randint(0, days - 1), minutes=random.randint(0, 12 * 60))
+            batch.append(Delivery(
+                client_id=f"bench-recompute-{i}",
+                driver=users[i % drivers],
+                pickup_address=address,
+                drop_off_address=address,
+                pickup_customer_name="Benchmark",
+                pickup_phone="0",
+                pickup_ready_at=completed - timedelta(minutes=40),
+                pickup_last_time=completed,
+                drop_off_customer_name="Benchmark",
+                drop_off_phone="0",
+                drop_off_last_time=completed,
+                distance=round(random.uniform(0.5, 12), 2),
+                est_delivery_completed_time=completed + timedelta(minutes=random.randint(-20, 10)),
+                actual_delivery_completed_time=completed,
+                # stale earnings, so most rows are rewritten
+                driver_earning=random.randint(25, 80),
+                status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS,
+            ))
+            if len(batch) >= 20_000:
+                Delivery.objects.bulk_create(batch, batch_size=5000)
+                batch = []
+        Delivery.objects.bulk_create(batch, batch_size=5000)
@@ -0,0 +1,114 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.billing.models import Delivery
+from apps.billing.services.geo_queries import filter_within_radius, great_circle_distance
+from apps.core.models import Address
+
+CENTER_LAT, CENTER_LNG = 23.7806, 90.4070  # Dhaka
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic deliveries inside a rolled-back transaction and compare the "
+        "trig-only radius query with the bounding-box prefiltered one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--radius", type=float, default=3.0)
+        parser.add_argument("--open-ratio", type=float, default=0.02)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        for size in options["sizes"]:
+            with transaction.atomic():
+                self.seed(size, options["open_ratio"], options["batch_size"])
+
+                base = Delivery.objects.filter(
+                    status=Delivery.STATUS_TYPE.WAITING_FOR_DRIVER,
+                    created_date__gte=timezone.now() - timedelta(hours=3),
+                )
+                radius = options["radius"]
+
+                trig_only = (
+                    base.annotate(calculated_distance=great_circle_distance(
+                        CENTER_LAT, CENTER_LNG, "pickup_latitude", "pickup_longitude"
+                    ))
+                    .filter(calculated_distance__lte=radius)
+                    .values_list("id", flat=True)
+                )
+                prefiltered = filter_within_radius(
+                    base,
+                    CENTER_LAT,
+                    CENTER_LNG,
+                    radius,
+                    lat_field="pickup_latitude",
+                    lng_field="pickup_longitude",
+                    distance_field="calculated_distance",
+                ).values_list("id", flat=True)
+
+                trig_ms = self.time_query(trig_only, options["repeat"])
+                bbox_ms = self.time_query(prefiltered, options["repeat"])
+                self.stdout.write(
+                    f"{size:>9} rows | trig-only {trig_ms:8.2f} ms | bbox prefilter {bbox_ms:8.2f} ms"
+                )
+
+                transaction.set_rollback(True)
+
+    def seed(self, size, open_ratio, batch_size):
+        now = timezone.now()
+        address = Address.objects.create(
+            street_address="Benchmark", city="Dhaka", state="Dhaka", postal_code="1207", country="BD"
+        )
+
+        created = 0
+        while created < size:
+            batch = []
+            for _ in range(min(batch_size, size - created)):
+                is_open = random.random() < open_ratio
+                batch.append(Delivery(
+                    client_id=f"bench-{created + len(batch)}",
+                    pickup_address=address,
+                    drop_off_address=address,
+                    pickup_customer_name="Benchmark",
+                    pickup_phone="0",
+                    pickup_ready_at=now,
+                    pickup_last_time=now,
+                    drop_off_customer_name="Benchmark",
+                    drop_off_phone="0",
+                    drop_off_last_time=now,
+                    pickup_latitude=CENTER_LAT + random.uniform(-0.5, 0.5),
+                    pickup_longitude=CENTER_LNG + random.uniform(-0.5, 0.5),
+                    status=(
+                        Delivery.STATUS_TYPE.WAITING_FOR_DRIVER
+                        if is_open
+                        else Delivery.STATUS_TYPE.DELIVERY_SUCCESS
+                    ),
+                ))
+            Delivery.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+
+        with connection.cursor() as cursor:
+            # auto_now_add stamps every row with "now"; spread the history over a year.
+            cursor.execute(
+                "UPDATE billing_delivery SET created_date = now() - random() * interval '365 days' "
+                "WHERE status <> %s",
+                [Delivery.STATUS_TYPE.WAITING_FOR_DRIVER],
+            )
+            cursor.execute("ANALYZE billing_delivery")
+
+    def time_query(self, queryset, repeat):
+        # .all() clones the queryset; listing the same one again would only
+        # read its result cache
+        list(queryset.all())  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset.all())
+        return (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,61 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.billing.tasks import recompute_driver_earnings_task
+from apps.billing.utils.earning_recompute import recompute_driver_earnings
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute driver_earning for delivered orders with the current "
+        "DeliveryEarningConfig, without firing save signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First completion date (YYYY-MM-DD), inclusive")
+        parser.add_argument("--end", help="Last completion date (YYYY-MM-DD), inclusive")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+        parser.add_argument("--async", dest="run_async", action="store_true", help="Queue it as a Celery task")
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"]) if options["start"] else None
+        end = parse_date(options["end"]) if options["end"] else None
+        if start and end and start > end:
+            raise CommandError("--start must not be after --end")
+
+        if options["run_async"]:
+            result = recompute_driver_earnings_task.delay(
+                start.isoformat() if start else None,
+                end.isoformat() if end else None,
+                options["dry_run"],
+                options["chunk_size"],
+            )
+            self.stdout.write(f"Queued recompute task {result.id}")
+            return
+
+        report = recompute_driver_earnings(
+            start_date=start,
+            end_date=end,
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+        )
+
+        for sample in report["samples"]:
+            self.stdout.write(f"  #{sample['id']}: {sample['before']} -> {sample['after']}")
+
+        rate = report["scanned"] / report["seconds"] * 60 if report["seconds"] else report["scanned"]
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would update' if report['dry_run'] else 'Updated'} {report['changed']} of "
+            f"{report['scanned']} deliveries in {report['seconds']}s ({rate:,.0f} rows/min). "
+            f"Total earning {report['total_before']} -> {report['total_after']} "
+            f"(delta {report['total_delta']})"
+        ))
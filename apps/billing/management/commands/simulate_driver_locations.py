@@ -0,0 +1,74 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.billing.services.driver_locations import (
+    DriverLocationIngest,
+    InMemoryLocationStore,
+    flush_to_database,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay simulated GPS pings through the driver location ingest and report "
+        "samples/sec and how many database writes the flush policy leaves. Uses the "
+        "in-memory store; database writes and tracking publishes are counted, not "
+        "performed, unless --with-db is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drivers", type=int, default=1000)
+        parser.add_argument("--seconds", type=int, default=300, help="Simulated duration")
+        parser.add_argument("--interval", type=float, default=2, help="Seconds between pings per driver")
+        parser.add_argument("--speed", type=float, default=8, help="Driver speed in m/s")
+        parser.add_argument("--flush-meters", type=float, default=100)
+        parser.add_argument("--flush-seconds", type=float, default=60)
+        parser.add_argument("--with-db", action="store_true", help="Really write User.latitude/longitude")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        writes = []
+
+        def flush(driver_id, lat, lng):
+            writes.append(driver_id)
+            if options["with_db"]:
+                flush_to_database(driver_id, lat, lng)
+
+        ingest = DriverLocationIngest(
+            InMemoryLocationStore(stale_seconds=options["seconds"] + 60),
+            flush_distance_m=options["flush_meters"],
+            flush_seconds=options["flush_seconds"],
+            flush=flush,
+            publish=lambda *args: None,
+        )
+
+        # drivers start around Dhaka and keep a heading with some wander
+        drivers = {
+            driver_id: [23.78 + rng.uniform(-0.1, 0.1), 90.40 + rng.uniform(-0.1, 0.1), rng.uniform(0, 2 * math.pi)]
+            for driver_id in range(1, options["drivers"] + 1)
+        }
+        step_m = options["speed"] * options["interval"]
+        ticks = int(options["seconds"] / options["interval"])
+        start_ts = time.time() - options["seconds"]
+
+        samples = 0
+        started = time.perf_counter()
+        for tick in range(ticks):
+            recorded_at = start_ts + tick * options["interval"]
+            for driver_id, position in drivers.items():
+                position[2] += rng.uniform(-0.3, 0.3)
+                position[0] += step_m * math.cos(position[2]) / 111_320
+                position[1] += step_m * math.sin(position[2]) / (111_320 * math.cos(math.radians(position[0])))
+                ingest.ingest(driver_id, [{"latitude": position[0], "longitude": position[1], "recorded_at": recorded_at}])
+                samples += 1
+        seconds = time.perf_counter() - started
+
+        self.stdout.write(f"{samples} samples from {len(drivers)} drivers in {seconds:.2f}s -> {samples / seconds:,.0f} samples/s")
+        self.stdout.write(
+            f"database writes: {len(writes)} ({len(writes) / max(samples, 1):.1%} of samples; "
+            f"one write per sample would be {samples})"
+        )
@@ -0,0 +1,57 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the partner webhook endpoint. Point CHATCHEFS_URL "
+        "at it to exercise the outbox dispatcher, including slow and failing responses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8089)
+        parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering")
+        parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+        delay, fail_rate = options["delay"], options["fail_rate"]
+        received = {"count": 0}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                received["count"] += 1
+
+                if delay:
+                    time.sleep(delay)
+
+                failing = random.random() < fail_rate
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    payload = body.decode("utf-8", "replace")
+                stdout.write(f"#{received['count']} {'503' if failing else '200'} {payload}")
+
+                self.send_response(503 if failing else 200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"ok": false}' if failing else b'{"ok": true}')
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), Handler)
+        self.stdout.write(f"Listening on http://{options['host']}:{options['port']}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0020_deliveryearningconfig_delivery_on_time_guarantee_fee_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="delivery",
+            index=models.Index(
+                fields=["status", "created_date", "pickup_latitude", "pickup_longitude"],
+                name="billing_del_status_pickup_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0022_webhookoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryNotificationReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('event', models.CharField(max_length=50)),
+                ('attempt', models.PositiveSmallIntegerField(default=1)),
+                ('recipients', models.PositiveIntegerField(default=0)),
+                ('successful', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('invalid_tokens', models.PositiveIntegerField(default=0)),
+                ('retry_tokens', models.PositiveIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('delivery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_receipts', to='billing.delivery')),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
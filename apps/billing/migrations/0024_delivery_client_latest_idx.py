@@ -0,0 +1,16 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0023_deliverynotificationreceipt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="delivery",
+            index=models.Index(fields=["client_id", "-id"], name="billing_del_client_latest_idx"),
+        ),
+    ]
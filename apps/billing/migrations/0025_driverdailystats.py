@@ -0,0 +1,40 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0024_delivery_client_latest_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField()),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('delivered', models.PositiveIntegerField(default=0)),
+                ('canceled', models.PositiveIntegerField(default=0)),
+                ('on_time', models.PositiveIntegerField(default=0)),
+                ('on_time_estimate', models.PositiveIntegerField(default=0)),
+                ('earnings', models.FloatField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('created_delivered', models.PositiveIntegerField(default=0)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Driver daily stats',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='billing_driver_daily_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('driver', 'day'), name='billing_driver_daily_stats_uniq')],
+            },
+        ),
+    ]
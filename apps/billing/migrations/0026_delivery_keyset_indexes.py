@@ -0,0 +1,22 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0025_driverdailystats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="delivery",
+            index=models.Index(fields=["-created_date", "-id"], name="billing_del_created_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="delivery",
+            index=models.Index(
+                fields=["driver", "-created_date", "-id"], name="billing_del_driver_keyset_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0026_delivery_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="webhookoutbox",
+            name="billing_outbox_pending_idx",
+        ),
+        migrations.AddIndex(
+            model_name="webhookoutbox",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["next_attempt_at", "id"],
+                name="billing_outbox_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="webhookoutbox",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["delivery", "id"],
+                name="billing_outbox_pending_del_idx",
+            ),
+        ),
+    ]
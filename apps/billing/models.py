@@ -1,7 +1,8 @@
 import uuid
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from apps.core.models import Address, BaseModel
@@ -161,6 +162,51 @@ class Delivery(BaseModel):
 
    
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the values as loaded, keyed by attname, so signal
+        # receivers can see what changed without re-reading the row.
+        instance._loaded_values = {name: instance.__dict__[name] for name in field_names}
+        return instance
+
+    def _snapshot_loaded_values(self, names=None):
+        # read __dict__ like from_db: getattr on a deferred field would
+        # fetch it with a query of its own
+        loaded_values = getattr(self, "_loaded_values", {})
+        loaded_values.update({
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (names is None or field.name in names or field.attname in names)
+        })
+        self._loaded_values = loaded_values
+
+    def save(self, *args, **kwargs):
+        # post_save receivers write the webhook outbox row; keep it in the
+        # same transaction as the change it describes.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+        self._snapshot_loaded_values(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_loaded_values(fields)
+
+    def get_loaded_value(self, attname, default=None):
+        return getattr(self, "_loaded_values", {}).get(attname, default)
+
+    def has_changed(self, attname):
+        """
+        True if ``attname`` differs from the value loaded from (or last saved
+        to) the database. Unsaved instances and deferred fields count as
+        changed.
+        """
+        loaded_values = getattr(self, "_loaded_values", {})
+        if attname not in loaded_values:
+            return True
+        return loaded_values[attname] != getattr(self, attname)
+
     def update_final_earning(self):
         from apps.billing.utils.earning_calculation import calculate_total_driver_earning  # imported only when called
         result = calculate_total_driver_earning(self)
@@ -181,6 +227,15 @@ class Delivery(BaseModel):
 
     class Meta:
         ordering = ["-id"]
+        indexes = [
+            models.Index(
+                fields=["status", "created_date", "pickup_latitude", "pickup_longitude"],
+                name="billing_del_status_pickup_idx",
+            ),
+            models.Index(fields=["client_id", "-id"], name="billing_del_client_latest_idx"),
+            models.Index(fields=["-created_date", "-id"], name="billing_del_created_keyset_idx"),
+            models.Index(fields=["driver", "-created_date", "-id"], name="billing_del_driver_keyset_idx"),
+        ]
 
 
 class DeliveryFee(BaseModel):
@@ -273,3 +328,108 @@ class DeliveryEarningConfig(models.Model):
 
     def __str__(self):
         return "Delivery Earning & Penalty Config"
+
+
+class WebhookOutbox(BaseModel):
+    """
+    Pending partner webhook calls, written in the same transaction as the
+    delivery change and sent by the dispatch_webhook_outbox task.
+    """
+
+    class STATUS_TYPE(models.TextChoices):
+        PENDING = "pending", _("PENDING")
+        SENT = "sent", _("SENT")
+        FAILED = "failed", _("FAILED")
+
+    delivery = models.ForeignKey(
+        Delivery, on_delete=models.SET_NULL, null=True, blank=True, related_name="webhook_events"
+    )
+    url = models.URLField(max_length=500)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20, choices=STATUS_TYPE.choices, default=STATUS_TYPE.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.id} :: {self.status} :: {self.delivery_id}"
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # only pending rows are ever scanned by the dispatcher
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(status="pending"),
+                name="billing_outbox_due_idx",
+            ),
+            models.Index(
+                fields=["delivery", "id"],
+                condition=models.Q(status="pending"),
+                name="billing_outbox_pending_del_idx",
+            ),
+        ]
+
+
+class DeliveryNotificationReceipt(BaseModel):
+    """
+    Outcome of one push fan-out attempt for a delivery event.
+    """
+
+    delivery = models.ForeignKey(
+        Delivery, on_delete=models.CASCADE, related_name="notification_receipts"
+    )
+    event = models.CharField(max_length=50)
+    attempt = models.PositiveSmallIntegerField(default=1)
+    recipients = models.PositiveIntegerField(default=0)
+    successful = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    invalid_tokens = models.PositiveIntegerField(default=0)
+    retry_tokens = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+    task_id = models.CharField(max_length=255, blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.delivery_id} :: {self.event} :: {self.successful}/{self.recipients}"
+
+    class Meta:
+        ordering = ["-id"]
+
+
+class DriverDailyStats(BaseModel):
+    """
+    Per driver and per day delivery figures, kept up to date from Delivery
+    saves (apps.billing.services.daily_stats) so dashboards read days x
+    drivers instead of scanning deliveries.
+
+    Completion figures are bucketed by the local date of
+    actual_delivery_completed_time, ``created``/``created_delivered`` by the
+    local date of created_date.
+    """
+
+    driver = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_stats")
+    day = models.DateField()
+    completed = models.PositiveIntegerField(default=0)
+    delivered = models.PositiveIntegerField(default=0)
+    canceled = models.PositiveIntegerField(default=0)
+    on_time = models.PositiveIntegerField(default=0)  # completed by drop_off_last_time
+    on_time_estimate = models.PositiveIntegerField(default=0)  # delivered by est_delivery_completed_time
+    earnings = models.FloatField(default=0)  # driver_earning of delivered orders
+    created = models.PositiveIntegerField(default=0)
+    created_delivered = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.driver_id} :: {self.day} :: {self.delivered}"
+
+    class Meta:
+        ordering = ["-day"]
+        verbose_name_plural = "Driver daily stats"
+        constraints = [
+            models.UniqueConstraint(fields=["driver", "day"], name="billing_driver_daily_stats_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="billing_driver_daily_day_idx"),
+        ]
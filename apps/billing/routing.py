@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .consumers import DeliveryTrackingConsumer
+
+websocket_urlpatterns = [
+    path("ws/tracking/client/<str:client_id>/", DeliveryTrackingConsumer.as_asgi()),
+    path("ws/tracking/driver/", DeliveryTrackingConsumer.as_asgi()),
+    path("ws/tracking/driver/<int:driver_id>/", DeliveryTrackingConsumer.as_asgi()),
+]
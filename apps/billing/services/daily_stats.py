@@ -0,0 +1,208 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.billing.models import Delivery, DriverDailyStats
+from apps.billing.services.dashboard_cache import invalidate_dashboard_days
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = Q(status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS)
+
+STAT_FIELDS = (
+    "completed",
+    "delivered",
+    "canceled",
+    "on_time",
+    "on_time_estimate",
+    "earnings",
+    "created",
+    "created_delivered",
+)
+
+# Delivery fields that move a delivery between buckets or change its figures.
+ROLLUP_FIELDS = (
+    "status",
+    "driver_id",
+    "actual_delivery_completed_time",
+    "drop_off_last_time",
+    "est_delivery_completed_time",
+    "driver_earning",
+)
+
+
+def _empty():
+    return dict.fromkeys(STAT_FIELDS, 0)
+
+
+def aggregate_daily_stats(start_date, end_date, driver_ids=None):
+    """
+    ``{(driver_id, day): {...}}`` for days in [start_date, end_date],
+    computed from Delivery rows in two grouped queries.
+    """
+    deliveries = Delivery.objects.filter(driver__isnull=False).order_by()
+    if driver_ids is not None:
+        deliveries = deliveries.filter(driver_id__in=driver_ids)
+
+    stats = defaultdict(_empty)
+
+    completed = (
+        deliveries.filter(actual_delivery_completed_time__date__range=[start_date, end_date])
+        .annotate(day=TruncDate("actual_delivery_completed_time"))
+        .values("driver_id", "day")
+        .annotate(
+            completed=Count("id"),
+            delivered=Count("id", filter=SUCCESS),
+            canceled=Count("id", filter=Q(status=Delivery.STATUS_TYPE.CANCELED)),
+            on_time=Count("id", filter=Q(actual_delivery_completed_time__lte=F("drop_off_last_time"))),
+            on_time_estimate=Count(
+                "id", filter=SUCCESS & Q(actual_delivery_completed_time__lte=F("est_delivery_completed_time"))
+            ),
+            earnings=Sum("driver_earning", filter=SUCCESS),
+        )
+    )
+    for row in completed:
+        key = (row.pop("driver_id"), row.pop("day"))
+        row["earnings"] = row["earnings"] or 0
+        stats[key].update(row)
+
+    created = (
+        deliveries.filter(created_date__date__range=[start_date, end_date])
+        .annotate(day=TruncDate("created_date"))
+        .values("driver_id", "day")
+        .annotate(created=Count("id"), created_delivered=Count("id", filter=SUCCESS))
+    )
+    for row in created:
+        key = (row.pop("driver_id"), row.pop("day"))
+        stats[key].update(row)
+
+    return stats
+
+
+def save_daily_stats(stats):
+    rows = [
+        DriverDailyStats(driver_id=driver_id, day=day, **values)
+        for (driver_id, day), values in stats.items()
+    ]
+    DriverDailyStats.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["driver", "day"],
+        update_fields=[*STAT_FIELDS, "modified_date"],
+    )
+    return len(rows)
+
+
+def refresh_driver_days(keys):
+    """
+    Recomputes the given ``(driver_id, day)`` buckets from Delivery. Buckets
+    that no longer have any deliveries are written back as zeros.
+
+    The bucket rows are locked before Delivery is read, so concurrent
+    refreshes of the same bucket run one after the other and the last one
+    to write has seen every delivery committed before it.
+    """
+    keys = sorted(set(keys))
+    days_by_driver = defaultdict(set)
+    for driver_id, day in keys:
+        days_by_driver[driver_id].add(day)
+
+    with transaction.atomic():
+        DriverDailyStats.objects.bulk_create(
+            [DriverDailyStats(driver_id=driver_id, day=day) for driver_id, day in keys],
+            ignore_conflicts=True,
+        )
+        buckets = Q()
+        for driver_id, days in days_by_driver.items():
+            buckets |= Q(driver_id=driver_id, day__in=days)
+        locked = DriverDailyStats.objects.select_for_update().filter(buckets).order_by("driver_id", "day")
+        list(locked.values_list("pk", flat=True))
+
+        stats = {}
+        for driver_id, days in days_by_driver.items():
+            found = aggregate_daily_stats(min(days), max(days), driver_ids=[driver_id])
+            for day in days:
+                stats[(driver_id, day)] = found.get((driver_id, day), _empty())
+
+        written = save_daily_stats(stats)
+        transaction.on_commit(lambda: invalidate_dashboard_days({day for _, day in stats}))
+    return written
+
+
+def backfill_daily_stats(start_date, end_date, chunk_days=31):
+    """
+    Rebuilds the rollup for every driver over [start_date, end_date] in
+    ``chunk_days`` slices. Returns the number of rows written.
+    """
+    written = 0
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        with transaction.atomic():
+            # buckets that lost all their deliveries are cleared first
+            DriverDailyStats.objects.filter(day__range=[chunk_start, chunk_end]).delete()
+            written += save_daily_stats(aggregate_daily_stats(chunk_start, chunk_end))
+            days = {chunk_start + timedelta(days=i) for i in range((chunk_end - chunk_start).days + 1)}
+            transaction.on_commit(lambda days=days: invalidate_dashboard_days(days))
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def _local_day(value):
+    return timezone.localdate(value) if value else None
+
+
+def affected_days(delivery: Delivery):
+    """
+    Buckets whose figures a save of ``delivery`` can change: its current
+    ones and, when the driver or completion time moved, the ones it was
+    loaded with.
+    """
+    keys = set()
+    created_day = _local_day(delivery.created_date)
+    for driver_id, completed_at in (
+        (delivery.driver_id, delivery.actual_delivery_completed_time),
+        (delivery.get_loaded_value("driver_id"), delivery.get_loaded_value("actual_delivery_completed_time")),
+    ):
+        if not driver_id:
+            continue
+        for day in (_local_day(completed_at), created_day):
+            if day:
+                keys.add((driver_id, day))
+    return keys
+
+
+def queue_daily_stats_refresh(delivery: Delivery, update_fields=None):
+    """
+    Schedules a refresh of the buckets touched by this save once the
+    transaction commits, if any rollup field changed.
+    """
+    fields = ROLLUP_FIELDS
+    if update_fields is not None:
+        written = set(update_fields)
+        fields = [f for f in ROLLUP_FIELDS if f in written or f.removesuffix("_id") in written]
+    if not any(delivery.has_changed(field) for field in fields):
+        return
+
+    queue_days_refresh(affected_days(delivery))
+
+
+def queue_days_refresh(keys):
+    if not keys:
+        return
+
+    def enqueue():
+        from apps.billing.tasks import refresh_driver_daily_stats_task
+
+        try:
+            refresh_driver_daily_stats_task.delay([[driver_id, day.isoformat()] for driver_id, day in keys])
+        except Exception as e:
+            logger.error("Could not queue daily stats refresh for %s: %s", sorted(keys), e)
+
+    transaction.on_commit(enqueue)
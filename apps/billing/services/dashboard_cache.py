@@ -0,0 +1,221 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.billing.models import Delivery, DriverDailyStats
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SUCCESS = Q(status=Delivery.STATUS_TYPE.DELIVERY_SUCCESS)
+
+DAY_FIELDS = ("completed", "delivered", "on_time", "created", "created_delivered")
+
+EMPTY_DRIVER_STATS = {
+    "delivered": 0,
+    "delivered_this_week": 0,
+    "delivered_prev_week": 0,
+    "created": 0,
+    "created_delivered": 0,
+    "completed": 0,
+    "on_time": 0,
+    "total_delivered": 0,
+    "total_earnings": None,
+}
+
+
+LIFETIME_KEY = "dashboard:lifetime"
+
+
+def _closed_day_ttl():
+    return getattr(settings, "DASHBOARD_CLOSED_DAY_TTL", 30 * 24 * 60 * 60)
+
+
+def _version_key(day):
+    return f"dashboard:day-version:{day.isoformat()}"
+
+
+def _day_key(day, version):
+    return f"dashboard:day:{day.isoformat()}:{version}"
+
+
+def invalidate_dashboard_days(days):
+    """
+    Drops the cached summaries of ``days`` by moving their version stamp;
+    summaries computed concurrently from older data land under the old
+    stamp and are never read; they expire with DASHBOARD_CLOSED_DAY_TTL.
+    Lifetime totals are dropped as well.
+    """
+    if not days:
+        return
+    try:
+        cache.set_many({_version_key(day): uuid.uuid4().hex for day in days}, _closed_day_ttl())
+        cache.delete(LIFETIME_KEY)
+    except Exception as e:
+        logger.warning("Could not invalidate dashboard days %s: %s", sorted(days), e)
+
+
+def _versions(days):
+    keys = {day: _version_key(day) for day in days}
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for day, key in keys.items():
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, _closed_day_ttl())
+            found[key] = cache.get(key)
+        versions[day] = found[key]
+    return versions
+
+
+def _compute_days(days):
+    """
+    Per-day figures: the rollup rows of every driver plus fleet-wide counts
+    that include deliveries without a driver.
+    """
+    summaries = {
+        day: {"drivers": {}, "fleet": {"created": 0, "created_delivered": 0, "delivered": 0}}
+        for day in days
+    }
+    for row in DriverDailyStats.objects.filter(
+        driver__role=User.RoleType.DRIVER, day__in=days
+    ).order_by().values("driver_id", "day", *DAY_FIELDS):
+        summaries[row.pop("day")]["drivers"][row.pop("driver_id")] = row
+
+    first, last = min(days), max(days)
+    created = (
+        Delivery.objects.filter(created_date__date__range=[first, last])
+        .annotate(day=TruncDate("created_date"))
+        .order_by()
+        .values("day")
+        .annotate(created=Count("id"), created_delivered=Count("id", filter=SUCCESS))
+    )
+    delivered = (
+        Delivery.objects.filter(SUCCESS, actual_delivery_completed_time__date__range=[first, last])
+        .annotate(day=TruncDate("actual_delivery_completed_time"))
+        .order_by()
+        .values("day")
+        .annotate(delivered=Count("id"))
+    )
+    for row in [*created, *delivered]:
+        day = row.pop("day")
+        if day in summaries:
+            summaries[day]["fleet"].update(row)
+    return summaries
+
+
+def day_summaries(start_date, end_date):
+    """
+    ``{day: summary}`` for every day in [start_date, end_date]. Closed days
+    are cached until a late change invalidates them, for at most
+    DASHBOARD_CLOSED_DAY_TTL seconds; today (and later) for
+    DASHBOARD_TODAY_TTL seconds.
+    """
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    try:
+        versions = _versions(days)
+        keys = {day: _day_key(day, versions[day]) for day in days}
+        cached = cache.get_many(list(keys.values()))
+    except Exception as e:
+        logger.warning("Dashboard cache unavailable: %s", e)
+        return _compute_days(days)
+
+    summaries = {day: cached[key] for day, key in keys.items() if key in cached}
+    missing = [day for day in days if day not in summaries]
+    if missing:
+        computed = _compute_days(missing)
+        summaries.update(computed)
+
+        today = timezone.localdate()
+        closed = {keys[day]: computed[day] for day in missing if day < today}
+        current = {keys[day]: computed[day] for day in missing if day >= today}
+        try:
+            if closed:
+                cache.set_many(closed, _closed_day_ttl())
+            if current:
+                cache.set_many(current, getattr(settings, "DASHBOARD_TODAY_TTL", 60))
+        except Exception as e:
+            logger.warning("Could not cache dashboard days: %s", e)
+    return summaries
+
+
+def lifetime_totals():
+    """
+    All-time delivered count and earnings per driver, cached briefly.
+    """
+    try:
+        totals = cache.get(LIFETIME_KEY)
+    except Exception:
+        totals = None
+    if totals is None:
+        totals = {
+            row["driver_id"]: row
+            for row in DriverDailyStats.objects.filter(driver__role=User.RoleType.DRIVER)
+            .order_by()
+            .values("driver_id")
+            .annotate(total_delivered=Sum("delivered"), total_earnings=Sum("earnings"))
+        }
+        try:
+            cache.set(LIFETIME_KEY, totals, getattr(settings, "DASHBOARD_TODAY_TTL", 60))
+        except Exception:
+            pass
+    return totals
+
+
+def dashboard_figures(start_date, end_date, this_week, prev_week):
+    """
+    Everything the sales dashboard aggregates, assembled from cached day
+    summaries. ``this_week`` and ``prev_week`` are inclusive (first, last)
+    date ranges. Returns ``(driver_stats, daily_deliveries, totals)``:
+
+    - ``{driver_id: {...}}`` shaped like EMPTY_DRIVER_STATS,
+    - ``[(driver_id, day, delivered), ...]`` for driver days with deliveries,
+    - fleet-wide ``created``, ``created_delivered`` and ``delivered_prev_week``.
+    """
+    this_first, this_last = this_week
+    prev_first, prev_last = prev_week
+    summaries = day_summaries(
+        min(start_date, prev_first, this_first), max(end_date, this_last, prev_last)
+    )
+
+    driver_stats = defaultdict(lambda: dict(EMPTY_DRIVER_STATS))
+    daily_deliveries = []
+    totals = {"created": 0, "created_delivered": 0, "delivered_prev_week": 0}
+
+    for day, summary in sorted(summaries.items()):
+        in_window = start_date <= day <= end_date
+        in_this_week = this_first <= day <= this_last
+        in_prev_week = prev_first <= day <= prev_last
+
+        if in_window:
+            totals["created"] += summary["fleet"]["created"]
+            totals["created_delivered"] += summary["fleet"]["created_delivered"]
+        if in_prev_week:
+            totals["delivered_prev_week"] += summary["fleet"]["delivered"]
+
+        for driver_id, row in summary["drivers"].items():
+            stats = driver_stats[driver_id]
+            if in_window:
+                for field in DAY_FIELDS:
+                    stats[field] += row[field]
+                if row["delivered"]:
+                    daily_deliveries.append((driver_id, day, row["delivered"]))
+            if in_this_week:
+                stats["delivered_this_week"] += row["delivered"]
+            if in_prev_week:
+                stats["delivered_prev_week"] += row["delivered"]
+
+    for driver_id, row in lifetime_totals().items():
+        stats = driver_stats[driver_id]
+        stats["total_delivered"] = row["total_delivered"] or 0
+        stats["total_earnings"] = row["total_earnings"]
+
+    return dict(driver_stats), daily_deliveries, totals
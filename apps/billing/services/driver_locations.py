@@ -0,0 +1,280 @@
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Case, FloatField, Value, When
+
+from apps.billing.services.geo_queries import filter_within_radius
+from apps.billing.services.haversine_distance import calculate_haversine_distance, haversine_vector
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class InMemoryLocationStore:
+    """
+    Latest position per driver in this process only. For development,
+    tests and the ingest simulation; use the Redis store when several
+    workers serve requests.
+    """
+
+    def __init__(self, stale_seconds=300):
+        self.stale_seconds = stale_seconds
+        self._positions = {}  # driver_id -> dict(lat, lng, ts, flushed_lat, flushed_lng, flushed_at)
+        self._lock = threading.Lock()
+
+    def get(self, driver_id):
+        with self._lock:
+            entry = self._positions.get(driver_id)
+            return dict(entry) if entry else None
+
+    def put(self, driver_id, entry):
+        with self._lock:
+            self._positions[driver_id] = dict(entry)
+
+    def size(self):
+        return len(self._positions)
+
+    def prune(self):
+        cutoff = time.time() - self.stale_seconds
+        with self._lock:
+            stale = [d for d, entry in self._positions.items() if entry["ts"] < cutoff]
+            for driver_id in stale:
+                del self._positions[driver_id]
+        return len(stale)
+
+    def nearest(self, lat, lng, radius_km, limit=None):
+        cutoff = time.time() - self.stale_seconds
+        with self._lock:
+            live = [(d, e["lat"], e["lng"]) for d, e in self._positions.items() if e["ts"] >= cutoff]
+        if not live:
+            return []
+
+        ids, lats, lngs = zip(*live)
+        distances = haversine_vector(lat, lng, np.array(lats), np.array(lngs))
+        found = sorted(
+            ((driver_id, float(km)) for driver_id, km in zip(ids, distances) if km <= radius_km),
+            key=lambda item: item[1],
+        )
+        return found[:limit] if limit else found
+
+
+class RedisLocationStore:
+    """
+    Latest positions in a Redis GEO set, shared by all workers; per-driver
+    details (timestamps, last flushed position) live in a hash next to it
+    and a sorted set of timestamps drives eviction of silent drivers.
+    """
+
+    geo_key = "driver_locations:geo"
+    meta_key = "driver_locations:meta"
+    ts_key = "driver_locations:ts"
+
+    def __init__(self, url, stale_seconds=300):
+        self.client = redis.Redis.from_url(url)
+        self.stale_seconds = stale_seconds
+
+    def get(self, driver_id):
+        raw = self.client.hget(self.meta_key, driver_id)
+        return json.loads(raw) if raw else None
+
+    def put(self, driver_id, entry):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.geoadd(self.geo_key, [entry["lng"], entry["lat"], driver_id])
+        pipe.hset(self.meta_key, driver_id, json.dumps(entry))
+        pipe.zadd(self.ts_key, {driver_id: entry["ts"]})
+        pipe.execute()
+
+    def size(self):
+        return self.client.zcard(self.geo_key)
+
+    def prune(self):
+        cutoff = time.time() - self.stale_seconds
+        stale = self.client.zrangebyscore(self.ts_key, "-inf", f"({cutoff}")
+        if not stale:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrem(self.geo_key, *stale)
+        pipe.hdel(self.meta_key, *stale)
+        # a ping landing in between keeps its fresh score here and is
+        # back in the GEO set with the driver's next ping
+        pipe.zremrangebyscore(self.ts_key, "-inf", f"({cutoff}")
+        pipe.execute()
+        return len(stale)
+
+    def nearest(self, lat, lng, radius_km, limit=None):
+        members = self.client.geosearch(
+            self.geo_key,
+            longitude=lng,
+            latitude=lat,
+            radius=radius_km,
+            unit="km",
+            withdist=True,
+            sort="ASC",
+            count=limit * 2 if limit else None,  # head-room for stale members
+        )
+        if not members:
+            return []
+
+        ids = [int(member) for member, _ in members]
+        metas = self.client.hmget(self.meta_key, ids)
+        cutoff = time.time() - self.stale_seconds
+        found = [
+            (driver_id, round(float(km), 2))
+            for (_, km), driver_id, meta in zip(members, ids, metas)
+            if meta and json.loads(meta)["ts"] >= cutoff
+        ]
+        return found[:limit] if limit else found
+
+
+class DriverLocationIngest:
+    """
+    Applies GPS samples to the location store and decides when the database
+    copy on User.latitude/longitude needs refreshing: after moving more than
+    ``flush_distance_m`` from the last stored point, or ``flush_seconds``
+    after the last write.
+    """
+
+    def __init__(self, store, flush_distance_m=100, flush_seconds=60, flush=None, publish=None):
+        self.store = store
+        self.flush_distance_m = flush_distance_m
+        self.flush_seconds = flush_seconds
+        self.flush = flush or flush_to_database
+        self.publish = publish or publish_location
+
+    def ingest(self, driver_id, samples):
+        """
+        ``samples`` are dicts with latitude, longitude and an optional
+        ``recorded_at`` (epoch seconds). Only the newest one moves the
+        driver; without a timestamp on every sample that is the last one
+        sent. Returns ``(accepted, flushed)``.
+        """
+        if all(sample.get("recorded_at") for sample in samples):
+            latest = max(reversed(samples), key=lambda sample: sample["recorded_at"])
+        else:
+            latest = samples[-1]
+        now = time.time()
+        # a phone clock running ahead must not lock out later pings
+        recorded_at = min(latest.get("recorded_at") or now, now)
+
+        entry = self.store.get(driver_id) or {}
+        if entry.get("ts", 0) > recorded_at:
+            return len(samples), False  # older than what we already have
+
+        lat, lng = float(latest["latitude"]), float(latest["longitude"])
+        entry.update(lat=lat, lng=lng, ts=recorded_at)
+
+        flushed = False
+        if self.should_flush(entry, recorded_at):
+            self.flush(driver_id, lat, lng)
+            entry.update(flushed_lat=lat, flushed_lng=lng, flushed_at=recorded_at)
+            flushed = True
+
+        self.store.put(driver_id, entry)
+        self.publish(driver_id, lat, lng, recorded_at)
+        return len(samples), flushed
+
+    def should_flush(self, entry, now):
+        if "flushed_at" not in entry:
+            return True
+        if now - entry["flushed_at"] >= self.flush_seconds:
+            return True
+        moved_km = calculate_haversine_distance(entry["flushed_lat"], entry["flushed_lng"], entry["lat"], entry["lng"])
+        return moved_km is not None and moved_km * 1000 >= self.flush_distance_m
+
+
+def record_saved_location(driver_id, lat, lng):
+    """
+    Feeds a position written to User.latitude/longitude by other code paths
+    (profile PATCH, admin) into the store, already marked as flushed.
+    """
+    now = time.time()
+    try:
+        store = get_location_store()
+        entry = store.get(driver_id) or {}
+        if entry.get("ts", 0) > now:
+            return
+        entry.update(lat=lat, lng=lng, ts=now, flushed_lat=lat, flushed_lng=lng, flushed_at=now)
+        store.put(driver_id, entry)
+    except Exception as e:
+        logger.warning("Could not record location of driver %s: %s", driver_id, e)
+
+
+def flush_to_database(driver_id, lat, lng):
+    # .update() skips User.save() and its receivers; ingest publishes itself
+    User.objects.filter(pk=driver_id).update(latitude=lat, longitude=lng)
+
+
+def publish_location(driver_id, lat, lng, recorded_at):
+    from datetime import datetime, timezone as dt_timezone
+
+    from apps.billing.services.tracking import queue_driver_location
+
+    queue_driver_location(driver_id, lat, lng, datetime.fromtimestamp(recorded_at, tz=dt_timezone.utc))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_location_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            stale_seconds = getattr(settings, "DRIVER_LOCATION_STALE_SECONDS", 300)
+            if getattr(settings, "DRIVER_LOCATION_BACKEND", "redis") == "memory":
+                _store = InMemoryLocationStore(stale_seconds)
+            else:
+                _store = RedisLocationStore(settings.DRIVER_LOCATION_REDIS_URL, stale_seconds)
+        return _store
+
+
+def prune_locations():
+    """
+    Evicts drivers silent for DRIVER_LOCATION_STALE_SECONDS from the store.
+    Run on the beat schedule; lookups already skip them.
+    """
+    return get_location_store().prune()
+
+
+def get_location_ingest():
+    return DriverLocationIngest(
+        get_location_store(),
+        flush_distance_m=getattr(settings, "DRIVER_LOCATION_FLUSH_METERS", 100),
+        flush_seconds=getattr(settings, "DRIVER_LOCATION_FLUSH_SECONDS", 60),
+    )
+
+
+def nearby_drivers_queryset(lat, lng, radius_km, limit=None):
+    """
+    Active drivers within ``radius_km``, nearest first, annotated with
+    ``distance`` (km). Served from the live location store; falls back to
+    the User.latitude/longitude columns when the store is unavailable or
+    has no driver fresher than DRIVER_LOCATION_STALE_SECONDS in range.
+    """
+    drivers = User.objects.filter(role=User.RoleType.DRIVER, is_active=True)
+    try:
+        nearest = get_location_store().nearest(lat, lng, radius_km, limit)
+    except Exception as e:
+        logger.warning("Driver location store unavailable, using the database: %s", e)
+        nearest = None
+
+    if not nearest:
+        queryset = filter_within_radius(drivers, lat, lng, radius_km)
+        return queryset[:limit] if limit else queryset
+
+    distance = Case(
+        *[When(pk=driver_id, then=Value(km)) for driver_id, km in nearest],
+        output_field=FloatField(),
+    )
+    return (
+        drivers.filter(pk__in=[driver_id for driver_id, _ in nearest])
+        .annotate(distance=distance)
+        .order_by("distance")
+    )
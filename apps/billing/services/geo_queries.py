@@ -0,0 +1,62 @@
+import math
+
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import ACos, Cos, Greatest, Least, Radians, Sin
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Returns ``((min_lat, max_lat), (min_lng, max_lng))`` enclosing the circle of
+    ``radius_km`` around the point. Suitable for indexable ``__range`` filters.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return (lat - lat_delta, lat + lat_delta), (lng - lng_delta, lng + lng_delta)
+
+
+def great_circle_distance(lat, lng, lat_field, lng_field):
+    """
+    Spherical law of cosines between a fixed point and two model fields, in km.
+    The cosine is clamped to [-1, 1] so identical points do not make ACOS fail.
+    """
+    cosine = (
+        Cos(Radians(lat))
+        * Cos(Radians(F(lat_field)))
+        * Cos(Radians(F(lng_field)) - Radians(lng))
+        + Sin(Radians(lat)) * Sin(Radians(F(lat_field)))
+    )
+    return ExpressionWrapper(
+        EARTH_RADIUS_KM * ACos(Least(Greatest(cosine, Value(-1.0)), Value(1.0))),
+        output_field=FloatField(),
+    )
+
+
+def filter_within_radius(
+    queryset,
+    lat,
+    lng,
+    radius_km,
+    lat_field="latitude",
+    lng_field="longitude",
+    distance_field="distance",
+):
+    """
+    Narrows ``queryset`` with a lat/lng bounding box first, then applies the
+    exact great-circle distance. Results are annotated with ``distance_field``
+    and ordered nearest first.
+    """
+    lat_range, lng_range = bounding_box(lat, lng, radius_km)
+    return (
+        queryset.filter(
+            **{
+                f"{lat_field}__range": lat_range,
+                f"{lng_field}__range": lng_range,
+            }
+        )
+        .annotate(**{distance_field: great_circle_distance(lat, lng, lat_field, lng_field)})
+        .filter(**{f"{distance_field}__lte": radius_km})
+        .order_by(distance_field)
+    )
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_NEGATIVE = "__no_result__"  # stored for addresses the provider could not resolve
+
+
+class GeocodeCache:
+    """
+    Two-tier cache in front of the external geocoders.
+
+    - local: per-process LRU with expiry, checked first.
+    - shared: a Django cache alias (Redis in production) so every worker
+      benefits from a lookup done by any other worker.
+
+    Addresses the provider could not resolve are cached as negative entries
+    with a shorter TTL. Provider exceptions are never cached.
+    """
+
+    def __init__(self, local_size=1024, ttl=30 * 24 * 3600, negative_ttl=3600, cache_alias="default"):
+        self.local_size = local_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_alias = cache_alias
+
+        self._local = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "negative_hits": 0, "misses": 0}
+
+    @staticmethod
+    def normalize(address):
+        return " ".join(re.sub(r"[,;]+", " ", str(address)).lower().split())
+
+    def make_key(self, provider, address):
+        digest = hashlib.sha1(self.normalize(address).encode("utf-8")).hexdigest()
+        return f"geocode:{provider}:{digest}"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, local_size=len(self._local))
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            return value
+
+    def _local_set(self, key, value, ttl):
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _shared_get(self, key):
+        try:
+            return caches[self.cache_alias].get(key, _MISSING)
+        except Exception as e:
+            logger.warning("Geocode cache read failed: %s", e)
+            return _MISSING
+
+    def _shared_set(self, key, value, ttl):
+        try:
+            caches[self.cache_alias].set(key, value, ttl)
+        except Exception as e:
+            logger.warning("Geocode cache write failed: %s", e)
+
+    def lookup(self, address, provider, fetch):
+        """
+        Returns the cached ``{"lat": .., "lng": ..}`` for ``address`` or calls
+        ``fetch(address)`` on a miss. ``fetch`` returns ``None`` when the
+        address cannot be resolved and raises on transport/API errors.
+        """
+        key = self.make_key(provider, address)
+
+        value = self._local_get(key)
+        if value is not _MISSING:
+            self._count("negative_hits" if value == _NEGATIVE else "local_hits")
+            return None if value == _NEGATIVE else value
+
+        value = self._shared_get(key)
+        if value is not _MISSING:
+            self._count("negative_hits" if value == _NEGATIVE else "shared_hits")
+            self._local_set(key, value, self.negative_ttl if value == _NEGATIVE else self.ttl)
+            return None if value == _NEGATIVE else value
+
+        self._count("misses")
+        result = fetch(address)
+
+        value, ttl = (result, self.ttl) if result else (_NEGATIVE, self.negative_ttl)
+        self._local_set(key, value, ttl)
+        self._shared_set(key, value, ttl)
+        return result or None
+
+
+geocode_cache = GeocodeCache(
+    local_size=getattr(settings, "GEOCODE_CACHE_LOCAL_SIZE", 1024),
+    ttl=getattr(settings, "GEOCODE_CACHE_TTL", 30 * 24 * 3600),
+    negative_ttl=getattr(settings, "GEOCODE_CACHE_NEGATIVE_TTL", 3600),
+)
@@ -1,27 +1,64 @@
-from math import radians, cos, sin, asin, sqrt
+import logging
+from math import asin, cos, radians, sin, sqrt
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0  # Radius of Earth in kilometers
+
 
 def calculate_haversine_distance(lat1, lng1, lat2, lng2):
     """
-    Calculates the great-circle distance (in kilometers) between two points.
+    Calculates the great-circle distance (in kilometers) between two points,
+    rounded to two decimals. Returns ``None`` if a coordinate is not numeric.
     """
     try:
-        lat1 = float(lat1)
-        lng1 = float(lng1)
-        lat2 = float(lat2)
-        lng2 = float(lng2)
+        lat1 = radians(float(lat1))
+        lng1 = radians(float(lng1))
+        lat2 = radians(float(lat2))
+        lng2 = radians(float(lng2))
+    except (TypeError, ValueError) as e:
+        logger.warning("Haversine calculation failed: %s", e)
+        return None
 
-        R = 6371.0  # Radius of Earth in kilometers
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return round(EARTH_RADIUS_KM * 2 * asin(sqrt(min(a, 1.0))), 2)
 
-        lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
 
-        dlat = lat2 - lat1
-        dlng = lng2 - lng1
+def haversine_vector(lat1, lng1, lat2, lng2, decimals=2):
+    """
+    Element-wise great-circle distances (km) between paired points.
 
-        a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlng / 2) ** 2
-        c = 2 * asin(sqrt(a))
-        distance_km = R * c
+    Arguments are scalars or array-likes that broadcast against each other,
+    e.g. one origin against N destinations. Pass ``decimals=None`` to skip
+    rounding.
+    """
+    lat1, lng1, lat2, lng2 = (
+        np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lng1, lat2, lng2)
+    )
 
-        return float("{0:.2f}".format(distance_km))
-    except Exception as e:
-        print(f"[ERROR] Haversine calculation failed: {e}")
-        return None
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    distances = EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    if decimals is not None:
+        distances = np.round(distances, decimals)
+    return distances
+
+
+def haversine_matrix(origins, destinations, decimals=2):
+    """
+    Distance matrix (km) of shape ``(len(origins), len(destinations))``.
+
+    ``origins`` and ``destinations`` are sequences of ``(lat, lng)`` pairs.
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+
+    return haversine_vector(
+        origins[:, 0, np.newaxis],
+        origins[:, 1, np.newaxis],
+        destinations[np.newaxis, :, 0],
+        destinations[np.newaxis, :, 1],
+        decimals=decimals,
+    )
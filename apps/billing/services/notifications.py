@@ -0,0 +1,79 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.billing.models import Delivery, DeliveryNotificationReceipt
+from apps.billing.services.push_audience import resolve_push_tokens
+from apps.firebase.utils.fcm_helper import get_dynamic_message, send_push_notification
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(delivery_id, event_type):
+    return f"push:coalesce:{delivery_id}:{event_type}"
+
+
+def queue_delivery_notification(delivery: Delivery, event_type):
+    """
+    Schedules the push for ``event_type`` once the current transaction
+    commits. Repeats of the same event for the same delivery within
+    PUSH_COALESCE_SECONDS are dropped.
+    """
+    delivery_id = delivery.pk
+
+    def enqueue():
+        from apps.billing.tasks import send_delivery_notification_task
+
+        window = getattr(settings, "PUSH_COALESCE_SECONDS", 30)
+        try:
+            first = cache.add(coalesce_key(delivery_id, event_type), 1, window)
+        except Exception as e:
+            logger.warning("Push coalescing unavailable: %s", e)
+            first = True
+        if not first:
+            logger.info("Skipping duplicate %s push for delivery %s", event_type, delivery_id)
+            return
+
+        try:
+            send_delivery_notification_task.delay(delivery_id, event_type)
+        except Exception as e:
+            logger.error("Could not queue %s push for delivery %s: %s", event_type, delivery_id, e)
+
+    transaction.on_commit(enqueue)
+
+
+def send_delivery_notification(delivery_id, event_type, tokens=None, attempt=1, task_id=None):
+    """
+    Sends the push for one delivery event and records a receipt. ``tokens``
+    limits a retry to the devices that failed transiently last time. Returns
+    ``(receipt, retry_tokens)``.
+    """
+    delivery = Delivery.objects.filter(pk=delivery_id).first()
+    if delivery is None:
+        return None, []
+
+    if tokens is None:
+        tokens = resolve_push_tokens(delivery, event_type)
+    if not tokens:
+        return None, []
+
+    title, body = get_dynamic_message(delivery, event_type, delivery.pickup_customer_name)
+    started = time.perf_counter()
+    results = send_push_notification(tokens, {"campaign_title": title, "campaign_message": body})
+
+    receipt = DeliveryNotificationReceipt.objects.create(
+        delivery=delivery,
+        event=event_type,
+        attempt=attempt,
+        recipients=len(tokens),
+        successful=results["successful"],
+        failed=results["failed"],
+        invalid_tokens=len(results["invalid_tokens"]),
+        retry_tokens=len(results["retry_tokens"]),
+        duration_ms=int((time.perf_counter() - started) * 1000),
+        task_id=task_id,
+    )
+    return receipt, results["retry_tokens"]
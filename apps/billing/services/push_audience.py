@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from apps.billing.models import Delivery
+from apps.billing.services.driver_locations import nearby_drivers_queryset
+from apps.firebase.models import TokenFCM
+
+User = get_user_model()
+
+ADMINS = "admins"
+ASSIGNED_DRIVER = "assigned_driver"
+NEARBY_DRIVERS = "nearby_drivers"
+
+# Who hears about each delivery event. Statuses not listed notify nobody.
+EVENT_AUDIENCES = {
+    Delivery.STATUS_TYPE.CREATED: {ADMINS},
+    Delivery.STATUS_TYPE.WAITING_FOR_DRIVER: {NEARBY_DRIVERS},
+    Delivery.STATUS_TYPE.DRIVER_ASSIGNED: {ASSIGNED_DRIVER},
+    Delivery.STATUS_TYPE.ORDER_PICKED_UP: {ASSIGNED_DRIVER},
+    Delivery.STATUS_TYPE.ON_THE_WAY: {ASSIGNED_DRIVER},
+    Delivery.STATUS_TYPE.ARRIVED: {ASSIGNED_DRIVER},
+    Delivery.STATUS_TYPE.DELIVERY_SUCCESS: {ASSIGNED_DRIVER},
+    Delivery.STATUS_TYPE.DELIVERY_FAILED: {ADMINS, ASSIGNED_DRIVER},
+    Delivery.STATUS_TYPE.DRIVER_REJECTED: {ADMINS, ASSIGNED_DRIVER},
+    Delivery.STATUS_TYPE.CANCELED: {ADMINS, ASSIGNED_DRIVER},
+}
+
+
+def admin_users():
+    return User.objects.filter(Q(is_staff=True) | Q(role=User.RoleType.OWNER), is_active=True)
+
+
+def nearby_drivers(delivery: Delivery, radius_km=None):
+    if not (delivery.pickup_latitude and delivery.pickup_longitude):
+        return User.objects.none()
+
+    radius_km = radius_km or getattr(settings, "PUSH_NEARBY_DRIVER_RADIUS_KM", 3)
+    return nearby_drivers_queryset(delivery.pickup_latitude, delivery.pickup_longitude, radius_km)
+
+
+def resolve_audience(delivery: Delivery, event_type):
+    """
+    Recipient filter (a Q on TokenFCM) for ``event_type`` of ``delivery``, or
+    None when nobody should be notified.
+    """
+    condition = Q()
+    matched = False
+    for audience in EVENT_AUDIENCES.get(event_type, ()):
+        if audience == ASSIGNED_DRIVER:
+            if not delivery.driver_id:
+                continue
+            part = Q(user_id=delivery.driver_id)
+        elif audience == NEARBY_DRIVERS:
+            part = Q(user__in=nearby_drivers(delivery).values("id"))
+        else:
+            part = Q(user__in=admin_users().values("id"))
+        condition |= part
+        matched = True
+
+    return condition if matched else None
+
+
+def resolve_push_tokens(delivery: Delivery, event_type):
+    """
+    Device tokens of everyone who should hear about ``event_type``, fetched
+    in one query through the TokenFCM.user index.
+    """
+    condition = resolve_audience(delivery, event_type)
+    if condition is None:
+        return []
+    return list(TokenFCM.objects.filter(condition).values_list("token", flat=True))
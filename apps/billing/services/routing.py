@@ -0,0 +1,233 @@
+import abc
+import logging
+import threading
+
+import googlemaps
+import pytz
+import requests
+from decouple import config
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.billing.services.haversine_distance import haversine_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingBackend(abc.ABC):
+    """
+    Returns driving distances in km for every origin x destination pair
+    (``None`` where no route exists). Subclasses declare the provider's
+    per-request limits and the service splits work accordingly.
+    """
+
+    name = "base"
+    max_origins = 25
+    max_destinations = 25
+    max_elements = 100
+    max_coordinates = None  # origins + destinations, for providers that cap the total
+
+    @abc.abstractmethod
+    def matrix(self, origins, destinations):
+        """
+        Returns one row of km distances per origin, in ``destinations`` order.
+        """
+
+    def chunk_sizes(self, n_origins, n_destinations):
+        destinations = min(n_destinations, self.max_destinations)
+        if self.max_coordinates:
+            # share the coordinate budget between both sides
+            destinations = min(destinations, max(self.max_coordinates - n_origins, self.max_coordinates // 2))
+        origins = min(n_origins, self.max_origins, self.max_elements // max(destinations, 1))
+        if self.max_coordinates:
+            origins = min(origins, self.max_coordinates - destinations)
+        return max(origins, 1), max(destinations, 1)
+
+
+class GoogleRoutingBackend(RoutingBackend):
+    name = "google"
+
+    def __init__(self, client=None):
+        self.client = client or googlemaps.Client(key=config("GOOGLE_MAP_KEY"))
+
+    def matrix(self, origins, destinations):
+        result = self.client.distance_matrix(origins, destinations, mode="driving")
+        return [
+            [
+                element["distance"]["value"] / 1000 if element.get("status") == "OK" else None
+                for element in row["elements"]
+            ]
+            for row in result.get("rows", [])
+        ]
+
+
+class MapboxRoutingBackend(RoutingBackend):
+    name = "mapbox"
+    max_elements = 625
+    max_coordinates = 25
+    url = "https://api.mapbox.com/directions-matrix/v1/mapbox/driving/"
+
+    def __init__(self, access_token=None):
+        self.access_token = access_token or config("MAPBOX_KEY")
+        self.session = requests.Session()
+
+    def matrix(self, origins, destinations):
+        coordinates = ";".join(f"{lng},{lat}" for lat, lng in [*origins, *destinations])
+        params = {
+            "access_token": self.access_token,
+            "annotations": "distance",
+            "sources": ";".join(str(i) for i in range(len(origins))),
+            "destinations": ";".join(str(len(origins) + i) for i in range(len(destinations))),
+        }
+        response = self.session.get(f"{self.url}{coordinates}", params=params, timeout=10)
+        response.raise_for_status()
+        return [
+            [meters / 1000 if meters is not None else None for meters in row]
+            for row in response.json().get("distances", [])
+        ]
+
+
+class StubRoutingBackend(RoutingBackend):
+    """
+    Straight-line distances; no network. For tests and local development.
+    Provider credentials passed by ``get_routing_service`` are ignored.
+    """
+
+    name = "stub"
+    max_origins = max_destinations = max_elements = 10_000
+
+    def __init__(self, **credentials):
+        self.calls = 0
+
+    def matrix(self, origins, destinations):
+        self.calls += 1
+        return haversine_matrix(origins, destinations).tolist()
+
+
+class RoutingService:
+    """
+    Cached, batched access to a routing backend.
+
+    Coordinates are snapped to a ``grid_degrees`` grid and results are cached
+    per time-of-day bucket, so repeat routes between the same blocks are a
+    cache lookup. Buckets follow the local time of ``time_zone`` (where the
+    traffic is), not the server's TIME_ZONE. Missing pairs are fetched in as
+    few provider calls as the backend's limits allow.
+    """
+
+    def __init__(
+        self, backend, grid_degrees=0.001, ttl=24 * 3600, bucket_hours=3, time_zone="Asia/Dhaka", cache_alias="default"
+    ):
+        self.backend = backend
+        self.grid_degrees = grid_degrees
+        self.ttl = ttl
+        self.bucket_hours = bucket_hours
+        self.time_zone = pytz.timezone(time_zone)
+        self.cache_alias = cache_alias
+
+    def snap(self, point):
+        lat, lng = point
+        return round(float(lat) / self.grid_degrees), round(float(lng) / self.grid_degrees)
+
+    def time_bucket(self, at=None):
+        return timezone.localtime(at, self.time_zone).hour // self.bucket_hours
+
+    def _key(self, bucket, origin_cell, destination_cell):
+        return "route:{}:{}:{}:{}_{}:{}_{}".format(
+            self.backend.name, self.grid_degrees, bucket, *origin_cell, *destination_cell
+        )
+
+    def distance_matrix(self, origins, destinations):
+        origin_cells = [self.snap(o) for o in origins]
+        destination_cells = [self.snap(d) for d in destinations]
+        bucket = self.time_bucket()
+
+        keys = {
+            (oc, dc): self._key(bucket, oc, dc)
+            for oc in origin_cells
+            for dc in destination_cells
+        }
+        cache = caches[self.cache_alias]
+        try:
+            cached = cache.get_many(list(keys.values()))
+        except Exception as e:
+            logger.warning("Routing cache read failed: %s", e)
+            cached = {}
+        found = {pair: cached[key] for pair, key in keys.items() if key in cached}
+
+        missing = [pair for pair in keys if pair not in found]
+        if missing:
+            # one representative real coordinate per snapped cell
+            origin_points = dict(zip(origin_cells, origins))
+            destination_points = dict(zip(destination_cells, destinations))
+            missing_origins = list(dict.fromkeys(oc for oc, _ in missing))
+            missing_destinations = list(dict.fromkeys(dc for _, dc in missing))
+
+            fetched = self._fetch(missing_origins, missing_destinations, origin_points, destination_points)
+            found.update(fetched)
+
+            to_cache = {keys[pair]: km for pair, km in fetched.items() if km is not None and pair in keys}
+            if to_cache:
+                try:
+                    cache.set_many(to_cache, self.ttl)
+                except Exception as e:
+                    logger.warning("Routing cache write failed: %s", e)
+
+        return [[found.get((oc, dc)) for dc in destination_cells] for oc in origin_cells]
+
+    def _fetch(self, origin_cells, destination_cells, origin_points, destination_points):
+        origin_step, destination_step = self.backend.chunk_sizes(len(origin_cells), len(destination_cells))
+        results = {}
+        for i in range(0, len(origin_cells), origin_step):
+            origin_chunk = origin_cells[i:i + origin_step]
+            for j in range(0, len(destination_cells), destination_step):
+                destination_chunk = destination_cells[j:j + destination_step]
+                rows = self.backend.matrix(
+                    [tuple(map(float, origin_points[c])) for c in origin_chunk],
+                    [tuple(map(float, destination_points[c])) for c in destination_chunk],
+                )
+                for oc, row in zip(origin_chunk, rows):
+                    for dc, km in zip(destination_chunk, row):
+                        results[(oc, dc)] = km
+        return results
+
+    def distance(self, lat1, lng1, lat2, lng2):
+        return self.distance_matrix([(lat1, lng1)], [(lat2, lng2)])[0][0]
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+DEFAULT_ROUTING_BACKENDS = {
+    "google": "apps.billing.services.routing.GoogleRoutingBackend",
+    "mapbox": "apps.billing.services.routing.MapboxRoutingBackend",
+}
+
+
+def get_routing_service(provider, **backend_kwargs):
+    """
+    Process-wide RoutingService for ``provider`` ("google" or "mapbox").
+    ``backend_kwargs`` (e.g. an existing googlemaps ``client``) are passed to
+    the backend when the service is first created. The backend class can be
+    swapped with settings.ROUTING_BACKENDS, e.g. to StubRoutingBackend in tests.
+    """
+    with _services_lock:
+        service = _services.get(provider)
+        if service is None:
+            backends = {**DEFAULT_ROUTING_BACKENDS, **getattr(settings, "ROUTING_BACKENDS", {})}
+            service = RoutingService(
+                import_string(backends[provider])(**backend_kwargs),
+                grid_degrees=getattr(settings, "ROUTING_CACHE_GRID_DEGREES", 0.001),
+                ttl=getattr(settings, "ROUTING_CACHE_TTL", 24 * 3600),
+                bucket_hours=getattr(settings, "ROUTING_CACHE_BUCKET_HOURS", 3),
+                time_zone=getattr(settings, "ROUTING_TIME_ZONE", "Asia/Dhaka"),
+            )
+            _services[provider] = service
+        return service
+
+
+def reset_routing_services():
+    with _services_lock:
+        _services.clear()
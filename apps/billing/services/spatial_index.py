@@ -0,0 +1,208 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.billing.models import Delivery
+from apps.billing.services.geo_queries import KM_PER_DEGREE
+from apps.billing.services.haversine_distance import haversine_vector
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "open_delivery_index:generation"
+
+
+class OpenDeliveryGridIndex:
+    """
+    In-process grid index of deliveries that are waiting for a driver.
+
+    Deliveries are bucketed into square lat/lng cells on their pickup point.
+    A radius query only visits the cells that overlap the search circle and
+    runs an exact haversine check on the deliveries found there.
+
+    The index is kept in sync by the Delivery signal receivers and is rebuilt
+    from the database every ``refresh_seconds``. A delivery newly indexed by
+    one worker bumps a generation counter in the shared cache, so the other
+    workers rebuild after at most ``min_refresh_seconds``. Only one thread per
+    process rebuilds at a time; the others keep serving the previous grid.
+    Deliveries that left WAITING_FOR_DRIVER elsewhere may linger until then,
+    so callers confirm the status against the database.
+    """
+
+    def __init__(self, cell_size_km=1.0, refresh_seconds=30, min_refresh_seconds=2, max_age=timedelta(hours=3)):
+        self.cell_deg = cell_size_km / KM_PER_DEGREE
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.max_age = max_age
+
+        self._cells = defaultdict(dict)  # cell -> {delivery_id: (lat, lng)}
+        self._cell_of = {}  # delivery_id -> cell
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._loaded_at = None
+        self._generation = None
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def _add(self, delivery_id, lat, lng):
+        self._discard(delivery_id)
+        cell = self._cell(lat, lng)
+        self._cells[cell][delivery_id] = (lat, lng)
+        self._cell_of[delivery_id] = cell
+
+    def _discard(self, delivery_id):
+        cell = self._cell_of.pop(delivery_id, None)
+        if cell is None:
+            return
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(delivery_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def add(self, delivery_id, lat, lng):
+        with self._lock:
+            self._add(delivery_id, lat, lng)
+
+    def discard(self, delivery_id):
+        with self._lock:
+            self._discard(delivery_id)
+
+    def sync(self, delivery_id, status, lat, lng):
+        """
+        Apply a status transition: only WAITING_FOR_DRIVER deliveries stay indexed.
+        """
+        if status == Delivery.STATUS_TYPE.WAITING_FOR_DRIVER and lat is not None and lng is not None:
+            lat, lng = float(lat), float(lng)
+            with self._lock:
+                moved = self._cell_of.get(delivery_id) != self._cell(lat, lng)
+                self._add(delivery_id, lat, lng)
+            if moved:
+                self._bump_generation()
+        else:
+            # stale entries elsewhere are filtered out by the caller's status check
+            self.discard(delivery_id)
+
+    def _shared_generation(self):
+        try:
+            return cache.get(GENERATION_KEY, 0)
+        except Exception as e:
+            logger.warning("Open delivery index generation unavailable: %s", e)
+            return None
+
+    def _bump_generation(self):
+        try:
+            try:
+                generation = cache.incr(GENERATION_KEY)
+            except ValueError:  # missing or evicted
+                cache.add(GENERATION_KEY, 0, timeout=None)
+                generation = cache.incr(GENERATION_KEY)
+        except Exception as e:
+            logger.warning("Could not bump the open delivery index generation: %s", e)
+            return
+        with self._lock:
+            # our own addition is already in the grid
+            if self._generation is not None and generation == self._generation + 1:
+                self._generation = generation
+
+    def rebuild(self):
+        # read before loading so additions made meanwhile trigger another rebuild
+        generation = self._shared_generation()
+        since = timezone.now() - self.max_age
+        rows = Delivery.objects.filter(
+            status=Delivery.STATUS_TYPE.WAITING_FOR_DRIVER,
+            created_date__gte=since,
+        ).values_list("id", "pickup_latitude", "pickup_longitude")
+
+        cells = defaultdict(dict)
+        cell_of = {}
+        for delivery_id, lat, lng in rows:
+            cell = self._cell(lat, lng)
+            cells[cell][delivery_id] = (lat, lng)
+            cell_of[delivery_id] = cell
+
+        with self._lock:
+            self._cells = cells
+            self._cell_of = cell_of
+            self._loaded_at = time.monotonic()
+            self._generation = generation
+
+        logger.debug("Open delivery index rebuilt with %s deliveries", len(cell_of))
+
+    def _is_stale(self):
+        age = time.monotonic() - self._loaded_at
+        if age >= self.refresh_seconds:
+            return True
+        if age < self.min_refresh_seconds:
+            return False
+        generation = self._shared_generation()
+        return generation is not None and generation != self._generation
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None:
+            with self._rebuild_lock:
+                if self._loaded_at is None:
+                    self.rebuild()
+            return
+
+        if not self._is_stale() or not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            if self._is_stale():
+                self.rebuild()
+        except Exception:
+            logger.exception("Open delivery index rebuild failed, serving the previous grid")
+        finally:
+            self._rebuild_lock.release()
+
+    def nearby(self, lat, lng, radius_km):
+        """
+        Returns ``[(delivery_id, distance_km), ...]`` within ``radius_km`` of the
+        given point, nearest first.
+        """
+        self._ensure_fresh()
+
+        lat_span = math.ceil(radius_km / (self.cell_deg * KM_PER_DEGREE))
+        lng_scale = max(math.cos(math.radians(lat)), 0.01)
+        lng_span = math.ceil(radius_km / (self.cell_deg * KM_PER_DEGREE * lng_scale))
+        row, col = self._cell(lat, lng)
+
+        candidates = []
+        with self._lock:
+            for r in range(row - lat_span, row + lat_span + 1):
+                for c in range(col - lng_span, col + lng_span + 1):
+                    bucket = self._cells.get((r, c))
+                    if bucket:
+                        candidates.extend(bucket.items())
+
+        if not candidates:
+            return []
+
+        ids, points = zip(*candidates)
+        pickup_lat, pickup_lng = zip(*points)
+        distances = haversine_vector(lat, lng, pickup_lat, pickup_lng)
+
+        matches = [
+            (delivery_id, float(distance))
+            for delivery_id, distance in zip(ids, distances)
+            if distance <= radius_km
+        ]
+        matches.sort(key=lambda item: item[1])
+        return matches
+
+    def __len__(self):
+        return len(self._cell_of)
+
+
+open_delivery_index = OpenDeliveryGridIndex(
+    cell_size_km=getattr(settings, "OPEN_DELIVERY_INDEX_CELL_KM", 1.0),
+    refresh_seconds=getattr(settings, "OPEN_DELIVERY_INDEX_REFRESH_SECONDS", 30),
+    min_refresh_seconds=getattr(settings, "OPEN_DELIVERY_INDEX_MIN_REFRESH_SECONDS", 2),
+)
@@ -0,0 +1,254 @@
+import hashlib
+import logging
+import re
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.billing.models import Delivery
+
+logger = logging.getLogger(__name__)
+
+# Fields pushed to tracking subscribers when they change.
+TRACKED_FIELDS = (
+    "status",
+    "driver_id",
+    "rider_accepted_time",
+    "rider_pickup_time",
+    "actual_delivery_completed_time",
+    "cancel_reason",
+)
+
+ACTIVE_STATUSES = (
+    Delivery.STATUS_TYPE.DRIVER_ASSIGNED,
+    Delivery.STATUS_TYPE.ORDER_PICKED_UP,
+    Delivery.STATUS_TYPE.ON_THE_WAY,
+    Delivery.STATUS_TYPE.ARRIVED,
+)
+
+_GROUP_SAFE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+def client_group(client_id):
+    client_id = str(client_id)
+    if not _GROUP_SAFE.match(client_id):
+        # channel group names only allow a small alphabet and length
+        client_id = hashlib.sha1(client_id.encode("utf-8")).hexdigest()
+    return f"tracking.client.{client_id}"
+
+
+def driver_group(driver_id):
+    return f"tracking.driver.{int(driver_id)}"
+
+
+def _serialize(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _seq_key(group):
+    return f"tracking:seq:{group}"
+
+
+def _event_key(group, seq):
+    return f"tracking:event:{group}:{seq}"
+
+
+def current_seq(group):
+    try:
+        return cache.get(_seq_key(group)) or 0
+    except Exception:
+        return 0
+
+
+def _next_seq(group):
+    key = _seq_key(group)
+    cache.add(key, 0, None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr(); start over, subscribers resync
+        cache.set(key, 1, None)
+        return 1
+
+
+def publish(group, event_type, payload):
+    """
+    Stamps the event with the group's next sequence number, keeps it for
+    TRACKING_REPLAY_SECONDS so reconnecting subscribers can resume, and
+    pushes it to the group. Blocks on the channel layer, so it runs in the
+    tracking Celery tasks rather than in requests.
+    """
+    try:
+        event = {"type": event_type, "seq": _next_seq(group), **payload}
+        cache.set(_event_key(group, event["seq"]), event, getattr(settings, "TRACKING_REPLAY_SECONDS", 600))
+        async_to_sync(get_channel_layer().group_send)(group, {"type": "tracking.event", "event": event})
+    except Exception as e:
+        logger.warning("Tracking publish to %s failed: %s", group, e)
+        return None
+    return event
+
+
+def missed_events(group, after_seq):
+    """
+    Events after ``after_seq`` in order, or None when some of them have
+    expired and the subscriber has to reload its state instead.
+    """
+    latest = current_seq(group)
+    if after_seq >= latest:
+        return []
+    if latest - after_seq > getattr(settings, "TRACKING_REPLAY_MAX_EVENTS", 500):
+        return None
+
+    keys = [_event_key(group, seq) for seq in range(after_seq + 1, latest + 1)]
+    try:
+        found = cache.get_many(keys)
+    except Exception:
+        return None
+    if len(found) != len(keys):
+        return None
+    return [found[key] for key in keys]
+
+
+def _version_key(client_id=None):
+    if client_id is None:
+        return "tracking:version:all"
+    return f"tracking:version:client:{hashlib.sha1(str(client_id).encode('utf-8')).hexdigest()}"
+
+
+def tracking_version(client_id=None):
+    """
+    Epoch timestamp of the last tracking change, for one client or for all
+    of them. Used as the validator for conditional GETs on the tracking
+    endpoint; None when the cache is unavailable.
+    """
+    key = _version_key(client_id)
+    try:
+        # an evicted stamp restarts at "now", which only costs one full reply
+        cache.add(key, time.time(), None)
+        return cache.get(key)
+    except Exception as e:
+        logger.warning("Could not read tracking version: %s", e)
+        return None
+
+
+def bump_tracking_version(client_id):
+    now = time.time()
+    try:
+        cache.set_many({_version_key(): now, _version_key(client_id): now}, None)
+    except Exception as e:
+        logger.warning("Could not bump tracking version for %s: %s", client_id, e)
+
+
+def delivery_changes(delivery: Delivery, update_fields=None):
+    """
+    Tracked fields written by this save that differ from the values the
+    delivery was loaded with (all of them for a new delivery).
+    """
+    fields = TRACKED_FIELDS
+    if update_fields is not None:
+        written = set(update_fields)
+        fields = [f for f in TRACKED_FIELDS if f in written or f.removesuffix("_id") in written]
+    return {
+        field: _serialize(getattr(delivery, field))
+        for field in fields
+        if delivery.has_changed(field)
+    }
+
+
+def queue_delivery_update(delivery: Delivery, changes, previous_driver_id=None):
+    """
+    Schedules publish_delivery_update on a worker once the current
+    transaction commits.
+    """
+    payload = {
+        "client_id": delivery.client_id,
+        "delivery_id": delivery.id,
+        "changes": changes,
+        "at": timezone.now().isoformat(),
+    }
+    # a reassigned delivery is announced to both the old and the new driver
+    driver_ids = sorted({delivery.driver_id, previous_driver_id} - {None})
+
+    def enqueue():
+        from apps.billing.tasks import publish_delivery_update_task
+
+        try:
+            publish_delivery_update_task.delay(payload, driver_ids)
+        except Exception as e:
+            logger.error("Could not queue tracking update for delivery %s: %s", delivery.id, e)
+
+    transaction.on_commit(enqueue)
+
+
+def publish_delivery_update(payload, driver_ids):
+    publish(client_group(payload["client_id"]), "delivery.update", payload)
+    for driver_id in driver_ids:
+        publish(driver_group(driver_id), "delivery.update", payload)
+
+    changes = payload["changes"]
+    if "status" in changes or "driver_id" in changes:
+        try:
+            cache.delete_many([_active_clients_key(d) for d in driver_ids])
+        except Exception as e:
+            logger.warning("Could not reset active deliveries for drivers %s: %s", driver_ids, e)
+
+
+def _active_clients_key(driver_id):
+    return f"tracking:driver-clients:{driver_id}"
+
+
+def active_client_ids(driver_id):
+    key = _active_clients_key(driver_id)
+    client_ids = cache.get(key)
+    if client_ids is None:
+        client_ids = list(
+            Delivery.objects.filter(driver_id=driver_id, status__in=ACTIVE_STATUSES)
+            .values_list("client_id", flat=True)
+        )
+        cache.set(key, client_ids, 300)
+    return client_ids
+
+
+def queue_driver_location(driver_id, lat, lng, recorded_at=None):
+    """
+    Hands a driver position to publish_driver_location on a worker.
+    """
+    from apps.billing.tasks import publish_driver_location_task
+
+    try:
+        publish_driver_location_task.delay(driver_id, float(lat), float(lng), _serialize(recorded_at or timezone.now()))
+    except Exception as e:
+        logger.warning("Could not queue location of driver %s: %s", driver_id, e)
+
+
+def publish_driver_location(driver_id, lat, lng, recorded_at=None):
+    """
+    Pushes a driver's position to the driver stream and to the stream of
+    every delivery the driver is currently carrying. Positions that did not
+    move since the last publish are dropped.
+    """
+    position = (round(float(lat), 6), round(float(lng), 6))
+    last_key = f"tracking:driver-position:{driver_id}"
+    try:
+        if cache.get(last_key) == position:
+            return
+        cache.set(last_key, position, 3600)
+        client_ids = active_client_ids(driver_id)
+    except Exception as e:
+        logger.warning("Tracking location publish for driver %s failed: %s", driver_id, e)
+        return
+
+    payload = {
+        "driver_id": driver_id,
+        "latitude": position[0],
+        "longitude": position[1],
+        "at": _serialize(recorded_at or timezone.now()),
+    }
+    publish(driver_group(driver_id), "driver.location", payload)
+    for client_id in client_ids:
+        publish(client_group(client_id), "driver.location", payload)
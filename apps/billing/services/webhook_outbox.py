@@ -0,0 +1,192 @@
+import logging
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from apps.billing.models import WebhookOutbox
+
+logger = logging.getLogger(__name__)
+
+_session = None
+
+
+def get_session():
+    """
+    Process-wide pooled HTTP session for partner webhooks.
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=getattr(settings, "WEBHOOK_POOL_SIZE", 10))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        _session = session
+    return _session
+
+
+def enqueue_webhook(url, payload, delivery=None):
+    """
+    Stores a webhook call in the outbox and asks a worker to send it once the
+    surrounding transaction commits. If the broker is unreachable the periodic
+    dispatch picks the row up instead.
+    """
+    event = WebhookOutbox.objects.create(delivery=delivery, url=url, payload=payload)
+
+    def kick():
+        from apps.billing.tasks import dispatch_webhook_outbox
+
+        try:
+            dispatch_webhook_outbox.delay()
+        except Exception as e:
+            logger.warning("Could not queue webhook dispatch, leaving it to the schedule: %s", e)
+
+    transaction.on_commit(kick)
+    return event
+
+
+def backoff_delay(attempts):
+    base = getattr(settings, "WEBHOOK_BACKOFF_BASE_SECONDS", 10)
+    ceiling = getattr(settings, "WEBHOOK_BACKOFF_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def send(event, session=None):
+    """
+    Posts one outbox row. Returns None on success or the error message.
+    """
+    session = session or get_session()
+    try:
+        response = session.post(
+            event.url,
+            json=event.payload,
+            timeout=getattr(settings, "WEBHOOK_TIMEOUT_SECONDS", 5),
+            allow_redirects=False,
+        )
+    except requests.RequestException as e:
+        return str(e) or e.__class__.__name__
+
+    if 200 <= response.status_code < 300:
+        return None
+    return f"HTTP {response.status_code}: {response.text[:500]}"
+
+
+def prune_outbox(sent_days, failed_days, chunk_size=10_000):
+    """
+    Deletes SENT rows older than ``sent_days`` and FAILED rows left for
+    review longer than ``failed_days``, in chunks. Returns the number deleted.
+    """
+    now = timezone.now()
+    expired = (
+        Q(status=WebhookOutbox.STATUS_TYPE.SENT, sent_at__lt=now - timedelta(days=sent_days))
+        | Q(status=WebhookOutbox.STATUS_TYPE.FAILED, modified_date__lt=now - timedelta(days=failed_days))
+    )
+    deleted = 0
+    while True:
+        ids = list(WebhookOutbox.objects.filter(expired).values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += WebhookOutbox.objects.filter(id__in=ids).delete()[0]
+
+
+def claim_pending(batch_size, now):
+    """
+    Picks the due rows this worker may send and leases them by moving
+    ``next_attempt_at`` past the time the sends can take, in one short
+    transaction. Returns ``[(event, previous_next_attempt_at)]`` in send order.
+
+    Rows are locked with SKIP LOCKED so several workers can claim in
+    parallel. A delivery is only handled by the worker whose batch holds its
+    oldest pending row; leased rows stay pending, so they keep holding back
+    the later events of their delivery. A worker that dies mid-batch leaves
+    its leases to expire and the rows are sent again.
+    """
+    timeout = getattr(settings, "WEBHOOK_TIMEOUT_SECONDS", 5)
+
+    with transaction.atomic():
+        events = list(
+            WebhookOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookOutbox.STATUS_TYPE.PENDING, next_attempt_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return []
+
+        delivery_ids = {event.delivery_id for event in events if event.delivery_id}
+        oldest_pending = dict(
+            WebhookOutbox.objects.filter(
+                status=WebhookOutbox.STATUS_TYPE.PENDING, delivery_id__in=delivery_ids
+            )
+            .values("delivery_id")
+            .annotate(first_id=Min("id"))
+            .values_list("delivery_id", "first_id")
+        )
+
+        claimed, started, blocked = [], set(), set()
+        for event in events:
+            key = event.delivery_id or f"event-{event.id}"
+            if key in blocked:
+                continue
+            if key not in started and event.delivery_id and oldest_pending.get(event.delivery_id) != event.id:
+                # an older event of this delivery is backing off or leased by another worker
+                blocked.add(key)
+                continue
+            started.add(key)
+            claimed.append((event, event.next_attempt_at))
+
+        if claimed:
+            lease_until = now + timedelta(seconds=timeout * len(claimed) + 60)
+            WebhookOutbox.objects.filter(pk__in=[event.pk for event, _ in claimed]).update(
+                next_attempt_at=lease_until
+            )
+    return claimed
+
+
+def dispatch_pending(batch_size=None, session=None):
+    """
+    Sends one batch of due outbox rows and returns ``(sent, failed)``.
+
+    Rows are claimed in a short transaction (see claim_pending) and posted
+    outside it; each result is saved on its own, so a crash or a slow partner
+    never holds row locks or rolls back rows that already went out. Events of
+    the same delivery go out strictly in order: a failed row that is backing
+    off holds back the later ones.
+    """
+    batch_size = batch_size or getattr(settings, "WEBHOOK_OUTBOX_BATCH_SIZE", 100)
+    max_attempts = getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 8)
+    now = timezone.now()
+    sent = failed = 0
+
+    blocked = set()
+    for event, previous_attempt_at in claim_pending(batch_size, now):
+        key = event.delivery_id or f"event-{event.id}"
+        if key in blocked:
+            # give the lease back; the failed older event keeps it waiting
+            WebhookOutbox.objects.filter(pk=event.pk).update(next_attempt_at=previous_attempt_at)
+            continue
+
+        error = send(event, session=session)
+        event.attempts += 1
+        if error is None:
+            event.status = WebhookOutbox.STATUS_TYPE.SENT
+            event.sent_at = timezone.now()
+            event.last_error = None
+            sent += 1
+        else:
+            event.last_error = error
+            if event.attempts >= max_attempts:
+                event.status = WebhookOutbox.STATUS_TYPE.FAILED
+                logger.error("Webhook %s gave up after %s attempts: %s", event.id, event.attempts, error)
+            else:
+                event.next_attempt_at = timezone.now() + backoff_delay(event.attempts)
+                blocked.add(key)
+                logger.warning("Webhook %s failed (attempt %s): %s", event.id, event.attempts, error)
+            failed += 1
+        event.save(update_fields=["status", "attempts", "next_attempt_at", "last_error", "sent_at", "modified_date"])
+
+    return sent, failed
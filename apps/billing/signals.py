@@ -1,11 +1,22 @@
-from django.db.models.signals import post_save, pre_save
-
-from apps.billing.models import Delivery, DeliveryIssue
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.billing.models import Delivery, DeliveryEarningConfig, DeliveryIssue
+from apps.billing.services.daily_stats import affected_days, queue_daily_stats_refresh, queue_days_refresh
+from apps.billing.services.dashboard_cache import invalidate_dashboard_days
+from apps.billing.services.driver_locations import record_saved_location
+from apps.billing.services.notifications import queue_delivery_notification
+from apps.billing.services.spatial_index import open_delivery_index
+from apps.billing.services.tracking import (
+    bump_tracking_version,
+    delivery_changes,
+    queue_delivery_update,
+    queue_driver_location,
+)
 from apps.billing.utils.client_status_update import client_status_updater
+from apps.billing.utils.earning_calculation import invalidate_config
 from apps.billing.utils.send_sms import send_sms_bd
 from django.dispatch import receiver
-from apps.firebase.utils.fcm_helper import get_dynamic_message, send_push_notification
-from apps.firebase.models import TokenFCM
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import pytz
@@ -26,33 +37,29 @@ post_save.connect(delivery_instance, sender=Delivery)
 
 
 
-# Cache for previous statuses
-
-PREVIOUS_DELIVERY_STATUSES = {}
-
-
 @receiver(pre_save, sender=Delivery)
-def track_status_change(sender, instance, **kwargs):
+def track_status_change(sender, instance, update_fields=None, **kwargs):
     """
-    Detect if delivery status is changing.
+    Detect if delivery status is changing, from the values the instance was
+    loaded with (see Delivery.from_db) instead of re-reading the row.
     """
-    if instance.pk:
-        try:
-            previous_instance = Delivery.objects.get(pk=instance.pk)
-            PREVIOUS_DELIVERY_STATUSES[instance.pk] = previous_instance.status
-
-            if previous_instance.status != instance.status:
-                instance.status_changed = True
-                print(f"[PRE_SAVE] Status changed from {previous_instance.status} → {instance.status}")
-            else:
-                print("[PRE_SAVE] Status unchanged.")
-        except Delivery.DoesNotExist:
-            PREVIOUS_DELIVERY_STATUSES[instance.pk] = None
-            print("[PRE_SAVE] Delivery not found.")
-    else:
+    if instance._state.adding:
         instance.is_new = True  # Optional if you're setting this manually
-        PREVIOUS_DELIVERY_STATUSES[instance.pk] = None
+        instance.status_changed = False
         print("[PRE_SAVE] New Delivery detected (no PK).")
+        return
+
+    if update_fields is not None and "status" not in update_fields:
+        # Partial saves that don't write the status can't change it.
+        instance.status_changed = False
+        return
+
+    previous_status = instance.get_loaded_value("status")
+    instance.status_changed = instance.has_changed("status")
+    if instance.status_changed:
+        print(f"[PRE_SAVE] Status changed from {previous_status} → {instance.status}")
+    else:
+        print("[PRE_SAVE] Status unchanged.")
 
 
 @receiver(post_save, sender=Delivery)
@@ -69,27 +76,8 @@ def handle_delivery_update(sender, instance: Delivery, **kwargs):
         return
 
     event_type = instance.status.lower()
-
-
-
-    tokens = list(TokenFCM.objects.values_list("token", flat=True))
-    if not tokens:
-        print(f"[POST_SAVE] No tokens found for all user.")
-        return
-
-    restaurant_name = instance.pickup_customer_name
-    title, body = get_dynamic_message(instance, event_type, restaurant_name)
-
-    data = {
-        "campaign_title": title,
-        "campaign_message": body,
-    }
-
-    print("[POST_SAVE] Sending push notification...")
-    print("tokens", tokens)
-    send_push_notification(tokens, data)
-
-    PREVIOUS_DELIVERY_STATUSES.pop(instance.pk, None)
+    print(f"[POST_SAVE] Queueing {event_type} push notification.")
+    queue_delivery_notification(instance, event_type)
 
 
 @receiver(post_save, sender=Delivery)
@@ -112,6 +100,78 @@ def update_driver_timestamps(sender, instance, created, **kwargs):
         instance.save(update_fields=["rider_pickup_time"])
 
 
+@receiver(post_save, sender=Delivery)
+def sync_open_delivery_index(sender, instance: Delivery, **kwargs):
+    """
+    Keep the available-orders grid index in step with status transitions.
+    """
+    delivery_id = instance.pk
+    status = instance.status
+    lat, lng = instance.pickup_latitude, instance.pickup_longitude
+    transaction.on_commit(lambda: open_delivery_index.sync(delivery_id, status, lat, lng))
+
+
+@receiver(post_save, sender=Delivery)
+def push_tracking_update(sender, instance: Delivery, created, update_fields=None, **kwargs):
+    """
+    Stream the changed tracking fields to WebSocket subscribers after commit.
+    A delivery moved to another client_id also invalidates the old client's
+    tracking responses.
+    """
+    changes = delivery_changes(instance, update_fields)
+    previous_client_id = instance.get_loaded_value("client_id")
+    client_moved = (
+        not created
+        and previous_client_id != instance.client_id
+        and (update_fields is None or "client_id" in update_fields)
+    )
+    if changes or client_moved:
+        stale_client_ids = {instance.client_id, previous_client_id if client_moved else None} - {None, ""}
+        for client_id in stale_client_ids:
+            transaction.on_commit(lambda client_id=client_id: bump_tracking_version(client_id))
+    if not changes or not instance.client_id:
+        return
+    previous_driver_id = instance.get_loaded_value("driver_id")
+    queue_delivery_update(instance, changes, previous_driver_id)
+
+
+@receiver(post_save, sender=Delivery)
+def refresh_driver_daily_stats(sender, instance: Delivery, update_fields=None, **kwargs):
+    """
+    Keep the DriverDailyStats rollup in step with the buckets this save touched.
+    """
+    queue_daily_stats_refresh(instance, update_fields)
+
+
+@receiver(post_save, sender=User)
+def push_driver_location(sender, instance, update_fields=None, **kwargs):
+    if instance.role != User.RoleType.DRIVER or not (instance.latitude or instance.longitude):
+        return
+    if update_fields is not None and not {"latitude", "longitude"} & set(update_fields):
+        return
+    driver_id, lat, lng = instance.pk, instance.latitude, instance.longitude
+    transaction.on_commit(lambda: record_saved_location(driver_id, lat, lng))
+    transaction.on_commit(lambda: queue_driver_location(driver_id, lat, lng))
+
+
+@receiver(post_delete, sender=Delivery)
+def drop_from_open_delivery_index(sender, instance: Delivery, **kwargs):
+    delivery_id, client_id = instance.pk, instance.client_id
+    transaction.on_commit(lambda: open_delivery_index.discard(delivery_id))
+    transaction.on_commit(lambda: bump_tracking_version(client_id))
+    queue_days_refresh(affected_days(instance))
+    if instance.created_date:
+        # fleet-wide dashboard counts include deliveries without a driver
+        created_day = timezone.localdate(instance.created_date)
+        transaction.on_commit(lambda: invalidate_dashboard_days({created_day}))
+
+
+@receiver(post_save, sender=DeliveryEarningConfig)
+@receiver(post_delete, sender=DeliveryEarningConfig)
+def reset_earning_config_cache(sender, **kwargs):
+    transaction.on_commit(invalidate_config)
+
+
 @receiver(post_save, sender=DeliveryIssue)
 def notify_delivery_issue(sender, instance, created, **kwargs):
     if created:
@@ -1,10 +1,21 @@
+import logging
+
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from apps.billing.models import Delivery
-from apps.firebase.models import TokenFCM
-from apps.firebase.utils.fcm_helper import send_push_notification
-import requests
+from apps.billing.services.daily_stats import refresh_driver_days
+from apps.billing.services.driver_locations import prune_locations
+from apps.billing.services.notifications import send_delivery_notification
+from apps.billing.services.tracking import publish_delivery_update, publish_driver_location
+from apps.billing.services.webhook_outbox import dispatch_pending, prune_outbox
+from apps.billing.utils.client_status_update import raider_cancel_notifier
+from apps.billing.utils.guarantee import OnTimeGuaranteeService
+from apps.billing.utils.earning_recompute import recompute_driver_earnings
+
+logger = logging.getLogger(__name__)
 
 @shared_task(name="delivery.auto_cancel_deliveries_task")
 def auto_cancel_deliveries_task():
@@ -24,21 +35,111 @@ def auto_cancel_deliveries_task():
             if now >= cancel_time:
                 delivery.status = Delivery.STATUS_TYPE.DELIVERY_FAILED
                 delivery.cancel_reason = "No driver available after 30 mins"
-                delivery.save()
+                with transaction.atomic():
+                    delivery.save()  # queues the Chatchef status webhook via the outbox
+                    raider_cancel_notifier(delivery)
 
                 print(f"✅ Auto-cancelled delivery {delivery.client_id}")
 
-                # 🔔 Notify Chatchef webhook
-                try:
-                    requests.post("https://api.hungrytiger.chatchefs.com/api/webhook/v1/raider/", json={
-                        "event": "status",
-                        "client_id": delivery.client_id,
-                        "status": delivery.status,
-                        "cancel_reason": delivery.cancel_reason,
-                    })
-                    print(f"📤 Notified Chatchef for cancelled delivery {delivery.client_id}")
-                except Exception as e:
-                    print(f"❌ Failed to notify Chatchef webhook: {str(e)}")
-
         except Exception as e:
             print(f"❌ Error while cancelling delivery {delivery.client_id}: {str(e)}")
+
+
+@shared_task(name="delivery.recompute_driver_earnings_task")
+def recompute_driver_earnings_task(start_date=None, end_date=None, dry_run=False, chunk_size=5000):
+    report = recompute_driver_earnings(
+        start_date=date.fromisoformat(start_date) if start_date else None,
+        end_date=date.fromisoformat(end_date) if end_date else None,
+        chunk_size=chunk_size,
+        dry_run=dry_run,
+    )
+    logger.info(
+        "Recomputed driver earnings: %s/%s changed, delta %s", report["changed"], report["scanned"], report["total_delta"]
+    )
+    return report
+
+
+@shared_task(name="delivery.dispatch_webhook_outbox")
+def dispatch_webhook_outbox(max_batches=20):
+    """
+    Drain due partner webhooks from the outbox. Queued after each commit that
+    adds an event and scheduled periodically as a safety net for retries.
+    """
+    total_sent = total_failed = 0
+    for _ in range(max_batches):
+        sent, failed = dispatch_pending()
+        total_sent += sent
+        total_failed += failed
+        if not sent and not failed:
+            break
+    return {"sent": total_sent, "failed": total_failed}
+
+
+@shared_task(name="delivery.prune_webhook_outbox")
+def prune_webhook_outbox():
+    return prune_outbox(
+        sent_days=getattr(settings, "WEBHOOK_SENT_RETENTION_DAYS", 7),
+        failed_days=getattr(settings, "WEBHOOK_FAILED_RETENTION_DAYS", 30),
+    )
+
+
+@shared_task(
+    bind=True,
+    name="delivery.send_delivery_notification",
+    rate_limit=getattr(settings, "PUSH_TASK_RATE_LIMIT", None),
+    max_retries=5,
+)
+def send_delivery_notification_task(self, delivery_id, event_type, tokens=None):
+    """
+    Push fan-out for one delivery event, routed to the "notifications" queue.
+    Devices that failed on quota or availability errors are retried with
+    exponential backoff; the rest of the audience is not re-sent.
+    """
+    receipt, retry_tokens = send_delivery_notification(
+        delivery_id,
+        event_type,
+        tokens=tokens,
+        attempt=self.request.retries + 1,
+        task_id=self.request.id,
+    )
+    if retry_tokens and self.request.retries < self.max_retries:
+        raise self.retry(args=(delivery_id, event_type, retry_tokens), countdown=15 * 2 ** self.request.retries)
+    return receipt.id if receipt else None
+
+
+@shared_task(name="delivery.issue_on_time_reward")
+def issue_on_time_reward_task(delivery_id):
+    delivery = Delivery.objects.filter(pk=delivery_id).first()
+    if delivery is None:
+        return
+    try:
+        OnTimeGuaranteeService(delivery).run()
+    except Exception as e:
+        print(f"❌ On-Time Guarantee failed for delivery {delivery_id}: {e}")
+
+
+@shared_task(name="delivery.refresh_driver_daily_stats")
+def refresh_driver_daily_stats_task(keys):
+    """
+    Recompute DriverDailyStats buckets given as [driver_id, "YYYY-MM-DD"]
+    pairs after a delivery changed.
+    """
+    return refresh_driver_days({(driver_id, date.fromisoformat(day)) for driver_id, day in keys})
+
+
+@shared_task(name="delivery.publish_delivery_update")
+def publish_delivery_update_task(payload, driver_ids):
+    """
+    Pushes a delivery's tracking changes to its client and driver streams.
+    """
+    publish_delivery_update(payload, driver_ids)
+
+
+@shared_task(name="delivery.publish_driver_location")
+def publish_driver_location_task(driver_id, lat, lng, recorded_at=None):
+    publish_driver_location(driver_id, lat, lng, recorded_at)
+
+
+@shared_task(name="delivery.prune_driver_locations")
+def prune_driver_locations_task():
+    return prune_locations()
@@ -1,3 +1,495 @@
-from django.test import TestCase
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.accounts.models import Profile, Vehicle
+from apps.billing.api.base.serializers import DeliveryGETSerializer
+from apps.billing.api.v1.views import DashboardSalesApiView
+from apps.billing.models import Delivery, DriverDailyStats
+from apps.billing.services.daily_stats import STAT_FIELDS, backfill_daily_stats, refresh_driver_days
+from apps.billing.services.driver_locations import DriverLocationIngest, InMemoryLocationStore
+from apps.billing.services.geocoding import GeocodeCache
+from apps.billing.services.haversine_distance import calculate_haversine_distance
+from apps.billing.services.routing import (
+    RoutingService,
+    StubRoutingBackend,
+    get_routing_service,
+    reset_routing_services,
+)
+from apps.core.models import Address
+
+User = get_user_model()
+
+# Redis stands behind the default cache in production
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class DeliveryGETSerializerQueryCountTests(TestCase):
+    """
+    DeliveryGETSerializer(many=True) must not issue queries per delivery.
+    """
+
+    def seed(self, count, prefix):
+        now = timezone.now()
+        address = Address.objects.create(
+            street_address="Serializer check", city="Dhaka", state="Dhaka", postal_code="1207", country="BD"
+        )
+        # one driver per delivery, each with its own profile and vehicles
+        drivers = User.objects.bulk_create([
+            User(email=f"{prefix}-{i}@example.com", role=User.RoleType.DRIVER, password="!")
+            for i in range(count)
+        ])
+        Profile.objects.bulk_create([
+            Profile(user=driver, dp="dp.png", nid="0", nid_front="nid.png", nid_back="nid.png",
+                    driving_license_front="dl.png", driving_license_back="dl.png")
+            for driver in drivers
+        ])
+        Vehicle.objects.bulk_create([
+            Vehicle(user=driver, vehicle_type=vehicle_type)
+            for driver in drivers
+            for vehicle_type in (Vehicle.TYPE.BIKE, Vehicle.TYPE.CAR)
+        ])
+        deliveries = Delivery.objects.bulk_create([
+            Delivery(
+                client_id=f"{prefix}-{i}",
+                driver=driver,
+                pickup_address=address,
+                drop_off_address=address,
+                pickup_customer_name="Serializer check",
+                pickup_phone="0",
+                pickup_ready_at=now,
+                pickup_last_time=now,
+                drop_off_customer_name="Serializer check",
+                drop_off_phone="0",
+                drop_off_last_time=now,
+            )
+            for i, driver in enumerate(drivers)
+        ])
+        return Delivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries]).order_by("id")
+
+    def count_queries(self, data, expected_rows):
+        with CaptureQueriesContext(connection) as queries:
+            rows = DeliveryGETSerializer(data, many=True).data
+        self.assertEqual(len(rows), expected_rows)
+        self.assertIsNotNone(rows[-1]["driver"]["rider_profile"])
+        self.assertEqual(len(rows[-1]["driver"]["raider_vehicle"]), 2)
+        return len(queries)
+
+    def test_queryset_query_count_is_constant(self):
+        one, many = self.seed(1, "one"), self.seed(100, "many")
+        self.assertEqual(self.count_queries(one, 1), self.count_queries(many, 100))
+
+    def test_fetched_rows_query_count_is_constant(self):
+        # keyset pages and slices arrive as lists of instances
+        one, many = list(self.seed(1, "one")), list(self.seed(100, "many"))
+        self.assertEqual(self.count_queries(one, 1), self.count_queries(many, 100))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GeocodeCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.geocode = GeocodeCache(local_size=2, ttl=60, negative_ttl=10)
+        self.fetch = mock.Mock(return_value={"lat": 23.78, "lng": 90.41})
+
+    def test_miss_then_local_hit(self):
+        self.assertEqual(self.geocode.lookup("Road 1, Dhaka", "gmaps", self.fetch), {"lat": 23.78, "lng": 90.41})
+        self.assertEqual(self.geocode.lookup("road 1 dhaka", "gmaps", self.fetch), {"lat": 23.78, "lng": 90.41})
+
+        self.fetch.assert_called_once_with("Road 1, Dhaka")
+        self.assertEqual(self.geocode.stats()["misses"], 1)
+        self.assertEqual(self.geocode.stats()["local_hits"], 1)
+
+    def test_shared_hit_after_local_is_cleared(self):
+        self.geocode.lookup("Road 1, Dhaka", "gmaps", self.fetch)
+        self.geocode.clear_local()
+
+        self.assertEqual(self.geocode.lookup("Road 1, Dhaka", "gmaps", self.fetch), {"lat": 23.78, "lng": 90.41})
+        self.fetch.assert_called_once()
+        self.assertEqual(self.geocode.stats()["shared_hits"], 1)
+
+    def test_providers_are_cached_separately(self):
+        self.geocode.lookup("Road 1, Dhaka", "gmaps", self.fetch)
+        self.geocode.lookup("Road 1, Dhaka", "mapbox", self.fetch)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_unresolved_address_is_cached_as_negative(self):
+        self.fetch.return_value = None
+
+        self.assertIsNone(self.geocode.lookup("Nowhere", "gmaps", self.fetch))
+        self.assertIsNone(self.geocode.lookup("Nowhere", "gmaps", self.fetch))
+        self.geocode.clear_local()
+        self.assertIsNone(self.geocode.lookup("Nowhere", "gmaps", self.fetch))
+
+        self.fetch.assert_called_once()
+        self.assertEqual(self.geocode.stats()["negative_hits"], 2)
+
+    def test_negative_entry_expires_with_negative_ttl(self):
+        self.fetch.return_value = None
+        with mock.patch("apps.billing.services.geocoding.time.monotonic", return_value=1000):
+            self.geocode.lookup("Nowhere", "gmaps", self.fetch)
+        self.geocode._shared_set(self.geocode.make_key("gmaps", "Nowhere"), {"lat": 1, "lng": 2}, 60)
+
+        with mock.patch("apps.billing.services.geocoding.time.monotonic", return_value=1011):
+            self.assertEqual(self.geocode.lookup("Nowhere", "gmaps", self.fetch), {"lat": 1, "lng": 2})
+        self.fetch.assert_called_once()
+
+    def test_provider_errors_are_not_cached(self):
+        self.fetch.side_effect = [RuntimeError("quota"), {"lat": 1, "lng": 2}]
+
+        with self.assertRaises(RuntimeError):
+            self.geocode.lookup("Road 2", "gmaps", self.fetch)
+        self.assertEqual(self.geocode.lookup("Road 2", "gmaps", self.fetch), {"lat": 1, "lng": 2})
+
+    def test_local_tier_is_bounded(self):
+        for address in ("a", "b", "c"):
+            self.geocode.lookup(address, "gmaps", self.fetch)
+        self.assertEqual(self.geocode.stats()["local_size"], 2)
+
+
+class SmallStubRoutingBackend(StubRoutingBackend):
+    # a provider that takes at most a 2 x 2 matrix per call
+    max_origins = max_destinations = 2
+    max_elements = 4
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    ROUTING_BACKENDS={
+        "google": "apps.billing.services.routing.StubRoutingBackend",
+        "mapbox": "apps.billing.tests.SmallStubRoutingBackend",
+    },
+)
+class RoutingServiceTests(SimpleTestCase):
+    origins = [(23.7806, 90.4070), (23.7900, 90.4100), (23.8000, 90.4200)]
+    destinations = [(23.7500, 90.3900), (23.7600, 90.3800), (23.7700, 90.3700)]
+
+    def setUp(self):
+        cache.clear()
+        reset_routing_services()
+        self.addCleanup(reset_routing_services)
+
+    def test_backend_comes_from_settings(self):
+        google, mapbox = get_routing_service("google"), get_routing_service("mapbox")
+
+        self.assertIs(type(google.backend), StubRoutingBackend)
+        self.assertIs(type(mapbox.backend), SmallStubRoutingBackend)
+        self.assertIs(get_routing_service("google"), google)
+
+    def test_matrix_is_batched_within_provider_limits(self):
+        service = get_routing_service("mapbox")
+
+        matrix = service.distance_matrix(self.origins, self.destinations)
+
+        # 3 x 3 pairs in 2 x 2 chunks
+        self.assertEqual(service.backend.calls, 4)
+        for origin, row in zip(self.origins, matrix):
+            for destination, km in zip(self.destinations, row):
+                self.assertAlmostEqual(km, calculate_haversine_distance(*origin, *destination), places=3)
+
+    def test_repeat_routes_are_served_from_cache(self):
+        service = get_routing_service("google")
+        first = service.distance_matrix(self.origins, self.destinations)
+
+        # within the same grid cell as the first origin
+        again = service.distance(23.78062, 90.40698, *self.destinations[0])
+
+        self.assertEqual(service.distance_matrix(self.origins, self.destinations), first)
+        self.assertEqual(again, first[0][0])
+        self.assertEqual(service.backend.calls, 1)
+
+    def test_only_missing_pairs_are_fetched(self):
+        service = RoutingService(SmallStubRoutingBackend())
+        service.distance_matrix(self.origins[:2], self.destinations[:2])
+
+        service.distance_matrix(self.origins, self.destinations[:2])
+
+        # the third origin alone, both destinations, one call
+        self.assertEqual(service.backend.calls, 2)
+
+    def test_time_bucket_follows_routing_time_zone(self):
+        service = RoutingService(StubRoutingBackend(), bucket_hours=3, time_zone="Asia/Dhaka")
+
+        # 22:00 UTC is 04:00 in Dhaka
+        self.assertEqual(service.time_bucket(datetime(2026, 10, 18, 22, 0, tzinfo=dt_timezone.utc)), 1)
+        self.assertEqual(service.time_bucket(datetime(2026, 10, 18, 17, 59, tzinfo=dt_timezone.utc)), 7)
+
+    def test_time_buckets_are_cached_separately(self):
+        service = RoutingService(StubRoutingBackend())
+
+        with mock.patch.object(service, "time_bucket", return_value=2):
+            service.distance(*self.origins[0], *self.destinations[0])
+            service.distance(*self.origins[0], *self.destinations[0])
+        with mock.patch.object(service, "time_bucket", return_value=3):
+            service.distance(*self.origins[0], *self.destinations[0])
+
+        self.assertEqual(service.backend.calls, 2)
+
+
+class DriverLocationIngestTests(SimpleTestCase):
+    def setUp(self):
+        self.store = InMemoryLocationStore(stale_seconds=300)
+        self.flush = mock.Mock()
+        self.publish = mock.Mock()
+        self.ingest = DriverLocationIngest(
+            self.store, flush_distance_m=100, flush_seconds=60, flush=self.flush, publish=self.publish
+        )
+        self.now = time.time()
+
+    def ping(self, lat, lng, seconds_ago):
+        return self.ingest.ingest(7, [{"latitude": lat, "longitude": lng, "recorded_at": self.now - seconds_ago}])
+
+    def test_first_sample_is_flushed(self):
+        self.assertEqual(self.ping(23.7806, 90.4070, 100), (1, True))
+        self.flush.assert_called_once_with(7, 23.7806, 90.4070)
+        self.assertEqual(self.store.get(7)["lat"], 23.7806)
+
+    def test_small_moves_are_not_flushed_but_published(self):
+        self.ping(23.7806, 90.4070, 100)
+        # about 55 m north, 10 seconds later
+        self.assertEqual(self.ping(23.7811, 90.4070, 90), (1, False))
+
+        self.flush.assert_called_once()
+        self.assertEqual(self.publish.call_count, 2)
+        self.assertEqual(self.store.get(7)["lat"], 23.7811)
+        self.assertEqual(self.store.get(7)["flushed_lat"], 23.7806)
+
+    def test_distance_threshold_flushes(self):
+        self.ping(23.7806, 90.4070, 100)
+        # about 130 m north
+        self.assertEqual(self.ping(23.7818, 90.4070, 90), (1, True))
+        self.assertEqual(self.flush.call_count, 2)
+
+    def test_time_threshold_flushes(self):
+        self.ping(23.7806, 90.4070, 100)
+        self.assertEqual(self.ping(23.7806, 90.4070, 39), (1, True))
+        self.assertEqual(self.flush.call_count, 2)
+
+    def test_older_samples_are_ignored(self):
+        self.ping(23.7806, 90.4070, 10)
+        self.assertEqual(self.ping(23.9, 90.5, 20), (1, False))
+
+        self.assertEqual(self.store.get(7)["lat"], 23.7806)
+        self.publish.assert_called_once()
+
+    def test_newest_sample_of_a_batch_wins(self):
+        self.ingest.ingest(7, [
+            {"latitude": 23.1, "longitude": 90.1, "recorded_at": self.now - 5},
+            {"latitude": 23.3, "longitude": 90.3, "recorded_at": self.now - 1},
+            {"latitude": 23.2, "longitude": 90.2, "recorded_at": self.now - 3},
+        ])
+        self.assertEqual(self.store.get(7)["lat"], 23.3)
+
+    def test_last_sample_wins_without_timestamps(self):
+        self.ingest.ingest(7, [
+            {"latitude": 23.1, "longitude": 90.1},
+            {"latitude": 23.2, "longitude": 90.2},
+        ])
+        self.assertEqual(self.store.get(7)["lat"], 23.2)
+
+    def test_silent_drivers_are_not_found_and_pruned(self):
+        self.ping(23.7806, 90.4070, 10)
+        self.ingest.ingest(8, [{"latitude": 23.7807, "longitude": 90.4071, "recorded_at": self.now - 600}])
+
+        self.assertEqual([driver_id for driver_id, _ in self.store.nearest(23.7806, 90.4070, 1)], [7])
+        self.assertEqual(self.store.prune(), 1)
+        self.assertEqual(self.store.size(), 1)
+
+
+def seed_completed_deliveries(address, rows, prefix):
+    """
+    ``rows`` are ``(driver, days_ago, status, minutes_late, earning)``; each
+    delivery is completed at noon ``days_ago`` days before today.
+    """
+    today = timezone.localdate()
+    deliveries = []
+    for i, (driver, days_ago, status, minutes_late, earning) in enumerate(rows):
+        completed = timezone.make_aware(datetime.combine(today - timedelta(days=days_ago), dt_time(12)))
+        deliveries.append(Delivery(
+            client_id=f"{prefix}-{i}",
+            driver=driver,
+            pickup_address=address,
+            drop_off_address=address,
+            pickup_customer_name="Rollup check",
+            pickup_phone="0",
+            pickup_ready_at=completed - timedelta(minutes=40),
+            pickup_last_time=completed,
+            drop_off_customer_name="Rollup check",
+            drop_off_phone="0",
+            drop_off_last_time=completed - timedelta(minutes=minutes_late),
+            est_delivery_completed_time=completed - timedelta(minutes=minutes_late),
+            actual_delivery_completed_time=completed,
+            driver_earning=earning,
+            status=status,
+        ))
+    deliveries = Delivery.objects.bulk_create(deliveries)
+    # auto_now_add stamps "now"; created on the day they were completed instead
+    for delivery in deliveries:
+        Delivery.objects.filter(pk=delivery.pk).update(created_date=delivery.pickup_ready_at)
+    return deliveries
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DashboardSalesApiViewTests(TestCase):
+    SUCCESS = Delivery.STATUS_TYPE.DELIVERY_SUCCESS
+    CANCELED = Delivery.STATUS_TYPE.CANCELED
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.address = Address.objects.create(
+            street_address="Dashboard check", city="Dhaka", state="Dhaka", postal_code="1207", country="BD"
+        )
+
+    def drivers(self, count, prefix):
+        return User.objects.bulk_create([
+            User(email=f"{prefix}-{i}@example.com", first_name="Driver", last_name=f"{prefix}{i}",
+                 role=User.RoleType.DRIVER, password="!")
+            for i in range(count)
+        ])
+
+    def get(self, **params):
+        cache.clear()  # every request computes its day summaries
+        return DashboardSalesApiView.as_view()(APIRequestFactory().get("/dashboard-sales/", params))
+
+    def test_figures_match_the_deliveries(self):
+        alice, bob = self.drivers(2, "figures")
+        seed_completed_deliveries(self.address, [
+            (alice, 0, self.SUCCESS, 0, 50),
+            (alice, 1, self.SUCCESS, 5, 40),
+            (alice, 1, self.CANCELED, 0, 0),
+            (alice, 9, self.SUCCESS, 0, 30),  # previous week
+            (bob, 2, self.SUCCESS, -5, 60),
+            (bob, 30, self.SUCCESS, 0, 70),  # outside every window
+        ], "figures")
+        backfill_daily_stats(self.today - timedelta(days=40), self.today)
+
+        response = self.get(start_date=str(self.today - timedelta(days=6)), end_date=str(self.today))
+
+        self.assertEqual(response.status_code, 200)
+        summary = {row["email"]: row for row in response.data["driver_summary"]}
+        self.assertEqual(summary[alice.email]["orders_delivered"], 2)
+        self.assertEqual(summary[alice.email]["weekly_growth_pct"], 100.0)  # 2 vs 1
+        self.assertEqual(summary[bob.email]["orders_delivered"], 1)
+        self.assertEqual(response.data["driver_delivery_count"], 3)
+
+        per_day = {row["day"][:10]: row["deliveries"] for row in response.data["daily_driver_deliveries"]}
+        self.assertEqual(len(per_day), 7)
+        self.assertEqual(per_day[str(self.today - timedelta(days=1))]["Driver figures0"], 1)
+        self.assertEqual(per_day[str(self.today - timedelta(days=2))]["Driver figures1"], 1)
+
+        details = {row["email"]: row for row in response.data["driver_details"]}
+        # lifetime earnings of delivered orders
+        self.assertEqual(details[alice.email]["total_earnings"], 120)
+        self.assertEqual(details[bob.email]["total_earnings"], 130)
+        # alice: 3 completed in the window, 2 by drop_off_last_time
+        self.assertEqual(details[alice.email]["on_time_delivery_rate"], 66.67)
+
+    def test_query_count_does_not_grow_with_drivers(self):
+        def queries_for(count, prefix):
+            drivers = self.drivers(count, prefix)
+            seed_completed_deliveries(
+                self.address, [(driver, days_ago, self.SUCCESS, 0, 40) for driver in drivers for days_ago in (0, 3)],
+                prefix,
+            )
+            backfill_daily_stats(self.today - timedelta(days=14), self.today)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.get().status_code, 200)
+            return len(queries)
+
+        self.assertEqual(queries_for(1, "few"), queries_for(30, "many"))
+
+    def test_invalid_ranges_are_rejected(self):
+        reversed_range = self.get(start_date=str(self.today), end_date=str(self.today - timedelta(days=1)))
+        too_long = self.get(start_date=str(self.today - timedelta(days=366)), end_date=str(self.today))
+
+        self.assertEqual(reversed_range.status_code, 400)
+        self.assertEqual(too_long.status_code, 400)
+
+
+class DriverDailyStatsTests(TestCase):
+    """
+    The DriverDailyStats rollup must hold the same figures as aggregating
+    the deliveries themselves.
+    """
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        address = Address.objects.create(
+            street_address="Rollup check", city="Dhaka", state="Dhaka", postal_code="1207", country="BD"
+        )
+        self.alice, self.bob = User.objects.bulk_create([
+            User(email=f"rollup-{name}@example.com", role=User.RoleType.DRIVER, password="!")
+            for name in ("alice", "bob")
+        ])
+        success, canceled = Delivery.STATUS_TYPE.DELIVERY_SUCCESS, Delivery.STATUS_TYPE.CANCELED
+        self.deliveries = seed_completed_deliveries(address, [
+            (self.alice, 0, success, 0, 50),
+            (self.alice, 0, success, 12, 45.5),
+            (self.alice, 0, canceled, 0, 0),
+            (self.alice, 3, success, -3, 40),
+            (self.bob, 0, success, 20, 60),
+            (self.bob, 3, canceled, 0, 0),
+            (self.bob, 3, success, 0, 35),
+        ], "rollup")
+
+    def raw_stats(self):
+        """
+        The figures computed one delivery at a time, keyed like the rollup.
+        """
+        stats = {}
+        for delivery in Delivery.objects.filter(driver__in=[self.alice, self.bob]):
+            completed_day = timezone.localdate(delivery.actual_delivery_completed_time)
+            delivered = delivery.status == Delivery.STATUS_TYPE.DELIVERY_SUCCESS
+            row = stats.setdefault((delivery.driver_id, completed_day), dict.fromkeys(STAT_FIELDS, 0))
+            row["completed"] += 1
+            row["delivered"] += delivered
+            row["canceled"] += delivery.status == Delivery.STATUS_TYPE.CANCELED
+            row["on_time"] += delivery.actual_delivery_completed_time <= delivery.drop_off_last_time
+            row["on_time_estimate"] += (
+                delivered and delivery.actual_delivery_completed_time <= delivery.est_delivery_completed_time
+            )
+            row["earnings"] += delivery.driver_earning if delivered else 0
+
+            row = stats.setdefault((delivery.driver_id, timezone.localdate(delivery.created_date)), dict.fromkeys(STAT_FIELDS, 0))
+            row["created"] += 1
+            row["created_delivered"] += delivered
+        return stats
+
+    def rollup_stats(self):
+        return {
+            (row.pop("driver_id"), row.pop("day")): row
+            for row in DriverDailyStats.objects.values("driver_id", "day", *STAT_FIELDS)
+            if any(row[field] for field in STAT_FIELDS)
+        }
+
+    def test_backfill_matches_raw_aggregate(self):
+        backfill_daily_stats(self.today - timedelta(days=7), self.today)
+
+        self.assertEqual(self.rollup_stats(), self.raw_stats())
+
+    def test_refresh_follows_changes(self):
+        backfill_daily_stats(self.today - timedelta(days=7), self.today)
+        moved = self.deliveries[3]
+        # cancel one of alice's deliveries and hand another one to bob
+        Delivery.objects.filter(pk=self.deliveries[0].pk).update(status=Delivery.STATUS_TYPE.CANCELED)
+        Delivery.objects.filter(pk=moved.pk).update(driver=self.bob)
+
+        three_days_ago = self.today - timedelta(days=3)
+        refresh_driver_days({
+            (self.alice.id, self.today),
+            (self.alice.id, three_days_ago),
+            (self.bob.id, three_days_ago),
+        })
+
+        self.assertEqual(self.rollup_stats(), self.raw_stats())
+        emptied = DriverDailyStats.objects.get(driver=self.alice, day=three_days_ago)
+        self.assertEqual(emptied.completed, 0)
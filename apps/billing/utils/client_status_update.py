@@ -1,50 +1,48 @@
-import requests
 from decouple import config
+from django.conf import settings
 
 from apps.billing.models import Delivery
-from django.forms.models import model_to_dict
 from datetime import datetime
 from apps.billing.api.base.serializers import DeliveryGETSerializer
+from apps.billing.services.webhook_outbox import enqueue_webhook
 
 def serialize_datetime(value):
     if isinstance(value, datetime):
         return value.isoformat()
     return value
 
-def client_status_updater(instance: Delivery):
-    print("client_status_updater----------->")
-    url = config("CHATCHEFS_URL")
-    print(url, 'url------------>')
-    
-  
-    # print(instance.driver.rider_profile, 'instance.driver')
-    if instance.driver:
-        print(instance.driver.rider_profile, 'instance.driver')
-    else:
-        print("No driver assigned yet.")
-
+def build_status_payload(instance: Delivery):
     serializer = DeliveryGETSerializer(instance)
-    
-    print(serializer.data, 'serializer.data')
 
-        
-    data = {
+    return {
         "event": "status",
         "client_id": instance.client_id,
         "uid": f"{instance.uid}",
         "status": instance.status,
+        "cancel_reason": instance.cancel_reason,
         "actual_delivery_completed_time": serialize_datetime(instance.actual_delivery_completed_time),
         "rider_accepted_time": serialize_datetime(instance.rider_accepted_time),
         "rider_pickup_time":serialize_datetime(instance.rider_pickup_time),
         "driver_info": [serializer.data['driver']],
     }
-    res = requests.post(
-        url,
-        headers={
-            "Content-Type": "application/json",
-        },
-        json=data,
-        allow_redirects=False,
-    )
-    print(res, 'res----------->')
-    return
+
+def client_status_updater(instance: Delivery):
+    """
+    Queue the status webhook for the client platform. It is written to the
+    outbox in the caller's transaction and sent by a worker after commit.
+    """
+    print("client_status_updater----------->")
+    return enqueue_webhook(config("CHATCHEFS_URL"), build_status_payload(instance), delivery=instance)
+
+
+def raider_cancel_notifier(instance: Delivery):
+    """
+    Queue the cancellation notice for Hungrytiger's raider webhook, in the
+    caller's transaction like the status webhook.
+    """
+    return enqueue_webhook(settings.HUNGRYTIGER_RAIDER_WEBHOOK_URL, {
+        "event": "status",
+        "client_id": instance.client_id,
+        "status": instance.status,
+        "cancel_reason": instance.cancel_reason,
+    }, delivery=instance)
@@ -1,46 +1,101 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
 from apps.billing.models import DeliveryEarningConfig
 
-# Safe config loader with defaults
-def get_config():
+CONFIG_VERSION_KEY = "billing:earning-config:version"
+
+DEFAULT_CONFIG = {
+    "estimated_time_per_km": 3.5,
+    "base_distance_km": 10,
+    "base_earning": 25,
+    "extra_per_km": 3,
+    "grace_period_minutes": 5,
+    "penalty_6_10": 50, # Default 50% penalty for delays between 6-10 minutes
+    "penalty_11_15": 50, # Default 50% penalty for delays between 11-15 minutes
+    "penalty_above_15": 70, # Default 70% penalty for delays above 15 minutes
+}
+
+# Process-local copy of the config. It is dropped by invalidate_config() in this
+# process and re-validated against the shared version stamp at most every
+# EARNING_CONFIG_CHECK_SECONDS, so other workers see changes within that delay.
+_cached = {"config": None, "version": None, "checked_at": 0.0}
+_lock = threading.Lock()
+
+
+def _shared_version():
+    try:
+        return cache.get(CONFIG_VERSION_KEY)
+    except Exception:
+        return None
+
+
+def _load_config():
     config = DeliveryEarningConfig.objects.first()
 
     if config:
-        return {
-            "base_distance_km": config.base_distance_km,
-            "base_earning": config.base_earning,
-            "extra_per_km": config.extra_per_km,
-            "grace_period_minutes": config.grace_period_minutes,
-            "penalty_6_10": config.penalty_6_10,
-            "penalty_11_15": config.penalty_11_15,
-            "penalty_above_15": config.penalty_above_15,
-        }
-    
+        return {key: getattr(config, key) for key in DEFAULT_CONFIG}
+
     # Default values if config not found
-    return {
-        "base_distance_km": 10,
-        "base_earning": 25,
-        "extra_per_km": 3,
-        "grace_period_minutes": 5,
-        "penalty_6_10": 50, # Default 50% penalty for delays between 6-10 minutes
-        "penalty_11_15": 50, # Default 50% penalty for delays between 11-15 minutes
-        "penalty_above_15": 70, # Default 70% penalty for delays above 15 minutes
-    }
+    return dict(DEFAULT_CONFIG)
+
+
+# Safe config loader with defaults
+def get_config(refresh=False):
+    if refresh:
+        return _load_config()
+
+    now = time.monotonic()
+    check_seconds = getattr(settings, "EARNING_CONFIG_CHECK_SECONDS", 5)
+
+    with _lock:
+        if _cached["config"] is not None and now - _cached["checked_at"] < check_seconds:
+            return _cached["config"]
+
+    version = _shared_version()
+    with _lock:
+        if _cached["config"] is not None and _cached["version"] == version:
+            _cached["checked_at"] = now
+            return _cached["config"]
+
+    config = _load_config()
+    with _lock:
+        _cached.update(config=config, version=version, checked_at=now)
+    return config
+
+
+def invalidate_config():
+    """
+    Drop the cached config here and bump the shared version stamp so every
+    other worker reloads it on its next check.
+    """
+    with _lock:
+        _cached.update(config=None, version=None, checked_at=0.0)
+    try:
+        cache.set(CONFIG_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception:
+        pass
+
 
 # Calculate earning based on distance
-def calculate_driver_earning(distance_km):
-    config = get_config()
+def calculate_driver_earning(distance_km, config=None):
+    config = config or get_config()
 
     distance_km = round(distance_km, 2)
 
     if distance_km <= config["base_distance_km"]:
         return config["base_earning"]
-    
+
     extra_distance = distance_km - config["base_distance_km"]
     return config["base_earning"] + extra_distance * config["extra_per_km"]
 
 # Calculate penalty
-def calculate_penalty(delay_minutes):
-    config = get_config()
+def calculate_penalty(delay_minutes, config=None):
+    config = config or get_config()
 
     if delay_minutes <= config["grace_period_minutes"]:
         return 0
@@ -51,20 +106,32 @@ def calculate_penalty(delay_minutes):
     else:
         return config["penalty_above_15"]
 
-# Final earning calculation after delivery
-def calculate_total_driver_earning(delivery):
-    print("calculate total driver earning")
-    earning = calculate_driver_earning(delivery.distance)
+def compute_final_earning(distance_km, est_completed_time, actual_completed_time, config):
+    """
+    Pure earning + penalty computation shared by the per-delivery path and
+    the bulk recomputation in apps.billing.utils.earning_recompute.
+    """
+    earning = calculate_driver_earning(distance_km, config)
 
     delay_minutes = 0
-    if delivery.est_delivery_completed_time and delivery.actual_delivery_completed_time:
-        delay_seconds = (delivery.actual_delivery_completed_time - delivery.est_delivery_completed_time).total_seconds()
+    if est_completed_time and actual_completed_time:
+        delay_seconds = (actual_completed_time - est_completed_time).total_seconds()
         delay_minutes = delay_seconds / 60
 
-    penalty_percentage = calculate_penalty(delay_minutes)
+    penalty_percentage = calculate_penalty(delay_minutes, config)
     final_earning = earning * (1 - (penalty_percentage / 100))
 
     return {
     "final_earning": max(round(final_earning, 2), 0),
     "penalty_percentage": penalty_percentage
 }
+
+# Final earning calculation after delivery
+def calculate_total_driver_earning(delivery, config=None):
+    print("calculate total driver earning")
+    return compute_final_earning(
+        delivery.distance,
+        delivery.est_delivery_completed_time,
+        delivery.actual_delivery_completed_time,
+        config or get_config(),
+    )
@@ -1,20 +1,51 @@
 from rest_framework.views import APIView
 from apps.chat.models import ChatMessage
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.utils.dateparse import parse_datetime
+
+from apps.core.pagination import keyset_page, parse_limit, set_next_link
 
 
 class BaseGetChatHistoryView(APIView):
+    """
+    Chat history of an order in pages of ``limit`` (default 100, max 500),
+    each page oldest first. Without ``since`` the first page holds the
+    latest messages and ``X-Next-Cursor`` / ``Link`` (``?cursor=``) lead to
+    older ones; ``?since=<ISO timestamp>`` returns only newer messages,
+    paging forward.
+    """
+
     def get(self, request, order_id):
-        messages = ChatMessage.objects.filter(order_id=order_id).order_by("timestamp")
+        messages = ChatMessage.objects.filter(order_id=order_id, timestamp__isnull=False)
+
+        since = request.query_params.get("since")
+        if since:
+            since_dt = parse_datetime(since)
+            if since_dt is None:
+                raise ValidationError({"since": "Expected an ISO 8601 timestamp."})
+            messages = messages.filter(timestamp__gt=since_dt)
+
+        cursor = request.query_params.get("cursor")
+        rows, next_cursor = keyset_page(
+            messages.values("id", "sender_id", "sender_name", "message", "timestamp"),
+            ["timestamp", "id"],
+            cursor=cursor,
+            limit=parse_limit(request.query_params.get("limit"), default=100, maximum=500),
+            descending=not since,
+        )
+        if not since:
+            rows.reverse()
 
-        if not messages.exists():
+        if not rows and not (cursor or since):
             return Response({"message": "No chat history found."}, status=204)
 
-        return Response([
+        response = Response([
             {
-                "sender": msg.sender_id,
-                "sender_name": msg.sender_name,
-                "message": msg.message,
-                "timestamp": msg.timestamp,
-            } for msg in messages
+                "sender": row["sender_id"],
+                "sender_name": row["sender_name"],
+                "message": row["message"],
+                "timestamp": row["timestamp"],
+            } for row in rows
         ])
+        return set_next_link(request, response, next_cursor)
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+import httpx
+from channels.db import database_sync_to_async
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TokenCache:
+    """
+    Per-process LRU of token -> chat user, with a separate (shorter) expiry
+    for rejected tokens. Tokens are stored hashed.
+    """
+
+    def __init__(self, max_size=10_000):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (expires_at, user or None)
+
+    @staticmethod
+    def make_key(backend, token):
+        return hashlib.sha256(f"{backend}:{token}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return user
+
+    def set(self, key, user, ttl):
+        self._entries[key] = (time.monotonic() + ttl, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_cache = TokenCache(getattr(settings, "CHAT_AUTH_CACHE_SIZE", 10_000))
+_in_flight = {}  # key -> Future, so a reconnect storm makes one lookup per token
+_client = {"loop": None, "client": None}
+
+
+def get_http_client():
+    """
+    Shared, pooled AsyncClient for the verify-chat-user calls, bound to the
+    running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    if _client["client"] is None or _client["loop"] is not loop:
+        _client["loop"] = loop
+        _client["client"] = httpx.AsyncClient(
+            timeout=getattr(settings, "CHAT_AUTH_TIMEOUT", 10),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client["client"]
+
+
+def chat_user_payload(user):
+    # same shape as BaseDriverVerifyChatView
+    return {
+        "id": user.id,
+        "username": user.first_name + " " + user.last_name,
+        "email": user.email,
+        "role": 'driver',
+    }
+
+
+@database_sync_to_async
+def verify_local_token(token):
+    key = Token.objects.select_related("user").filter(key=token).first()
+    if key is None or not key.user.is_active:
+        return None
+    return chat_user_payload(key.user)
+
+
+async def verify_remote_token(auth_url, token):
+    """
+    Returns ``(user, definitive)``; transport errors are not definitive and
+    must not be cached as a rejection.
+    """
+    try:
+        response = await get_http_client().get(auth_url, headers={"Authorization": f"Token {token}"})
+    except httpx.RequestError as e:
+        print(f"❌ Error connecting to authentication API: {str(e)}")
+        return None, False
+
+    if response.status_code == 200:
+        return response.json(), True
+
+    print(f"❌ Authentication failed: {response.status_code}")
+    return None, response.status_code in (401, 403, 404)
+
+
+async def authenticate_chat_token(token, is_driver):
+    """
+    Chat user dict for ``token`` or None. Drivers authenticate against this
+    service, consumers against the ChatChef backend.
+    """
+    backend = "driver" if is_driver else "chatchef"
+    key = TokenCache.make_key(backend, token)
+
+    user = token_cache.get(key)
+    if user is not _MISSING:
+        return user
+
+    pending = _in_flight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        if is_driver and getattr(settings, "CHAT_AUTH_LOCAL_DRIVER_TOKENS", True):
+            user, definitive = await verify_local_token(token), True
+        else:
+            if is_driver:
+                auth_url = f"{settings.DELIVERY_BACKEND_URL}auth/api/v1/user/verify-chat-user/"
+            else:
+                auth_url = f"{settings.CHATCHEF_BACKEND_URL}accounts/v1/user/verify-chat-user/"
+            print(f"🔍 Authenticating user via: {auth_url}")
+            user, definitive = await verify_remote_token(auth_url, token)
+
+        if user:
+            token_cache.set(key, user, getattr(settings, "CHAT_AUTH_CACHE_TTL", 300))
+        elif definitive:
+            token_cache.set(key, None, getattr(settings, "CHAT_AUTH_NEGATIVE_TTL", 30))
+        future.set_result(user)
+        return user
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        _in_flight.pop(key, None)
@@ -2,8 +2,9 @@ import json
 import requests
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.conf import settings
-import httpx
+from apps.chat.auth import authenticate_chat_token
 from apps.chat.models import ChatMessage
+from apps.chat.persistence import chat_message_buffer
 from asgiref.sync import sync_to_async
 import urllib.parse
 
@@ -79,7 +80,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
     async def save_message(self, order_id, sender_id, sender_name, message):
-        """ Save message asynchronously using sync_to_async """
+        """ Queue the message for batched persistence (or save it right away when write-behind is off) """
+        if getattr(settings, "CHAT_WRITE_BEHIND", True):
+            await chat_message_buffer.add(order_id, sender_id, sender_name, message)
+            return
+
         await sync_to_async(ChatMessage.objects.create)(
             order_id=order_id,
             sender_id=sender_id,
@@ -88,37 +93,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
         print(f"💾 Message saved: {message} from {sender_name}")
 
+    async def disconnect(self, close_code):
+        if hasattr(self, "chat_group"):
+            await self.channel_layer.group_discard(self.chat_group, self.channel_name)
+        if getattr(settings, "CHAT_WRITE_BEHIND", True):
+            await chat_message_buffer.flush()
+
     async def chat_message(self, event):
         print(f"📢 Broadcasting message: {event}")  # Debugging line
         await self.send(text_data=json.dumps(event))
 
     async def authenticate_user(self, token):
-        """ Authenticate users from their respective backends asynchronously """
-
-        if "driver" in self.scope["path"]:  # If it's a driver, use the Delivery backend
-            auth_url = f"{settings.DELIVERY_BACKEND_URL}auth/api/v1/user/verify-chat-user/"
-        else:  # If it's a consumer, use the Chatchef backend
-            auth_url = f"{settings.CHATCHEF_BACKEND_URL}accounts/v1/user/verify-chat-user/"
-
-        print(f"🔍 Authenticating user via: {auth_url}")  # Debugging line
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    auth_url,
-                    headers={"Authorization": f"Token {token}"},
-                    timeout=10  # Avoid hanging forever
-                )
-
-                print(f"🔍 Auth API Response Code: {response.status_code}")  # Debugging
-                print(f"🔍 Auth API Response Text: {response.text}")  # Debugging
-
-                if response.status_code == 200:
-                    print(f"✅ Authentication successful for token: {token}")
-                    return response.json()  # Return user data
-                else:
-                    print(f"❌ Authentication failed: {response.status_code} {response.text}")
-            except httpx.RequestError as e:
-                print(f"❌ Error connecting to authentication API: {str(e)}")
-
-        return None
\ No newline at end of file
+        """ Authenticate users from their respective backends, cached per token """
+        return await authenticate_chat_token(token, is_driver="driver" in self.scope["path"])
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import time
+
+from channels.layers import channel_layers
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import path
+
+from apps.chat.consumers import ChatConsumer
+from apps.chat.models import ChatMessage
+from apps.chat.persistence import chat_message_buffer
+
+ORDER_PREFIX = "loadtest-"
+
+
+class LoadTestChatConsumer(ChatConsumer):
+    async def authenticate_user(self, token):
+        return {"id": int(token), "username": f"Load Test {token}"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure chat throughput (messages/sec) over the in-memory channel layer with "
+        "per-message saves and with the write-behind buffer. Writes real ChatMessage "
+        "rows and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=20)
+        parser.add_argument("--messages", type=int, default=200, help="Messages per connection")
+        parser.add_argument("--mode", choices=["direct", "buffered", "both"], default="both")
+
+    def handle(self, *args, **options):
+        modes = ["direct", "buffered"] if options["mode"] == "both" else [options["mode"]]
+        layers = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+        try:
+            for mode in modes:
+                with override_settings(CHANNEL_LAYERS=layers, CHAT_WRITE_BEHIND=mode == "buffered"):
+                    channel_layers.backends = {}
+                    total, seconds = asyncio.run(self.run(options["connections"], options["messages"]))
+                self.stdout.write(
+                    f"{mode:>8}: {total} messages in {seconds:.2f}s -> {total / seconds:,.0f} msg/s"
+                )
+        finally:
+            channel_layers.backends = {}
+            ChatMessage.objects.filter(order_id__startswith=ORDER_PREFIX).delete()
+
+    async def run(self, connections, messages):
+        application = URLRouter([
+            path("ws/driver/chat/<str:order_id>/", LoadTestChatConsumer.as_asgi()),
+        ])
+        communicators = [
+            WebsocketCommunicator(application, f"/ws/driver/chat/{ORDER_PREFIX}{i}/?token={i + 1}")
+            for i in range(connections)
+        ]
+        for communicator in communicators:
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise RuntimeError("Load test socket was rejected")
+
+        async def talk(communicator):
+            for n in range(messages):
+                await communicator.send_to(text_data=json.dumps({"message": f"message {n}"}))
+                await communicator.receive_from(timeout=10)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(talk(c) for c in communicators))
+        await chat_message_buffer.flush()  # include the final write in the measurement
+        seconds = time.perf_counter() - started
+
+        for communicator in communicators:
+            await communicator.disconnect()
+        return connections * messages, seconds
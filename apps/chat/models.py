@@ -10,3 +10,8 @@ class ChatMessage(models.Model):
 
     def __str__(self):
         return f"Order {self.order_id} - {self.sender_id}: {self.message}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["order_id", "timestamp", "id"], name="chat_msg_order_ts_id_idx"),
+        ]
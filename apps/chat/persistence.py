@@ -0,0 +1,259 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import uuid
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.chat.models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMessageBuffer:
+    """
+    Write-behind persistence for chat messages.
+
+    ``add`` journals the message to a small per-process file and returns
+    straight away; messages are written with ``bulk_create`` once
+    ``batch_size`` are waiting or every ``flush_interval`` seconds, and on
+    demand (e.g. when a socket disconnects).
+
+    Every flush rotates the journal into a segment that is deleted only after
+    its rows are committed. A failed write leaves the segment on disk and it
+    is replayed on a later flush, as are segments left behind by a process
+    that died before flushing; a worker claims such a file by renaming it to
+    one of its own segments before reading it, so only one worker replays
+    it. Delivery is therefore at-least-once: a crash between commit and
+    delete can store a message twice.
+
+    Files are named after the writing process (pid plus a random token), so
+    a restarted worker that is handed the same pid still replays the files
+    of its predecessor. Durability is best-effort: journal lines reach the
+    OS on every ``add`` and disk on rotation, so a process crash loses
+    nothing but a host crash can lose the unrotated tail.
+    """
+
+    def __init__(self, spill_dir, batch_size=100, flush_interval=0.5):
+        self.spill_dir = spill_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._pending = []
+        self._journal = None
+        self._owner_pid = None
+        self._owner_token = None
+        self._segment_seq = 0
+        self._lock = None
+        self._flusher = None
+        self._loop = None
+        self.stats = {"buffered": 0, "written": 0, "replayed": 0, "failed_flushes": 0}
+
+    # journal files ---------------------------------------------------------
+
+    def _owner(self):
+        # regenerated after a fork so parent and child never share files
+        if self._owner_pid != os.getpid():
+            self._owner_pid = os.getpid()
+            self._owner_token = uuid.uuid4().hex[:12]
+        return f"{self._owner_pid}_{self._owner_token}"
+
+    def _journal_path(self):
+        return os.path.join(self.spill_dir, f"chat-{self._owner()}.journal")
+
+    def _open_journal(self):
+        if self._journal is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._journal = open(self._journal_path(), "a", encoding="utf-8")
+        return self._journal
+
+    def _rotate_journal(self):
+        if self._journal is None:
+            return None
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal.close()
+        self._journal = None
+        segment = self._next_segment_path()
+        os.replace(self._journal_path(), segment)
+        return segment
+
+    def _next_segment_path(self):
+        segment = None
+        while segment is None or os.path.exists(segment):
+            self._segment_seq += 1
+            segment = os.path.join(self.spill_dir, f"chat-{self._owner()}-{self._segment_seq}.segment")
+        return segment
+
+    def _claim(self, path):
+        """
+        Moves another process's leftover file to a segment of our own. Returns
+        the new path, or None when another worker claimed it first.
+        """
+        if _file_owner(path) == self._owner():
+            return path
+        claimed = self._next_segment_path()
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _orphaned_files(self):
+        """
+        Segments that failed earlier or belong to processes that are gone,
+        plus journals of dead processes.
+        """
+        files = []
+        for path in glob.glob(os.path.join(self.spill_dir, "chat-*")):
+            if path == self._journal_path():
+                continue
+            owner = _file_owner(path)
+            if owner == self._owner():
+                files.append(path)  # our own segments that failed earlier
+                continue
+            pid = _owner_pid(owner)
+            # the same pid with another token is a previous incarnation of this worker
+            if pid != os.getpid() and _process_alive(pid):
+                continue
+            files.append(path)
+        return files
+
+    # buffering -------------------------------------------------------------
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._flusher = None
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush_periodically())
+
+    async def add(self, order_id, sender_id, sender_name, message):
+        self._bind_loop()
+        record = {
+            "order_id": order_id,
+            "sender_id": sender_id,
+            "sender_name": sender_name,
+            "message": message,
+            "timestamp": timezone.now().isoformat(),
+        }
+        journal = self._open_journal()
+        journal.write(json.dumps(record) + "\n")
+        journal.flush()
+
+        self._pending.append(record)
+        self.stats["buffered"] += 1
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Chat message flush failed: %s", e)
+
+    async def flush(self):
+        """
+        Persists everything buffered so far, then retries leftover segments.
+        """
+        self._bind_loop()
+        async with self._lock:
+            if self._pending:
+                batch, self._pending = self._pending, []
+                segment = self._rotate_journal()
+                if not await self._write_file_or_batch(segment, batch):
+                    self.stats["failed_flushes"] += 1
+                    return
+                self.stats["written"] += len(batch)
+
+            for path in self._orphaned_files():
+                path = self._claim(path)
+                if path is None:
+                    continue
+                try:
+                    batch = _read_records(path)
+                except FileNotFoundError:
+                    continue  # already replayed
+                if not await self._write_file_or_batch(path, batch):
+                    break  # database still unavailable; try again next round
+                self.stats["replayed"] += len(batch)
+
+    async def _write_file_or_batch(self, path, batch):
+        try:
+            if batch:
+                await _bulk_create(batch, self.batch_size)
+        except Exception as e:
+            logger.warning("Chat messages kept in %s for retry: %s", path, e)
+            return False
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return True
+
+
+@database_sync_to_async
+def _bulk_create(records, batch_size):
+    ChatMessage.objects.bulk_create(
+        [
+            ChatMessage(
+                order_id=record["order_id"],
+                sender_id=record["sender_id"],
+                sender_name=record["sender_name"],
+                message=record["message"],
+                timestamp=parse_datetime(record["timestamp"]),
+            )
+            for record in records
+        ],
+        batch_size=batch_size,
+    )
+
+
+def _read_records(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.error("Skipping corrupt chat journal line in %s", path)
+    return records
+
+
+def _file_owner(path):
+    # chat-<pid>_<token>.journal / chat-<pid>_<token>-<seq>.segment
+    return os.path.basename(path)[len("chat-"):].split(".")[0].split("-")[0]
+
+
+def _owner_pid(owner):
+    return int(owner.split("_")[0])
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+chat_message_buffer = ChatMessageBuffer(
+    spill_dir=getattr(settings, "CHAT_SPILL_DIR", os.path.join(settings.BASE_DIR, "logs", "chat_spill")),
+    batch_size=getattr(settings, "CHAT_PERSIST_BATCH_SIZE", 100),
+    flush_interval=getattr(settings, "CHAT_PERSIST_FLUSH_INTERVAL", 0.5),
+)
@@ -1,3 +1,91 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import TransactionTestCase
+
+from apps.chat import persistence
+from apps.chat.models import ChatMessage
+from apps.chat.persistence import ChatMessageBuffer
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class ChatMessageBufferReplayTests(TransactionTestCase):
+    """
+    Messages journaled by a worker that died before flushing are written by
+    the next flush of any other worker. Flushes run database_sync_to_async,
+    which closes the connection, hence TransactionTestCase.
+    """
+
+    def setUp(self):
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir, ignore_errors=True)
+        self.buffer = ChatMessageBuffer(self.spill_dir, batch_size=100, flush_interval=60)
+
+    def write_journal(self, name, messages):
+        path = os.path.join(self.spill_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for i, message in enumerate(messages):
+                f.write(json.dumps({
+                    "order_id": "order-1",
+                    "sender_id": i,
+                    "sender_name": "Driver",
+                    "message": message,
+                    "timestamp": "2026-10-18T09:00:00+00:00",
+                }) + "\n")
+        return path
+
+    def flush(self):
+        async_to_sync(self.buffer.flush)()
+
+    def test_journal_of_dead_process_is_replayed(self):
+        journal = self.write_journal(f"chat-{dead_pid()}_0123456789ab.journal", ["hello", "on my way"])
+
+        self.flush()
+
+        self.assertEqual(
+            list(ChatMessage.objects.order_by("sender_id").values_list("message", flat=True)),
+            ["hello", "on my way"],
+        )
+        self.assertFalse(os.path.exists(journal))
+        self.assertEqual(os.listdir(self.spill_dir), [])
+        self.assertEqual(self.buffer.stats["replayed"], 2)
+
+    def test_corrupt_line_is_skipped(self):
+        journal = self.write_journal(f"chat-{dead_pid()}_0123456789ab.journal", ["hello"])
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write('{"order_id": "order-1", "mess')  # torn write at the crash
+
+        self.flush()
+
+        self.assertEqual(list(ChatMessage.objects.values_list("message", flat=True)), ["hello"])
+
+    def test_files_of_live_processes_are_left_alone(self):
+        journal = self.write_journal(f"chat-{os.getppid()}_0123456789ab.journal", ["still buffering"])
+
+        self.flush()
+
+        self.assertFalse(ChatMessage.objects.exists())
+        self.assertTrue(os.path.exists(journal))
+
+    def test_failed_write_is_retried_on_next_flush(self):
+        self.write_journal(f"chat-{dead_pid()}_0123456789ab.journal", ["hello"])
+
+        with mock.patch.object(persistence, "_bulk_create", side_effect=RuntimeError("database down")):
+            self.flush()
+        self.assertFalse(ChatMessage.objects.exists())
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1)
+
+        self.flush()
+        self.assertEqual(list(ChatMessage.objects.values_list("message", flat=True)), ["hello"])
+        self.assertEqual(os.listdir(self.spill_dir), [])
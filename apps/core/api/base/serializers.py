@@ -1,8 +1,96 @@
+from django.db.models import Manager, Model, QuerySet, prefetch_related_objects
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
 from apps.core.models import Address
 
 
+class EagerLoadingListSerializer(serializers.ListSerializer):
+    """
+    Applies the child serializer's eager-loading hints before iterating, so
+    ``Serializer(queryset, many=True)`` runs a fixed number of queries
+    whatever the number of rows.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        if isinstance(data, QuerySet) and data._result_cache is None:
+            data = self.child.setup_eager_loading(data)
+        elif isinstance(data, (list, tuple, QuerySet)):
+            # already fetched rows (slices, keyset pages): fill the relations in bulk
+            self.child.prefetch_eager_loading(list(data))
+        return super().to_representation(data)
+
+
+class EagerLoadingMixin:
+    """
+    Declares the relations a nested model serializer reads. ``many=True``
+    instances apply them automatically; views serializing a single object can
+    call ``setup_eager_loading`` on their queryset.
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    # model fields read by SerializerMethodFields, loaded by ``project`` querysets
+    method_field_sources = {}
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
+    @classmethod
+    def prefetch_eager_loading(cls, instances):
+        lookups = [*cls.select_related_fields, *cls.prefetch_related_fields]
+        instances = [obj for obj in instances if isinstance(obj, Model)]
+        if instances and lookups:
+            prefetch_related_objects(instances, *lookups)
+        return instances
+
+    @classmethod
+    def project(cls, fields):
+        """
+        Handles a ``fields=a,b,c`` query parameter. Returns a subclass that
+        serializes only those fields, with only the eager-loading hints they
+        need, and the model fields to pass to ``.only()``. Returns
+        ``(cls, None)`` when ``fields`` is empty.
+        """
+        names = tuple(dict.fromkeys(name.strip() for name in (fields or "").split(",") if name.strip()))
+        if not names:
+            return cls, None
+
+        unknown = sorted(set(names) - set(cls().fields))
+        if unknown:
+            raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}."})
+
+        model = cls.Meta.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        only = [model._meta.pk.name]
+        for name in names:
+            if name in concrete:
+                only.append(name)
+            only.extend(cls.method_field_sources.get(name, ()))
+
+        def wanted(lookups):
+            return tuple(lookup for lookup in lookups if lookup.split("__")[0] in names)
+
+        projected = type(
+            f"Projected{cls.__name__}",
+            (cls,),
+            {
+                "Meta": type("Meta", (cls.Meta,), {"fields": names}),
+                "select_related_fields": wanted(cls.select_related_fields),
+                "prefetch_related_fields": wanted(cls.prefetch_related_fields),
+                "__module__": cls.__module__,
+            },
+        )
+        return projected, list(dict.fromkeys(only))
+
+
 class BaseAddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = Address
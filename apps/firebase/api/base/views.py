@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from apps.firebase.utils.fcm_helper import send_push_notification
 from rest_framework.views import APIView
+from django.utils import timezone
 
 
 class BaseFCMTokenViewSet(viewsets.ModelViewSet):
@@ -22,6 +23,7 @@ class BaseFCMTokenViewSet(viewsets.ModelViewSet):
         # Check if this token already exists
         existing_token = TokenFCM.objects.filter(token=token).first()
         if existing_token:
+            TokenFCM.objects.filter(pk=existing_token.pk).update(last_used_at=timezone.now())
             return Response({"message": "Token already exists", "token_id": existing_token.id})
 
         # 🔴 Remove this line to keep previous tokens
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('firebase', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tokenfcm',
+            name='last_used_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
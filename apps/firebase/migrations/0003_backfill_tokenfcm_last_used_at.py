@@ -0,0 +1,22 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:00
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def backfill_last_used_at(apps, schema_editor):
+    # Tokens registered before last_used_at existed may still be live; start
+    # their prune window at deploy time instead of at created_at.
+    TokenFCM = apps.get_model('firebase', 'TokenFCM')
+    TokenFCM.objects.filter(last_used_at__isnull=True).update(last_used_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('firebase', '0002_tokenfcm_last_used_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_last_used_at, migrations.RunPython.noop),
+    ]
@@ -11,6 +11,7 @@ class TokenFCM(models.Model):
         default="web"  # Set a default value
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"{self.user} - {self.device_type}"
@@ -0,0 +1,16 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from apps.firebase.utils.fcm_helper import prune_stale_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="delivery.prune_stale_fcm_tokens")
+def prune_stale_fcm_tokens_task(days=None):
+    days = days or getattr(settings, "FCM_TOKEN_STALE_DAYS", 60)
+    removed = prune_stale_tokens(days)
+    logger.info("Pruned %s FCM tokens unused for %s days", removed, days)
+    return removed
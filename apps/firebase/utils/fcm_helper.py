@@ -1,144 +1,215 @@
-from firebase_admin import messaging, credentials
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from firebase_admin import exceptions, messaging, credentials
 from apps.firebase.models import TokenFCM
 
+logger = logging.getLogger(__name__)
+
+FCM_MULTICAST_LIMIT = 500  # tokens per send_each_for_multicast call
+
+TOKEN_DB_CHUNK = 1000  # tokens per DELETE/UPDATE ... WHERE token IN (...)
+
+# FCM errors meaning the token itself is dead; anything else (quota,
+# unavailable, internal, auth) is transient or ours and keeps the token.
+# INVALID_ARGUMENT is not listed: it also covers a malformed message and
+# only counts when FCM names the token (see is_invalid_token_error).
+INVALID_TOKEN_ERRORS = (
+    messaging.UnregisteredError,
+    messaging.SenderIdMismatchError,
+)
+
+# Worth another attempt later: FCM is throttling us or briefly unavailable.
+RETRYABLE_ERRORS = (
+    messaging.QuotaExceededError,
+    exceptions.UnavailableError,
+    exceptions.InternalError,
+    exceptions.DeadlineExceededError,
+)
+
+
+def build_message_template(data):
+    """
+    Keyword arguments shared by every multicast chunk of one notification;
+    only the token list differs between chunks.
+    """
+    return {
+        "notification": messaging.Notification(
+            title=data["campaign_title"],
+            body=data["campaign_message"],
+            image="imagurl.png",
+        ),
+        "android": messaging.AndroidConfig(
+            notification=messaging.AndroidNotification(
+                icon="notification_icon",  # Icon resource name in your Android app
+                color="#FF0000",  # Accent color for the notification
+                image="https://www.example.com/notification-image.jpg",  # Android large image
+            )
+        ),
+        "apns": messaging.APNSConfig(
+            payload=messaging.APNSPayload(
+                aps=messaging.Aps(
+                    badge=1,  # iOS badge count
+                    mutable_content=True,  # Required for iOS to download and display images
+                    sound="default"
+                )
+            ),
+            fcm_options=messaging.APNSFCMOptions(
+                image="https://www.example.com/notification-image.jpg"  # iOS image URL
+            )
+        ),
+        "webpush": messaging.WebpushConfig(
+            notification=messaging.WebpushNotification(
+                icon="https://www.example.com/icon.png",  # Web notification icon
+                badge="https://www.example.com/badge.png",  # Web notification badge
+                image="https://www.example.com/image.jpg"  # Web notification image
+            )
+        ),
+        "data": {
+            "click_action": "https://www.hungry-tiger.com/",
+        },
+    }
+
+
+def _send_chunk(messaging_client, template, chunk):
+    try:
+        batch = messaging_client.send_each_for_multicast(
+            messaging.MulticastMessage(tokens=chunk, **template)
+        )
+    except Exception as e:
+        # the whole request failed (network, auth, quota): every token in it failed
+        return [(token, None, e) for token in chunk]
 
+    return [
+        (token, response.message_id if response.success else None, None if response.success else response.exception)
+        for token, response in zip(chunk, batch.responses)
+    ]
 
 
+def send_push_notification(tokens, data, messaging_client=None, max_workers=None):
+    """
+    Sends one notification to ``tokens`` with FCM multicast.
 
-def send_push_notification(tokens, data):
+    Tokens are de-duplicated and split into chunks of 500 (the FCM limit per
+    multicast request); chunks are sent concurrently on a pool bounded by
+    settings.FCM_MAX_CONCURRENCY. ``messaging_client`` defaults to
+    ``firebase_admin.messaging`` and can be replaced by anything providing
+    ``send_each_for_multicast``.
+    """
+    messaging_client = messaging_client or messaging
+    tokens = list(dict.fromkeys(token for token in tokens if token))
+    logger.info("Sending push to %s devices", len(tokens))
 
-    print(f"Sending to {len(tokens)} devices")
-    
     results = {
         "successful": 0,
         "failed": 0,
         "failures": [],
-        "invalid_tokens": []  
+        "invalid_tokens": [],
+        "retry_tokens": [],
+        "batches": 0,
     }
-    
-    for token in tokens:
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=data["campaign_title"],
-                body=data["campaign_message"],
-                image="imagurl.png",  
-            ),
-            android=messaging.AndroidConfig(
-                notification=messaging.AndroidNotification(
-                    icon="notification_icon",  # Icon resource name in your Android app
-                    color="#FF0000",  # Accent color for the notification
-                    image="https://www.example.com/notification-image.jpg",  # Android large image
-                )
-            ),
-            apns=messaging.APNSConfig(
-                payload=messaging.APNSPayload(
-                    aps=messaging.Aps(
-                        badge=1,  # iOS badge count
-                        mutable_content=True,  # Required for iOS to download and display images
-                        sound="default"
-                    )
-                ),
-                fcm_options=messaging.APNSFCMOptions(
-                    image="https://www.example.com/notification-image.jpg"  # iOS image URL
-                )
-            ),
-            webpush=messaging.WebpushConfig(
-                notification=messaging.WebpushNotification(
-                    icon="https://www.example.com/icon.png",  # Web notification icon
-                    badge="https://www.example.com/badge.png",  # Web notification badge
-                    image="https://www.example.com/image.jpg"  # Web notification image
-                )
-            ),
-            data={
-                "click_action": "https://www.hungry-tiger.com/",
-                # "image_url": str(campaign_image),  # Also including in data for custom handling
-                # "badge_count": "1",
-                # "campaign_category": str(campaign_category),
-                # "campaign_is_active": str(campaign_is_active),
-                # "restaurant_name": str(restaurant_name),
-            },
-            token=token
-        )
+    if not tokens:
+        return results
+
+    template = build_message_template(data)
+    chunks = [tokens[i:i + FCM_MULTICAST_LIMIT] for i in range(0, len(tokens), FCM_MULTICAST_LIMIT)]
+    results["batches"] = len(chunks)
+
+    max_workers = min(max_workers or getattr(settings, "FCM_MAX_CONCURRENCY", 4), len(chunks))
+    if max_workers <= 1:
+        outcomes = [_send_chunk(messaging_client, template, chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(lambda chunk: _send_chunk(messaging_client, template, chunk), chunks))
+
+    delivered = []
+    for outcome in outcomes:
+        for token, message_id, error in outcome:
+            if error is None:
+                results["successful"] += 1
+                delivered.append(token)
+                continue
 
-        try:
-            response = messaging.send(message)
-            print(f"Notification sent successfully to {token[:10]}...: {response}")
-            results["successful"] += 1
-        except Exception as e:
-            error_message = f"Error sending to {token[:10]}...: {e}"
-            print(error_message)
             results["failed"] += 1
-            results["failures"].append({"token": token, "error": str(e)})
-            
-            error_str = str(e).lower()
-            if any(reason in error_str for reason in [
-                "invalid registration", 
-                "not registered", 
-                "invalid token", 
-                "unregistered", 
-                "expired"
-            ]):
+            results["failures"].append({
+                "token": token,
+                "error": str(error),
+                "code": getattr(error, "code", None),
+            })
+            if is_invalid_token_error(error):
                 results["invalid_tokens"].append(token)
-                print(f"Token marked for removal: {token[:10]}...")
-    print("invalid token", results["failures"])
-    # Remove all failed tokens from TokenFCM
+            elif is_retryable_error(error):
+                results["retry_tokens"].append(token)
+
+    logger.info(
+        "Push sent: %s ok, %s failed in %s batches", results["successful"], results["failed"], results["batches"]
+    )
     if results["invalid_tokens"]:
         remove_invalid_tokens_from_database(results["invalid_tokens"])
-        print(f"Removed {len(results['invalid_tokens'])} invalid tokens from TokenFCM database")
-    elif results["failures"]:
-        # If we didn't catch any as invalid but there were failures, remove those tokens too
-        failed_tokens = [failure["token"] for failure in results["failures"]]
-        remove_invalid_tokens_from_database(failed_tokens)
-        print(f"Removed {len(failed_tokens)} failed tokens from TokenFCM database")
+    if delivered:
+        touch_tokens(delivered)
     return results
 
 
+def is_invalid_token_error(error):
+    if isinstance(error, INVALID_TOKEN_ERRORS):
+        return True
+    # "The registration token is not a valid FCM registration token"
+    return isinstance(error, exceptions.InvalidArgumentError) and "registration token" in str(error).lower()
+
+
+def is_retryable_error(error):
+    # errors outside FirebaseError come from the transport (timeouts, resets)
+    return isinstance(error, RETRYABLE_ERRORS) or not isinstance(error, exceptions.FirebaseError)
+
+
+def _chunked(values, size=TOKEN_DB_CHUNK):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
 def remove_invalid_tokens_from_database(invalid_tokens):
     """
-    Remove invalid tokens from the TokenFCM database using Django ORM
+    Delete the given tokens from TokenFCM with one ``token IN (...)`` query
+    per chunk. Returns the number of rows removed.
     """
-    
     removed_count = 0
-    for token_value in invalid_tokens:
+    for chunk in _chunked(set(invalid_tokens)):
         try:
-            # Find the TokenFCM object by token value
-            token_objects = TokenFCM.objects.filter(token=token_value)
-            
-            # Delete all matching objects
-            deleted_count = token_objects.delete()[0]
-            removed_count += deleted_count
-            print(f"Removed {deleted_count} records for token {token_value[:10]}...")
+            removed_count += TokenFCM.objects.filter(token__in=chunk).delete()[0]
         except Exception as e:
-            print(f"Error removing token {token_value[:10]}...: {e}")
-    
-    print(f"Successfully removed {removed_count} token records from database")
+            logger.error("Error removing %s invalid tokens: %s", len(chunk), e)
 
+    logger.info("Removed %s invalid tokens from TokenFCM", removed_count)
+    return removed_count
 
 
+def touch_tokens(tokens, now=None):
     """
-    Remove invalid tokens from the TokenFCM database using Django ORM
+    Record that ``tokens`` were delivered to. Rows stamped within the last
+    hour are skipped so a busy device isn't rewritten on every push.
     """
-    print("invalid_tokens", invalid_tokens)
-    removed_count = 0
-    for token_value in invalid_tokens:
-        print(token_value, "token value")
+    now = now or timezone.now()
+    stale = Q(last_used_at__isnull=True) | Q(last_used_at__lt=now - timedelta(hours=1))
+    for chunk in _chunked(set(tokens)):
         try:
-            # Find the TokenFCM object by token value
-            # Assuming you have a field named 'token' that stores the token value
-            token_objects = TokenFCM.objects.filter(token=token_value)
-            
-            # Delete all matching objects
-            deleted_count = token_objects.delete()[0]
-            removed_count += deleted_count
-            print(f"Removed {deleted_count} records for token {token_value[:10]}...")
+            TokenFCM.objects.filter(stale, token__in=chunk).update(last_used_at=now)
         except Exception as e:
-            print(f"Error removing token {token_value[:10]}...: {e}")
-    
-    print(f"Successfully removed {removed_count} token records from database")
-
-
+            logger.error("Error updating last_used_at for %s tokens: %s", len(chunk), e)
 
 
+def prune_stale_tokens(days, now=None):
+    """
+    Delete tokens neither delivered to nor re-registered within ``days``.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    stale = Q(last_used_at__lt=cutoff) | Q(last_used_at__isnull=True, created_at__lt=cutoff)
+    return TokenFCM.objects.filter(stale).delete()[0]
 
 
 def get_dynamic_message(order, event_type, restaurant_name):
@@ -14,6 +14,7 @@ from pathlib import Path
 from firebase_admin import initialize_app, credentials, get_app
 
 from decouple import config
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -263,6 +264,26 @@ CHANNEL_LAYERS = {
     },
 }
 
+# CHAT AUTHENTICATION
+# Verified chat tokens are cached per process; rejected ones for a shorter
+# time. Driver tokens are checked against this service's authtoken table
+# directly unless CHAT_AUTH_LOCAL_DRIVER_TOKENS is off.
+
+CHAT_AUTH_CACHE_TTL = config("CHAT_AUTH_CACHE_TTL", default=300, cast=int)
+CHAT_AUTH_NEGATIVE_TTL = config("CHAT_AUTH_NEGATIVE_TTL", default=30, cast=int)
+CHAT_AUTH_CACHE_SIZE = config("CHAT_AUTH_CACHE_SIZE", default=10000, cast=int)
+CHAT_AUTH_TIMEOUT = config("CHAT_AUTH_TIMEOUT", default=10, cast=float)
+CHAT_AUTH_LOCAL_DRIVER_TOKENS = config("CHAT_AUTH_LOCAL_DRIVER_TOKENS", default=True, cast=bool)
+
+# CHAT PERSISTENCE
+# Messages are broadcast first and written in batches; the journal directory
+# holds unflushed and failed batches until they are committed.
+
+CHAT_WRITE_BEHIND = config("CHAT_WRITE_BEHIND", default=True, cast=bool)
+CHAT_PERSIST_BATCH_SIZE = config("CHAT_PERSIST_BATCH_SIZE", default=100, cast=int)
+CHAT_PERSIST_FLUSH_INTERVAL = config("CHAT_PERSIST_FLUSH_INTERVAL", default=0.5, cast=float)
+CHAT_SPILL_DIR = config("CHAT_SPILL_DIR", default=os.path.join(BASE_DIR, "logs", "chat_spill"))
+
 CSRF_TRUSTED_ORIGINS = [
     'https://raider.api.chatchefs.com',
 ]
@@ -287,6 +308,139 @@ CELERY_ENABLE_UTC = False
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
 
+# CACHE
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("CACHE_REDIS_URL", default=REDIS_HOST),
+    }
+}
+
+
+# GEOCODING CACHE
+
+GEOCODE_CACHE_LOCAL_SIZE = config("GEOCODE_CACHE_LOCAL_SIZE", default=1024, cast=int)
+GEOCODE_CACHE_TTL = config("GEOCODE_CACHE_TTL", default=30 * 24 * 3600, cast=int)
+GEOCODE_CACHE_NEGATIVE_TTL = config("GEOCODE_CACHE_NEGATIVE_TTL", default=3600, cast=int)
+
+
+# ROUTING (apps.billing.services.routing)
+# ROUTING_BACKENDS can map "google"/"mapbox" to StubRoutingBackend for tests.
+
+ROUTING_CACHE_GRID_DEGREES = config("ROUTING_CACHE_GRID_DEGREES", default=0.001, cast=float)
+ROUTING_CACHE_TTL = config("ROUTING_CACHE_TTL", default=24 * 3600, cast=int)
+ROUTING_CACHE_BUCKET_HOURS = config("ROUTING_CACHE_BUCKET_HOURS", default=3, cast=int)
+# traffic buckets follow local time where the deliveries happen, not TIME_ZONE
+ROUTING_TIME_ZONE = config("ROUTING_TIME_ZONE", default="Asia/Dhaka")
+
+
+# EARNING CONFIG CACHE
+# Upper bound (seconds) for other workers to pick up DeliveryEarningConfig edits.
+
+EARNING_CONFIG_CHECK_SECONDS = config("EARNING_CONFIG_CHECK_SECONDS", default=5, cast=int)
+
+
+# WEBHOOK OUTBOX
+# Partner status webhooks are written to billing.WebhookOutbox and sent by the
+# delivery.dispatch_webhook_outbox task with exponential backoff. Sent rows are
+# deleted after SENT_RETENTION_DAYS, failed ones (kept for review) after
+# FAILED_RETENTION_DAYS.
+
+WEBHOOK_OUTBOX_BATCH_SIZE = config("WEBHOOK_OUTBOX_BATCH_SIZE", default=100, cast=int)
+WEBHOOK_TIMEOUT_SECONDS = config("WEBHOOK_TIMEOUT_SECONDS", default=5, cast=float)
+WEBHOOK_POOL_SIZE = config("WEBHOOK_POOL_SIZE", default=10, cast=int)
+WEBHOOK_MAX_ATTEMPTS = config("WEBHOOK_MAX_ATTEMPTS", default=8, cast=int)
+WEBHOOK_BACKOFF_BASE_SECONDS = config("WEBHOOK_BACKOFF_BASE_SECONDS", default=10, cast=int)
+WEBHOOK_BACKOFF_MAX_SECONDS = config("WEBHOOK_BACKOFF_MAX_SECONDS", default=3600, cast=int)
+WEBHOOK_SENT_RETENTION_DAYS = config("WEBHOOK_SENT_RETENTION_DAYS", default=7, cast=int)
+WEBHOOK_FAILED_RETENTION_DAYS = config("WEBHOOK_FAILED_RETENTION_DAYS", default=30, cast=int)
+# Hungrytiger's raider endpoint, told about driver and auto cancellations in
+# addition to the CHATCHEFS_URL status webhook
+HUNGRYTIGER_RAIDER_WEBHOOK_URL = config(
+    "HUNGRYTIGER_RAIDER_WEBHOOK_URL", default="https://api.hungrytiger.chatchefs.com/api/webhook/v1/raider/"
+)
+
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-webhook-outbox": {
+        "task": "delivery.dispatch_webhook_outbox",
+        "schedule": 30.0,
+    },
+    "prune-webhook-outbox": {
+        "task": "delivery.prune_webhook_outbox",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
+
+
+# FIREBASE PUSH
+# Upper bound on concurrent FCM multicast requests (500 tokens each) per send,
+# the pickup radius for "new order nearby" pushes to drivers, and how long an
+# unused device token is kept before the daily prune removes it. Repeats of a
+# delivery event inside PUSH_COALESCE_SECONDS are sent once.
+
+FCM_MAX_CONCURRENCY = config("FCM_MAX_CONCURRENCY", default=4, cast=int)
+PUSH_NEARBY_DRIVER_RADIUS_KM = config("PUSH_NEARBY_DRIVER_RADIUS_KM", default=3, cast=float)
+FCM_TOKEN_STALE_DAYS = config("FCM_TOKEN_STALE_DAYS", default=60, cast=int)
+PUSH_COALESCE_SECONDS = config("PUSH_COALESCE_SECONDS", default=30, cast=int)
+PUSH_TASK_RATE_LIMIT = config("PUSH_TASK_RATE_LIMIT", default="20/s")
+
+# Push fan-out runs on its own queue so a large broadcast can't hold up other
+# tasks: celery -A delivery worker -Q celery,notifications
+CELERY_TASK_ROUTES = {
+    "delivery.send_delivery_notification": {"queue": "notifications"},
+}
+
+CELERY_BEAT_SCHEDULE["prune-stale-fcm-tokens"] = {
+    "task": "delivery.prune_stale_fcm_tokens",
+    "schedule": crontab(hour=4, minute=0),
+}
+
+
+# DELIVERY TRACKING STREAM
+# Events pushed over ws/tracking/ are kept this long (and at most this many
+# per stream) so a reconnecting client can resume from its last seq.
+
+TRACKING_REPLAY_SECONDS = config("TRACKING_REPLAY_SECONDS", default=600, cast=int)
+TRACKING_REPLAY_MAX_EVENTS = config("TRACKING_REPLAY_MAX_EVENTS", default=500, cast=int)
+
+
+# DRIVER LOCATIONS
+# Live driver positions are kept in a Redis GEO set ("memory" keeps them in
+# the process, for development only); User.latitude/longitude is rewritten
+# after moving FLUSH_METERS or every FLUSH_SECONDS. Lookups ignore drivers
+# silent for STALE_SECONDS and fall back to the database columns when none is
+# in range; the delivery.prune_driver_locations task evicts them every minute.
+DRIVER_LOCATION_BACKEND = config("DRIVER_LOCATION_BACKEND", default="redis")
+DRIVER_LOCATION_REDIS_URL = config("DRIVER_LOCATION_REDIS_URL", default=REDIS_HOST)
+DRIVER_LOCATION_STALE_SECONDS = config("DRIVER_LOCATION_STALE_SECONDS", default=300, cast=int)
+DRIVER_LOCATION_FLUSH_METERS = config("DRIVER_LOCATION_FLUSH_METERS", default=100, cast=float)
+DRIVER_LOCATION_FLUSH_SECONDS = config("DRIVER_LOCATION_FLUSH_SECONDS", default=60, cast=int)
+
+CELERY_BEAT_SCHEDULE["prune-driver-locations"] = {
+    "task": "delivery.prune_driver_locations",
+    "schedule": 60.0,
+}
+
+
+# DASHBOARD CACHE
+# Per-day dashboard summaries of closed days are cached until a late change
+# to one of their deliveries or DASHBOARD_CLOSED_DAY_TTL seconds; today's
+# summary and lifetime totals expire after DASHBOARD_TODAY_TTL seconds. A
+# request may span at most DASHBOARD_MAX_DAYS days.
+DASHBOARD_TODAY_TTL = config("DASHBOARD_TODAY_TTL", default=60, cast=int)
+DASHBOARD_CLOSED_DAY_TTL = config("DASHBOARD_CLOSED_DAY_TTL", default=30 * 24 * 60 * 60, cast=int)
+DASHBOARD_MAX_DAYS = config("DASHBOARD_MAX_DAYS", default=366, cast=int)
+
+
+# AVAILABLE ORDERS GRID INDEX
+
+OPEN_DELIVERY_INDEX_CELL_KM = config("OPEN_DELIVERY_INDEX_CELL_KM", default=1.0, cast=float)
+OPEN_DELIVERY_INDEX_REFRESH_SECONDS = config("OPEN_DELIVERY_INDEX_REFRESH_SECONDS", default=30, cast=int)
+# how soon other workers pick up a newly indexed delivery
+OPEN_DELIVERY_INDEX_MIN_REFRESH_SECONDS = config("OPEN_DELIVERY_INDEX_MIN_REFRESH_SECONDS", default=2, cast=int)
+
+
 import os
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 